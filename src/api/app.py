@@ -1,10 +1,21 @@
-from fastapi import FastAPI
-from fastapi.responses import StreamingResponse, JSONResponse
+from contextlib import AsyncExitStack, nullcontext
+
+from fastapi import FastAPI, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
+from starlette.background import BackgroundTask
 
+from src.api.scheduler import AdmissionRejected, get_admission_controller
+from src.memory.session_store import session_stats
 from src.pipeline import run_rag, stream_rag
-from src.utils.logger import log_info, log_warning, log_error
+from src.config import Config
+from src.registry import cache_stats, get_llm, readiness, start_background_warmup
+from src.utils.logger import log_info, log_warning, log_error, new_request_id
+from src.utils.metrics import render_metrics
+from src.utils.profiling import list_profiles, profile_request, read_profile, should_profile
+from src.utils.tracing import get_trace_recorder, render_waterfall
 
 
 # =====================================================
@@ -28,6 +39,138 @@ app.add_middleware(
 )
 
 
+# =====================================================
+# Admission control (kapasite dolu → 429/503 + Retry-After)
+# =====================================================
+
+@app.exception_handler(AdmissionRejected)
+async def admission_rejected_handler(request: Request, exc: AdmissionRejected):
+    return JSONResponse(
+        status_code=exc.status_code,
+        content={"error": exc.reason},
+        headers={"Retry-After": str(exc.retry_after)},
+    )
+
+
+async def _admit(stack: AsyncExitStack, session_id: str, pool: str) -> None:
+    """
+    Önce session kilidi (aynı session'ın turları sırayla), sonra kapasite slotu.
+    Sıra önemli: aynı session'ın bekleyen istekleri slot işgal etmez.
+    """
+    scheduler = get_admission_controller()
+    await stack.enter_async_context(scheduler.session(session_id))
+    ticket = await scheduler.acquire(pool)
+    stack.callback(ticket.release)
+
+
+# =====================================================
+# Startup warmup + health / readiness
+# =====================================================
+
+@app.on_event("startup")
+def warmup_components():
+    """
+    Embedding modeli, Chroma client ve RAGGraph arka planda bir kez yüklenir.
+    Böylece ilk DOMAIN isteği model yükleme maliyetini ödemez.
+    """
+    log_info("[API] Startup → bileşen warmup başlatılıyor")
+    start_background_warmup()
+
+
+@app.get("/health")
+def health():
+    """Liveness: süreç ayakta mı?"""
+    return {"status": "ok"}
+
+
+@app.get("/ready")
+def ready():
+    """Readiness: embedding modeli yüklenip warmup bitene kadar 503 döner."""
+    status = readiness()
+    if not status["ready"]:
+        return JSONResponse(status_code=503, content=status)
+    return status
+
+
+@app.get("/cache/stats")
+def get_cache_stats():
+    """Süreç içi cache'lerin hit/miss sayaçları."""
+    return cache_stats()
+
+
+@app.get("/scheduler/stats")
+def get_scheduler_stats():
+    """Admission control havuzlarının doluluk / kuyruk / red sayaçları."""
+    return get_admission_controller().stats()
+
+
+@app.get("/llm/stats")
+def get_llm_stats():
+    """LLM gateway: eşzamanlı çağrı, retry ve hata sayaçları."""
+    return get_llm().stats()
+
+
+@app.get("/sessions/stats")
+def get_session_stats():
+    """Canlı session sayısı / bellek kullanımı ve diske atılan session sayaçları."""
+    return session_stats()
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    """
+    Prometheus text formatında: aşama (stage × route) ve istek süresi
+    histogramları, istek sayaçları, in-flight gauge'ları, cache hit/miss
+    ve LLM gateway sayaçları.
+    """
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+@app.get("/debug/traces")
+def list_traces(order: str = "slowest", limit: int = 20):
+    """Bellekteki trace özetleri: order=slowest (en yavaş N) | recent (son istekler)."""
+    recorder = get_trace_recorder()
+    traces = recorder.recent(limit) if order == "recent" else recorder.slowest(limit)
+    return {"stats": recorder.stats(), "traces": [t.summary() for t in traces]}
+
+
+@app.get("/debug/traces/{request_id}")
+def get_trace(request_id: str, format: str = "json"):
+    """Tek isteğin span'ları; format=text ile metin waterfall."""
+    trace = get_trace_recorder().get(request_id)
+    if trace is None:
+        return JSONResponse(status_code=404, content={"error": "trace bulunamadı (bellekte tutulmuyor olabilir)."})
+    data = trace.to_dict()
+    if format == "text":
+        return PlainTextResponse(render_waterfall(data))
+    return data
+
+
+@app.get("/debug/profiles")
+def get_profiles(limit: int = 20):
+    """Son profiller (PROFILE_ENABLED ve X-Profile başlığı / PROFILE_SAMPLE_RATE ile üretilir)."""
+    return {"enabled": Config.PROFILE_ENABLED, "dir": Config.PROFILE_DIR, "profiles": list_profiles(limit)}
+
+
+@app.get("/debug/profiles/{request_id}")
+def get_profile(request_id: str, format: str = "json"):
+    """Tek profil: format=json (özet + en pahalı fonksiyonlar) | folded (flamegraph girdisi)."""
+    content = read_profile(request_id, "folded" if format == "folded" else "json")
+    if content is None:
+        return JSONResponse(status_code=404, content={"error": "profil bulunamadı."})
+    if format == "folded":
+        return PlainTextResponse(content)
+    return Response(content, media_type="application/json")
+
+
+def _run_rag_job(query: str, session_id: str, request_id: str, profile: bool):
+    """Thread pool'da çalışır; profil istenmişse bu thread örneklenir."""
+    if not profile:
+        return run_rag(query, session_id, request_id)
+    with profile_request(request_id, "sync"):
+        return run_rag(query, session_id, request_id)
+
+
 # =====================================================
 # Pydantic Modelleri
 # =====================================================
@@ -51,10 +194,12 @@ class RAGResponse(BaseModel):
 # =====================================================
 
 @app.post("/rag/query", response_model=RAGResponse)
-def rag_query(req: QueryRequest):
+async def rag_query(req: QueryRequest, request: Request, response: Response):
     """
     Senkron RAG cevabı.
     Bu uç tek seferde tam cevabı döner.
+    run_rag bloklayan bir çağrı olduğu için "sync" havuzundan slot alındıktan
+    sonra thread pool'da çalıştırılır.
     """
     log_info(f"[API] /rag/query hit. session={req.session_id} q='{req.query}'")
 
@@ -66,7 +211,14 @@ def rag_query(req: QueryRequest):
             content={"error": "session_id zorunludur."},
         )
 
-    result = run_rag(req.query, req.session_id)
+    # request id yanıt başlığında döner: /debug/traces ve /debug/profiles ile eşleştirmek için
+    request_id = new_request_id()
+    response.headers["X-Request-ID"] = request_id
+    profile = should_profile(request.headers.get(Config.PROFILE_HEADER))
+
+    async with AsyncExitStack() as stack:
+        await _admit(stack, req.session_id, "sync")
+        result = await run_in_threadpool(_run_rag_job, req.query, req.session_id, request_id, profile)
 
     # result dict -> RAGResponse model
     resp = RAGResponse(
@@ -86,7 +238,7 @@ def rag_query(req: QueryRequest):
 # =====================================================
 
 @app.post("/rag/stream")
-async def rag_stream(req: QueryRequest):
+async def rag_stream(req: QueryRequest, request: Request):
     """
     Streaming (Server-Sent Events) cevabı.
     Frontend bu endpoint'e fetch ile bağlanır ve gelen chunk'ları canlı gösterir.
@@ -104,20 +256,35 @@ async def rag_stream(req: QueryRequest):
             content={"error": "session_id zorunludur."},
         )
 
+    # Slot + session kilidi stream bitene kadar tutulur; generator kapanınca bırakılır.
+    # Generator hiç başlamazsa (istemci erken koparsa) background task bırakır.
+    stack = AsyncExitStack()
+    try:
+        await _admit(stack, req.session_id, "stream")
+    except BaseException:
+        await stack.aclose()
+        raise
+
+    request_id = new_request_id()
+    profile = should_profile(request.headers.get(Config.PROFILE_HEADER))
+
     async def event_generator():
         try:
             # İlk başta client'a hemen bir START event'i gönderiyoruz
             # böylece istemci stream'in başladığını anında görebilir.
             yield "data: [STREAM_STARTED]\n\n"
-            async for chunk in stream_rag(req.query, req.session_id):
-                # chunk zaten "data: ...\n\n" formatında dönüyor
-                yield chunk
+            with profile_request(request_id, "stream") if profile else nullcontext():
+                async for chunk in stream_rag(req.query, req.session_id, request_id):
+                    # chunk zaten "data: ...\n\n" formatında dönüyor
+                    yield chunk
             # SSE standardı gereği kapanış için [DONE] gönderebiliriz.
             yield "data: [DONE]\n\n"
         except Exception as e:
             log_error(f"[API] stream error: {e}")
             # Hata durumunda da event-stream üzerinden hata yay
             yield f"data: [ERROR] {str(e)}\n\n"
+        finally:
+            await stack.aclose()
 
     # StreamingResponse ile chunked SSE yanıtı veriyoruz
     # Cache-Control ve X-Accel-Buffering header'ları bazı proxylerin
@@ -128,5 +295,7 @@ async def rag_stream(req: QueryRequest):
         headers={
             "Cache-Control": "no-cache",
             "X-Accel-Buffering": "no",
+            "X-Request-ID": request_id,
         },
+        background=BackgroundTask(stack.aclose),
     )
@@ -0,0 +1,237 @@
+# src/api/scheduler.py
+"""
+İstek kabul kontrolü (admission control) + session bazlı sıralama.
+
+- Global eşzamanlılık sınırı: aynı anda en fazla RAG_MAX_CONCURRENCY istek işlenir.
+- Ayrı kapasite havuzları: streaming ve sync trafik birbirinin slotlarını tüketmez.
+- Sınırlı bekleme kuyruğu: kuyruk doluysa 429, kuyrukta süre aşılırsa 503
+  (ikisinde de Retry-After header'ı ile).
+- Session kilidi: aynı session_id'nin turları sırayla işlenir; böylece aynı
+  ChatMemoryManager'a iki istek aynı anda yazmaz. Kilit süreç içidir; birden
+  çok worker'da (SESSION_BACKEND=sqlite) turlar backend'e atomik eklenir.
+
+Kabul edilen isteklerin gecikmesi aşırı yükte de korunur; fazlası erken reddedilir.
+"""
+from __future__ import annotations
+
+import asyncio
+import itertools
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Deque, Dict, Optional, Tuple
+
+from src.config import Config
+from src.utils.logger import log_warning
+
+
+class AdmissionRejected(Exception):
+    """Kapasite/kuyruk dolu → istemciye status_code + Retry-After ile dönülür."""
+
+    def __init__(self, status_code: int, reason: str, retry_after: int):
+        super().__init__(reason)
+        self.status_code = status_code
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class _Pool:
+    def __init__(self, name: str, capacity: int, max_queue: int):
+        self.name = name
+        self.capacity = max(1, int(capacity))
+        self.max_queue = max(0, int(max_queue))
+        self.active = 0
+        # (sıra no, future) → global slot boşalınca en eski bekleyen önce alınır
+        self.waiters: Deque[Tuple[int, asyncio.Future]] = deque()
+
+        self.admitted = 0
+        self.rejected_full = 0
+        self.rejected_timeout = 0
+        self.total_wait = 0.0
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "capacity": self.capacity,
+            "active": self.active,
+            "waiting": len(self.waiters),
+            "max_queue": self.max_queue,
+            "admitted": self.admitted,
+            "rejected_queue_full": self.rejected_full,
+            "rejected_timeout": self.rejected_timeout,
+            "avg_wait_ms": round(1000 * self.total_wait / self.admitted, 2) if self.admitted else 0.0,
+        }
+
+
+class Ticket:
+    """Kabul edilen isteğin slotu. release() idempotent'tir."""
+
+    def __init__(self, controller: "AdmissionController", pool: str):
+        self._controller = controller
+        self._pool = pool
+        self._released = False
+
+    def release(self) -> None:
+        if not self._released:
+            self._released = True
+            self._controller._release(self._pool)
+
+
+class AdmissionController:
+    """
+    Tek event loop içinde çalışır (asyncio primitive'leri); kilitlere gerek yok.
+    Slot devri FIFO'dur: boşalan slot, uygun havuzlardaki en eski bekleyene verilir.
+    """
+
+    def __init__(
+        self,
+        global_limit: int,
+        pools: Dict[str, Tuple[int, int]],
+        queue_timeout: float = 10.0,
+        retry_after: int = 2,
+        session_max_pending: int = 4,
+    ):
+        self.global_limit = max(1, int(global_limit))
+        self.pools = {name: _Pool(name, cap, queue) for name, (cap, queue) in pools.items()}
+        self.queue_timeout = queue_timeout
+        self.retry_after = retry_after
+        self.session_max_pending = max(1, int(session_max_pending))
+
+        self._active = 0
+        self._seq = itertools.count()
+        # session_id → (kilit, bekleyen+çalışan istek sayısı)
+        self._sessions: Dict[str, Tuple[asyncio.Lock, int]] = {}
+        self.session_rejected = 0
+
+    @classmethod
+    def from_config(cls) -> "AdmissionController":
+        return cls(
+            global_limit=Config.RAG_MAX_CONCURRENCY,
+            pools={
+                "stream": (Config.RAG_STREAM_CONCURRENCY, Config.RAG_STREAM_QUEUE),
+                "sync": (Config.RAG_SYNC_CONCURRENCY, Config.RAG_SYNC_QUEUE),
+            },
+            queue_timeout=Config.RAG_QUEUE_TIMEOUT,
+            retry_after=Config.RAG_RETRY_AFTER,
+            session_max_pending=Config.SESSION_MAX_PENDING,
+        )
+
+    # ---------------------------------------------
+    # slot yönetimi
+    # ---------------------------------------------
+    def _can_admit(self, pool: _Pool) -> bool:
+        return pool.active < pool.capacity and self._active < self.global_limit
+
+    def _admit(self, pool: _Pool) -> None:
+        pool.active += 1
+        self._active += 1
+        pool.admitted += 1
+
+    def _release(self, pool_name: str) -> None:
+        pool = self.pools[pool_name]
+        pool.active -= 1
+        self._active -= 1
+        self._wake()
+
+    def _wake(self) -> None:
+        """Boşalan slotları, uygun havuzlardaki en eski bekleyenlere devreder."""
+        while self._active < self.global_limit:
+            candidates = []
+            for pool in self.pools.values():
+                while pool.waiters and pool.waiters[0][1].done():
+                    pool.waiters.popleft()  # iptal edilmiş / zaman aşımına uğramış
+                if pool.waiters and pool.active < pool.capacity:
+                    candidates.append(pool)
+            if not candidates:
+                return
+            pool = min(candidates, key=lambda p: p.waiters[0][0])
+            _, fut = pool.waiters.popleft()
+            self._admit(pool)
+            fut.set_result(None)
+
+    @staticmethod
+    def _forget(pool: _Pool, entry: Tuple[int, asyncio.Future]) -> None:
+        """Vazgeçen bekleyeni kuyruktan hemen çıkarır (kuyruk dolu sayımı / hızlı yol bozulmasın)."""
+        try:
+            pool.waiters.remove(entry)
+        except ValueError:
+            pass  # _wake zaten çıkarmış
+
+    async def acquire(self, pool_name: str) -> Ticket:
+        pool = self.pools[pool_name]
+        if not pool.waiters and self._can_admit(pool):
+            self._admit(pool)
+            return Ticket(self, pool_name)
+
+        if len(pool.waiters) >= pool.max_queue:
+            pool.rejected_full += 1
+            log_warning(f"[Scheduler] {pool_name} kuyruğu dolu → 429")
+            raise AdmissionRejected(429, f"{pool_name} kapasitesi dolu", self.retry_after)
+
+        fut = asyncio.get_running_loop().create_future()
+        entry = (next(self._seq), fut)
+        pool.waiters.append(entry)
+        started = time.perf_counter()
+        try:
+            await asyncio.wait_for(asyncio.shield(fut), timeout=self.queue_timeout)
+        except asyncio.TimeoutError:
+            if fut.done():
+                # slot tam zaman aşımı anında devredilmiş → kabul et
+                pass
+            else:
+                fut.cancel()
+                self._forget(pool, entry)
+                pool.rejected_timeout += 1
+                log_warning(f"[Scheduler] {pool_name} kuyruğunda zaman aşımı → 503")
+                raise AdmissionRejected(503, f"{pool_name} kuyruğunda bekleme süresi aşıldı", self.retry_after)
+        except BaseException:
+            # istemci bağlantıyı kopardı vb.; slot devredildiyse geri ver
+            if fut.done() and not fut.cancelled():
+                self._release(pool_name)
+            else:
+                fut.cancel()
+                self._forget(pool, entry)
+            raise
+
+        pool.total_wait += time.perf_counter() - started
+        return Ticket(self, pool_name)
+
+    # ---------------------------------------------
+    # session sıralaması
+    # ---------------------------------------------
+    @asynccontextmanager
+    async def session(self, session_id: str) -> AsyncIterator[None]:
+        """Aynı session'ın istekleri geliş sırasıyla, tek tek çalışır."""
+        lock, pending = self._sessions.get(session_id) or (asyncio.Lock(), 0)
+        if pending >= self.session_max_pending:
+            self.session_rejected += 1
+            raise AdmissionRejected(429, "bu session için çok fazla bekleyen istek var", self.retry_after)
+        self._sessions[session_id] = (lock, pending + 1)
+        try:
+            async with lock:
+                yield
+        finally:
+            lock, pending = self._sessions[session_id]
+            if pending <= 1:
+                del self._sessions[session_id]
+            else:
+                self._sessions[session_id] = (lock, pending - 1)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "global_limit": self.global_limit,
+            "active": self._active,
+            "sessions_in_flight": len(self._sessions),
+            "session_rejected": self.session_rejected,
+            "pools": {name: pool.stats() for name, pool in self.pools.items()},
+        }
+
+
+_CONTROLLER: Optional[AdmissionController] = None
+
+
+def get_admission_controller() -> AdmissionController:
+    """API süreci başına tek controller (tek event loop'ta kullanılır)."""
+    global _CONTROLLER
+    if _CONTROLLER is None:
+        _CONTROLLER = AdmissionController.from_config()
+    return _CONTROLLER
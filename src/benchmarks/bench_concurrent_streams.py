@@ -0,0 +1,86 @@
+# src/benchmarks/bench_concurrent_streams.py
+"""
+stream_rag eşzamanlılık testi (yerel sahte LLM ile, ağ gerekmez).
+
+N adet stream aynı anda başlatılır. Sahte LLM her token arasında
+--delay kadar bekler. Sorular kısa sohbet mesajlarıdır; router heuristiği
+onları GENERIC_CHAT'e yollar (gerçek routing ve memory yolu). Event loop
+bloklanmıyorsa stream'ler iç içe (interleaved) ilerler ve toplam süre
+≈ tek stream süresi olur; bloklanıyorsa stream'ler sırayla biter ve
+süre ≈ N × tek stream olur. Aynı kontrol: tests/test_stream_concurrency.py
+
+Çalıştırma:
+    python -m src.benchmarks.bench_concurrent_streams --streams 8 --tokens 20 --delay 0.02
+    python -m src.benchmarks.bench_concurrent_streams --blocking   # eski (senkron) davranışla kıyas
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import time
+from typing import List, Tuple
+
+import src.pipeline as pipeline
+from src.registry import set_llm_provider
+
+
+def _install_fakes(n_tokens: int, delay: float, blocking: bool) -> None:
+    class _TokenProvider:
+        """LLM gateway'e takılan sahte provider; gerçek çağrı yolu (limiter, retry) korunur."""
+
+        def generate(self, prompt, model, timeout):
+            return ""
+
+        async def astream(self, prompt, model, timeout):
+            for i in range(n_tokens):
+                if blocking:
+                    time.sleep(delay)  # eski davranış: senkron iterator event loop'u tıkar
+                else:
+                    await asyncio.sleep(delay)
+                yield f"tok{i} "
+
+    set_llm_provider(_TokenProvider())
+
+
+async def _consume(idx: int, events: List[Tuple[float, int]], t0: float) -> float:
+    async for line in pipeline.stream_rag(f"selam {idx}", f"bench-session-{idx}"):
+        if line.startswith("data: tok"):
+            events.append((time.perf_counter() - t0, idx))
+    return time.perf_counter() - t0
+
+
+def _interleave_ratio(events: List[Tuple[float, int]]) -> float:
+    """Ardışık iki olayın farklı stream'lerden gelme oranı (0 → tamamen seri)."""
+    events.sort()
+    if len(events) < 2:
+        return 0.0
+    switches = sum(1 for a, b in zip(events, events[1:]) if a[1] != b[1])
+    return switches / (len(events) - 1)
+
+
+async def _run(n_streams: int) -> None:
+    events: List[Tuple[float, int]] = []
+    t0 = time.perf_counter()
+    finish = await asyncio.gather(*[_consume(i, events, t0) for i in range(n_streams)])
+    total = time.perf_counter() - t0
+    print(f"toplam süre        : {total:.3f}s")
+    print(f"ilk/son bitiş      : {min(finish):.3f}s / {max(finish):.3f}s")
+    print(f"interleave oranı   : {_interleave_ratio(events):.2f}  (0 = seri, ~1 = tam iç içe)")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--streams", type=int, default=8)
+    parser.add_argument("--tokens", type=int, default=20)
+    parser.add_argument("--delay", type=float, default=0.02, help="token arası gecikme (sn)")
+    parser.add_argument("--blocking", action="store_true", help="senkron (bloklayan) sahte LLM kullan")
+    args = parser.parse_args()
+
+    _install_fakes(args.tokens, args.delay, args.blocking)
+    single = args.tokens * args.delay
+    print(f"streams={args.streams} tokens={args.tokens} delay={args.delay}s (tek stream ≈ {single:.2f}s)")
+    asyncio.run(_run(args.streams))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+# src/benchmarks/bench_memory_prune.py
+"""
+Hafızaya tur yazma (add_turn) gecikmesi: eski ve yeni hafıza sınıfı.
+
+Karşılaştırma (aynı sahte LLM, aynı tur senaryosu):
+- old : ConversationSummaryBufferMemory.save_context — her turda prune()
+        tüm ham tamponu LLM'in get_num_tokens_from_messages'ı ile yeniden
+        sayar, limit aşılınca özetleme LLM çağrısını istek yolunda bekler
+- new : ChatMemoryManager.add_turn — token sayısı mesaj başına bir kez
+        yerel tahminle, toplam artımlı; özetleme arka plan havuzunda
+
+Sahte LLM'de sayma çağrısı --count-rtt, özetleme çağrısı --summary-delay
+kadar bekler (Gemini'de ikisi de sağlayıcıya gidebilir). Her tur için
+çağıranın gördüğü süre ölçülür; sonra bellekte kalan mesaj sayısı yazılır.
+
+Çalıştırma:
+    python -m src.benchmarks.bench_memory_prune --turns 10,100,1000 --count-rtt 20 --summary-delay 300
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import statistics
+import time
+from typing import Any, List, Optional, Tuple
+
+from langchain.memory import ConversationSummaryBufferMemory
+from langchain_core.language_models.llms import LLM
+
+from src.memory.chat_memory import _SUMMARY_POOL, ChatMemoryManager
+from src.memory.token_counter import estimate_message_tokens
+
+
+class _FakeLLM(LLM):
+    """Sayma ve özetleme çağrılarına sabit gecikme ekleyen sahte LLM."""
+
+    count_rtt: float = 0.0
+    summary_delay: float = 0.0
+
+    @property
+    def _llm_type(self) -> str:
+        return "bench-fake"
+
+    def _call(self, prompt: str, stop: Optional[List[str]] = None, run_manager: Any = None, **kwargs: Any) -> str:
+        time.sleep(self.summary_delay)
+        return "Kullanıcı şirket hizmetleri hakkında sorular sordu, asistan yanıtladı."
+
+    def get_num_tokens(self, text: str) -> int:
+        time.sleep(self.count_rtt)
+        return estimate_message_tokens(text)
+
+    def get_num_tokens_from_messages(self, messages, tools=None) -> int:
+        time.sleep(self.count_rtt)
+        return sum(estimate_message_tokens(m.content) for m in messages)
+
+
+def _make_turns(n_turns: int, seed: int = 7) -> List[Tuple[str, str]]:
+    rng = random.Random(seed)
+    vocab = [f"kelime{i}" for i in range(2000)] + ["şirket", "hizmet", "müşteri", ",", ".", "?"]
+    return [
+        (
+            " ".join(rng.choices(vocab, k=rng.randint(8, 30))),    # kullanıcı
+            " ".join(rng.choices(vocab, k=rng.randint(60, 200))),  # asistan
+        )
+        for _ in range(n_turns)
+    ]
+
+
+def _run_old(turns, llm: _FakeLLM, limit: int) -> Tuple[List[float], int]:
+    memory = ConversationSummaryBufferMemory(llm=llm, max_token_limit=limit, return_messages=True)
+    latencies = []
+    for user_msg, ai_msg in turns:
+        t0 = time.perf_counter()
+        memory.save_context({"input": user_msg}, {"output": ai_msg})
+        latencies.append(time.perf_counter() - t0)
+    return latencies, len(memory.chat_memory.messages)
+
+
+def _run_new(turns, llm: _FakeLLM, limit: int) -> Tuple[List[float], int]:
+    mgr = ChatMemoryManager(max_token_limit=limit)
+    mgr.memory.llm = llm
+    latencies = []
+    for user_msg, ai_msg in turns:
+        t0 = time.perf_counter()
+        mgr.add_turn(user_msg, ai_msg)
+        latencies.append(time.perf_counter() - t0)
+    # arka plan özetlemenin bitmesini bekle (bellekte kalan mesajlar için)
+    while True:
+        with mgr._lock:
+            if not mgr._scheduled:
+                break
+        time.sleep(0.01)
+    return latencies, len(mgr.memory.chat_memory.messages)
+
+
+def _fmt(latencies: List[float]) -> str:
+    ordered = sorted(latencies)
+    p95 = ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))]
+    return (
+        f"{statistics.mean(latencies) * 1e3:>9.3f} ms {ordered[len(ordered) // 2] * 1e3:>9.3f} ms "
+        f"{p95 * 1e3:>9.3f} ms {sum(latencies):>8.2f} s"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--turns", default="10,100,1000", help="virgülle ayrılmış tur sayıları")
+    parser.add_argument("--limit", type=int, default=1000, help="max_token_limit")
+    parser.add_argument("--count-rtt", type=float, default=0.0, help="token sayma çağrısı başına gecikme (ms)")
+    parser.add_argument("--summary-delay", type=float, default=0.0, help="özetleme çağrısı başına gecikme (ms)")
+    args = parser.parse_args()
+
+    llm = _FakeLLM(count_rtt=args.count_rtt / 1000.0, summary_delay=args.summary_delay / 1000.0)
+    print(f"limit={args.limit} count_rtt={args.count_rtt}ms summary_delay={args.summary_delay}ms")
+    print(f"{'turns':>6} {'impl':>4} {'ortalama':>12} {'p50':>12} {'p95':>12} {'toplam':>10} {'kalan mesaj':>12}")
+    try:
+        for n_turns in (int(t) for t in args.turns.split(",")):
+            turns = _make_turns(n_turns)
+            for name, run in (("old", _run_old), ("new", _run_new)):
+                latencies, kept = run(turns, llm, args.limit)
+                print(f"{n_turns:>6} {name:>4} {_fmt(latencies)} {kept:>12}")
+    finally:
+        _SUMMARY_POOL.shutdown(wait=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+# src/benchmarks/eval_router.py
+"""
+QueryRouterNode için çevrimdışı değerlendirme.
+
+Etiketli sorular üzerinde heuristik → embedding → LLM zincirini çalıştırır ve
+raporlar:
+- her katmanın karar verdiği soru oranı
+- LLM çağrısı yapılmadan karar verilen oran (kaçınılan LLM çağrıları)
+- yerel kararların doğruluğu ve (--llm ile) uçtan uca doğruluk
+- --sweep ile farklı margin değerlerinde kapsam / doğruluk dengesi
+
+Veri: her satırı {"question": "...", "route": "DOMAIN|WEB|GENERIC_CHAT"} olan
+JSONL dosyası (--data). Verilmezse aşağıdaki küçük gömülü set kullanılır.
+
+Çalıştırma:
+    python -m src.benchmarks.eval_router
+    python -m src.benchmarks.eval_router --data data/router_eval.jsonl --sweep 0,0.02,0.05,0.1
+    python -m src.benchmarks.eval_router --llm   # fallback'e düşenler için gerçek Gemini çağrısı
+"""
+from __future__ import annotations
+
+import argparse
+import json
+from collections import Counter
+from typing import List, Optional, Tuple
+
+from src.config import Config
+from src.graph.route_classifier import EmbeddingRouteClassifier
+from src.registry import get_embedding_model
+
+
+# Tohum örneklerden (ROUTE_EXAMPLES) farklı, elle etiketlenmiş sorular
+_DEFAULT_SET: List[Tuple[str, str]] = [
+    ("Hangi sektörlere yazılım geliştiriyorsunuz?", "DOMAIN"),
+    ("Bakım ve destek paketleriniz neleri kapsıyor?", "DOMAIN"),
+    ("Danışmanlık ücretleri nasıl belirleniyor?", "DOMAIN"),
+    ("Çalışanlarınıza hangi eğitimleri veriyorsunuz?", "DOMAIN"),
+    ("Yapay zeka çözümleriniz hangi problemleri çözüyor?", "DOMAIN"),
+    ("Teklif almak için hangi bilgileri iletmem gerekiyor?", "DOMAIN"),
+    ("Ofisiniz hangi şehirde?", "DOMAIN"),
+    ("Altın fiyatları ne kadar yükseldi?", "WEB"),
+    ("Ankara'da hafta sonu hava nasıl olacak?", "WEB"),
+    ("Euro bugün kaç lira?", "WEB"),
+    ("Şampiyonlar ligi kurası çekildi mi?", "WEB"),
+    ("Akaryakıta yeni zam geldi mi?", "WEB"),
+    ("Son çıkan yapay zeka modelleri hangileri?", "WEB"),
+    ("Merkez bankası faiz kararını açıkladı mı?", "WEB"),
+    ("Bugün kendimi çok yorgun hissediyorum.", "GENERIC_CHAT"),
+    ("Bana güzel bir kitap önerir misin?", "GENERIC_CHAT"),
+    ("En sevdiğin renk hangisi?", "GENERIC_CHAT"),
+    ("İngilizce nasıl daha hızlı öğrenilir?", "GENERIC_CHAT"),
+    ("Kısa bir hikaye yazar mısın?", "GENERIC_CHAT"),
+    ("Harika, çok teşekkürler!", "GENERIC_CHAT"),
+    ("Bir e-posta taslağı hazırlamama yardım et.", "GENERIC_CHAT"),
+]
+
+
+def _load(path: Optional[str]) -> List[Tuple[str, str]]:
+    if not path:
+        return list(_DEFAULT_SET)
+    rows = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                obj = json.loads(line)
+                rows.append((obj["question"], obj["route"].upper()))
+    return rows
+
+
+def _evaluate(router, classifier, rows, use_llm: bool) -> dict:
+    by_layer = Counter()
+    correct = Counter()
+    for question, gold in rows:
+        info = router.classify_heuristic(question)
+        layer = "heuristic"
+        if info is None:
+            route = classifier.predict(question)
+            layer = "embedding"
+            if route is None:
+                layer = "llm"
+                route = router.classify_llm(question)["route"] if use_llm else None
+        else:
+            route = info["route"]
+        by_layer[layer] += 1
+        correct[layer] += int(route == gold)
+
+    n = len(rows) or 1
+    local = by_layer["heuristic"] + by_layer["embedding"]
+    local_correct = correct["heuristic"] + correct["embedding"]
+    # heuristiğin bıraktığı sorulardan embedding'in LLM'e gitmeden çözdükleri
+    fallback_pool = by_layer["embedding"] + by_layer["llm"]
+    return {
+        "n": len(rows),
+        "heuristic": by_layer["heuristic"],
+        "embedding": by_layer["embedding"],
+        "llm": by_layer["llm"],
+        "local_rate": local / n,
+        "llm_avoided_rate": by_layer["embedding"] / fallback_pool if fallback_pool else 0.0,
+        "local_accuracy": local_correct / local if local else 0.0,
+        "embedding_accuracy": correct["embedding"] / by_layer["embedding"] if by_layer["embedding"] else 0.0,
+        "overall_accuracy": (local_correct + correct["llm"]) / n if use_llm else None,
+    }
+
+
+def _print(label: str, r: dict) -> None:
+    print(f"--- {label}")
+    print(f"sorular              : {r['n']}")
+    print(f"heuristik / emb / llm: {r['heuristic']} / {r['embedding']} / {r['llm']}")
+    print(f"yerel karar oranı    : {r['local_rate']:.1%}")
+    print(f"kaçınılan LLM çağrısı: {r['llm_avoided_rate']:.1%} (heuristiğin bıraktıkları içinde)")
+    print(f"yerel doğruluk       : {r['local_accuracy']:.1%}")
+    print(f"embedding doğruluğu  : {r['embedding_accuracy']:.1%}")
+    if r["overall_accuracy"] is not None:
+        print(f"uçtan uca doğruluk   : {r['overall_accuracy']:.1%}")
+
+
+def main() -> None:
+    from src.graph.nodes import QueryRouterNode
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--data", help="JSONL etiketli soru dosyası")
+    parser.add_argument("--margin", type=float, default=Config.ROUTER_MARGIN)
+    parser.add_argument("--min-similarity", type=float, default=Config.ROUTER_MIN_SIMILARITY)
+    parser.add_argument("--sweep", help="virgülle ayrılmış margin değerleri (ör. 0,0.02,0.05,0.1)")
+    parser.add_argument("--llm", action="store_true", help="fallback için gerçek Gemini çağrısı yap")
+    args = parser.parse_args()
+
+    rows = _load(args.data)
+    router = QueryRouterNode()
+    classifier = EmbeddingRouteClassifier(
+        get_embedding_model(), margin=args.margin, min_similarity=args.min_similarity
+    )
+
+    _print(f"margin={args.margin} min_similarity={args.min_similarity}",
+           _evaluate(router, classifier, rows, args.llm))
+
+    if args.sweep:
+        for margin in (float(m) for m in args.sweep.split(",")):
+            classifier.margin = margin
+            _print(f"margin={margin}", _evaluate(router, classifier, rows, use_llm=False))
+
+
+if __name__ == "__main__":
+    main()
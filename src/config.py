@@ -10,6 +10,129 @@ class Config:
     CHROMA_PATH = "data/chroma_db"
     MODEL_NAME = os.getenv("MODEL_NAME", "gemini-2.5-flash")
 
+    # Loglama: seviye, biçim (text | kv | json), kuyruk boyutu, stream parça logu örnekleme
+    LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+    LOG_FORMAT = os.getenv("LOG_FORMAT", "text").lower()
+    LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+    LOG_CHUNK_SAMPLE = int(os.getenv("LOG_CHUNK_SAMPLE", "20"))   # DEBUG'da her N. parça loglanır
+
+    # Aşama bazlı metrikler (/metrics, Prometheus text formatı)
+    METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+
+    # İstek trace'leri (waterfall): en yavaş N + son N bellekte, yavaşlar JSONL'e
+    TRACE_ENABLED = os.getenv("TRACE_ENABLED", "true").lower() == "true"
+    TRACE_MAX_SPANS = int(os.getenv("TRACE_MAX_SPANS", "256"))           # trace başına
+    TRACE_KEEP_SLOWEST = int(os.getenv("TRACE_KEEP_SLOWEST", "50"))
+    TRACE_KEEP_RECENT = int(os.getenv("TRACE_KEEP_RECENT", "200"))
+    TRACE_LOG_PATH = os.getenv("TRACE_LOG_PATH", "data/traces.jsonl")   # boş → dosyaya yazılmaz
+    TRACE_LOG_MIN_MS = float(os.getenv("TRACE_LOG_MIN_MS", "1000"))     # bundan yavaşlar dosyaya
+    TRACE_LOG_MAX_BYTES = int(float(os.getenv("TRACE_LOG_MAX_MB", "50")) * 1024 * 1024) or None
+
+    # İsteğe bağlı örneklemeli profiler: kapalıyken hiçbir maliyeti yok
+    PROFILE_ENABLED = os.getenv("PROFILE_ENABLED", "false").lower() == "true"
+    PROFILE_HEADER = os.getenv("PROFILE_HEADER", "X-Profile")
+    PROFILE_TOKEN = os.getenv("PROFILE_TOKEN", "")                     # boş değilse başlık değeri eşleşmeli
+    PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))  # 0..1, başlıksız isteklerin oranı
+    PROFILE_INTERVAL_MS = float(os.getenv("PROFILE_INTERVAL_MS", "5"))
+    PROFILE_MAX_SECONDS = float(os.getenv("PROFILE_MAX_SECONDS", "60"))
+    PROFILE_DIR = os.getenv("PROFILE_DIR", "data/profiles")
+    PROFILE_KEEP = int(os.getenv("PROFILE_KEEP", "50"))
+
+    # LLM gateway (tüm Gemini çağrıları): provider, timeout, eşzamanlılık/hız sınırı, retry
+    LLM_PROVIDER = os.getenv("LLM_PROVIDER", "gemini").lower()          # gemini | fake
+    LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "60"))                  # çağrı başına saniye
+    LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "16"))
+    LLM_RATE_LIMIT = float(os.getenv("LLM_RATE_LIMIT", "0"))             # istek/sn, 0 → sınırsız
+    LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "2"))
+    LLM_BACKOFF_BASE = float(os.getenv("LLM_BACKOFF_BASE", "0.5"))
+    LLM_BACKOFF_MAX = float(os.getenv("LLM_BACKOFF_MAX", "8"))
+
+    # Async stream yolunda bloklayan işler (router, memory, Tavily, retrieval) için havuz
+    BLOCKING_POOL_WORKERS = int(os.getenv("BLOCKING_POOL_WORKERS", "16"))
+
+    # API admission control (global sınır + stream/sync havuzları + bekleme kuyruğu)
+    RAG_MAX_CONCURRENCY = int(os.getenv("RAG_MAX_CONCURRENCY", "24"))
+    RAG_STREAM_CONCURRENCY = int(os.getenv("RAG_STREAM_CONCURRENCY", "16"))
+    RAG_SYNC_CONCURRENCY = int(os.getenv("RAG_SYNC_CONCURRENCY", "8"))
+    RAG_STREAM_QUEUE = int(os.getenv("RAG_STREAM_QUEUE", "32"))
+    RAG_SYNC_QUEUE = int(os.getenv("RAG_SYNC_QUEUE", "16"))
+    RAG_QUEUE_TIMEOUT = float(os.getenv("RAG_QUEUE_TIMEOUT", "10"))   # saniye → aşılırsa 503
+    RAG_RETRY_AFTER = int(os.getenv("RAG_RETRY_AFTER", "2"))          # Retry-After header (sn)
+    SESSION_MAX_PENDING = int(os.getenv("SESSION_MAX_PENDING", "4"))  # session başına kuyruk
+
+    # Router LLM çağrısı sürerken DOMAIN retrieval'ı (ve opsiyonel memory bağlamını) paralel başlat
+    SPECULATIVE_RETRIEVAL = os.getenv("SPECULATIVE_RETRIEVAL", "true").lower() == "true"
+    SPECULATIVE_CONTEXT = os.getenv("SPECULATIVE_CONTEXT", "true").lower() == "true"
+
+    # Yerel embedding router: heuristik karar veremezse LLM'den önce prototip benzerliği.
+    # Varsayılan kapalı: açmadan önce gerçek etiketli sorularla eval_router --sweep ile margin ayarlanmalı
+    ROUTER_EMBEDDING = os.getenv("ROUTER_EMBEDDING", "false").lower() == "true"
+    ROUTER_MARGIN = float(os.getenv("ROUTER_MARGIN", "0.05"))                  # top1 - top2 cosine
+    ROUTER_MIN_SIMILARITY = float(os.getenv("ROUTER_MIN_SIMILARITY", "0.35"))
+    ROUTER_CORPUS_SAMPLES = int(os.getenv("ROUTER_CORPUS_SAMPLES", "0"))       # 0 → koleksiyondan örnekleme yok
+
+    # Route kararı cache'i (normalize soru → route/source; LLM sınıflandırması soru başına bir kez)
+    ROUTE_CACHE_ENABLED = os.getenv("ROUTE_CACHE_ENABLED", "true").lower() == "true"
+    ROUTE_CACHE_SIZE = int(os.getenv("ROUTE_CACHE_SIZE", "4096"))
+    ROUTE_CACHE_TTL = float(os.getenv("ROUTE_CACHE_TTL", "86400")) or None       # saniye, 0 → süresiz
+    # yuvarlanmış soru embedding'i ile yakın-tekrar eşleşmesi (opsiyonel)
+    ROUTE_CACHE_NEIGHBORHOOD = os.getenv("ROUTE_CACHE_NEIGHBORHOOD", "false").lower() == "true"
+    ROUTE_CACHE_DECIMALS = int(os.getenv("ROUTE_CACHE_DECIMALS", "2"))
+
+    # Konuşma hafızası: özetleme arka plan havuzunda (istek yolunda LLM beklenmez)
+    MEMORY_SUMMARY_WORKERS = int(os.getenv("MEMORY_SUMMARY_WORKERS", "2"))
+
+    # Session store: bellekte sınırlı sayıda session (LRU + idle TTL), atılanlar SQLite'a
+    SESSION_MAX_LIVE = int(os.getenv("SESSION_MAX_LIVE", "1000"))
+    SESSION_IDLE_TTL = float(os.getenv("SESSION_IDLE_TTL", "1800")) or None     # saniye, 0 → süresiz
+    SESSION_SPILL_PATH = os.getenv("SESSION_SPILL_PATH", "data/sessions/sessions.db")  # boş → diske yazma
+    SESSION_SPILL_TTL = float(os.getenv("SESSION_SPILL_TTL", "604800")) or None  # diskte tutulma (7 gün)
+    # memory → tek süreç (spill'li); sqlite → worker'lar arası paylaşılan WAL SQLite (--workers N)
+    SESSION_BACKEND = os.getenv("SESSION_BACKEND", "memory").lower()
+    SESSION_SHARED_PATH = os.getenv("SESSION_SHARED_PATH", "data/sessions/shared.db")
+
+    # State log: append-only JSONL, arka plan yazıcı + toplu fsync + rotation
+    STATE_LOG_PATH = os.getenv("STATE_LOG_PATH", "data/state.jsonl")
+    STATE_LOG_QUEUE = int(os.getenv("STATE_LOG_QUEUE", "10000"))
+    STATE_LOG_BATCH = int(os.getenv("STATE_LOG_BATCH", "256"))
+    STATE_LOG_FLUSH_INTERVAL = float(os.getenv("STATE_LOG_FLUSH_INTERVAL", "1.0"))   # saniye
+    STATE_LOG_MAX_BYTES = int(float(os.getenv("STATE_LOG_MAX_MB", "50")) * 1024 * 1024) or None
+    STATE_LOG_ROTATE_SECONDS = float(os.getenv("STATE_LOG_ROTATE_SECONDS", "86400")) or None
+    STATE_LOG_KEEP = int(os.getenv("STATE_LOG_KEEP", "7"))
+
+    # Ingestion: chunking + batch encode/write
+    CHUNK_SIZE = int(os.getenv("CHUNK_SIZE", "1000"))          # karakter
+    CHUNK_OVERLAP = int(os.getenv("CHUNK_OVERLAP", "150"))     # karakter
+    EMBED_BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", "256"))
+    CHROMA_WRITE_BATCH = int(os.getenv("CHROMA_WRITE_BATCH", "1024"))
+    INGEST_WORKERS = int(os.getenv("INGEST_WORKERS", "0"))          # 0 → CPU çekirdek sayısı
+    EXTRACT_TIMEOUT = float(os.getenv("EXTRACT_TIMEOUT", "120"))    # dosya başına saniye
+    EMBED_CACHE_DTYPE = os.getenv("EMBED_CACHE_DTYPE", "float32")   # float32 | float16
+    EMBED_CACHE_COMPACT_RATIO = float(os.getenv("EMBED_CACHE_COMPACT_RATIO", "0.3"))
+
+    # Hybrid retrieval (dense + BM25, reciprocal rank fusion)
+    HYBRID_RETRIEVAL = os.getenv("HYBRID_RETRIEVAL", "true").lower() == "true"
+    HYBRID_CANDIDATES = int(os.getenv("HYBRID_CANDIDATES", "10"))  # her kanaldan aday sayısı
+    RRF_K = int(os.getenv("RRF_K", "60"))
+
+    # Retrieval sonuç cache'i (anahtar: quantized embedding + k + koleksiyon versiyonu)
+    RETRIEVAL_CACHE_SIZE = int(os.getenv("RETRIEVAL_CACHE_SIZE", "1024"))
+    RETRIEVAL_CACHE_TTL = float(os.getenv("RETRIEVAL_CACHE_TTL", "0")) or None
+    RETRIEVAL_CACHE_DECIMALS = int(os.getenv("RETRIEVAL_CACHE_DECIMALS", "2"))
+
+    # Semantik cevap cache'i (opsiyonel, DOMAIN üretim adımının önünde)
+    ANSWER_CACHE_ENABLED = os.getenv("ANSWER_CACHE_ENABLED", "false").lower() == "true"
+    ANSWER_CACHE_THRESHOLD = float(os.getenv("ANSWER_CACHE_THRESHOLD", "0.92"))  # cosine
+    ANSWER_CACHE_SIZE = int(os.getenv("ANSWER_CACHE_SIZE", "512"))
+    ANSWER_CACHE_TTL = float(os.getenv("ANSWER_CACHE_TTL", "3600")) or None
+    # soru token'larının bu oranı geçmişte geçiyorsa cevap geçmişe bağlı sayılır → bypass
+    ANSWER_CACHE_HISTORY_OVERLAP = float(os.getenv("ANSWER_CACHE_HISTORY_OVERLAP", "0.3"))
+
+    # Query embedding cache (LRU + opsiyonel TTL)
+    QUERY_EMBED_CACHE_SIZE = int(os.getenv("QUERY_EMBED_CACHE_SIZE", "2048"))
+    QUERY_EMBED_CACHE_MAX_MB = float(os.getenv("QUERY_EMBED_CACHE_MAX_MB", "32"))
+    QUERY_EMBED_CACHE_TTL = float(os.getenv("QUERY_EMBED_CACHE_TTL", "0")) or None  # saniye, 0 → süresiz
+
     # LangChain Cloud (opsiyonel)
     LANGCHAIN_API_KEY = os.getenv("LANGCHAIN_API_KEY", "")
     LANGCHAIN_PROJECT = os.getenv("LANGCHAIN_PROJECT", "rag-gemini-langgraph")
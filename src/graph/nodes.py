@@ -1,22 +1,25 @@
 # src/graph/nodes.py
 from __future__ import annotations
 
-import re
-from typing import List, Tuple
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
 
-import google.generativeai as genai
+import numpy as np
 
 from src.config import Config
-from src.retriever.vectorstore import VectorStore
+from src.registry import (
+    get_bm25_index,
+    get_embedding_model,
+    get_llm,
+    get_route_cache,
+    get_route_classifier,
+    get_token_index,
+    get_vectorstore,
+)
+from src.retriever.tokenizer import overlap_counts, token_ids
 from src.utils.logger import log_info, log_warning
-
-
-# --- LLM (Gemini) init (güvenli) ---
-if Config.GOOGLE_API_KEY:
-    genai.configure(api_key=Config.GOOGLE_API_KEY)
-else:
-    # Çalışır; ancak LLM çağrısında uyarı verelim
-    log_warning("[LLM] GOOGLE_API_KEY bulunamadı. LLM çağrıları hata verebilir.")
+from src.utils.tracing import traced
 
 
 # ===========================
@@ -28,7 +31,9 @@ class QueryRouterNode:
     - DOMAIN: indeks (Chroma) ile ilgili (kurum içi bilgi)
     - WEB: güncel/dış dünya (web arama)
     - GENERIC_CHAT: selamlama/sohbet/genel kullanım
-    Heuristik + (varsa) LLM fallback ile karar verir.
+    Heuristik → route cache → yerel embedding sınıflandırıcısı → (varsa) LLM
+    fallback sırasıyla karar verir; LLM yalnızca embedding margin'i yetersizse
+    çağrılır ve kararı cache'lenir.
     """
 
     DOMAIN_HINTS = [
@@ -44,21 +49,87 @@ class QueryRouterNode:
         "kendini tanıt", "yardım edebilir misin", "sohbet"
     ]
 
-    def classify(self, question: str) -> dict:
+    def classify_heuristic(self, question: str) -> Optional[dict]:
+        """Hızlı/ucuz anahtar kelime kuralları; karar veremezse None."""
         q = (question or "").strip().lower()
 
-        # hızlı/ucuz heuristik
         if any(k in q for k in self.DOMAIN_HINTS):
-            return {"route": "DOMAIN", "normalized_question": question}
+            return self._decision("DOMAIN", question, "heuristic")
 
         if any(k in q for k in self.WEB_HINTS):
-            return {"route": "WEB", "normalized_question": question}
+            return self._decision("WEB", question, "heuristic")
 
         if any(k in q for k in self.CHITCHAT_HINTS) or len(q) <= 10:
-            return {"route": "GENERIC_CHAT", "normalized_question": question}
-
-        # LLM fallback (varsa)
-        if Config.GOOGLE_API_KEY:
+            return self._decision("GENERIC_CHAT", question, "heuristic")
+
+        return None
+
+    @staticmethod
+    def _decision(route: str, question: str, source: str) -> dict:
+        return {"route": route, "normalized_question": question, "source": source}
+
+    # son route cache ıskalaması: (soru, komşuluk vektörü, cache generation);
+    # embedding/LLM adımları aynı soru için yeniden encode etmez ve yeniden aramaz
+    _miss: Optional[Tuple[str, object, int]] = None
+
+    def classify_cached(self, question: str) -> Optional[dict]:
+        """Daha önce embedding/LLM ile verilmiş karar (route cache); yoksa None."""
+        if not Config.ROUTE_CACHE_ENABLED:
+            return None
+        cache = get_route_cache()
+        generation = cache.generation
+        vec = self._neighborhood_vec(question)
+        hit = cache.lookup(question, vec)
+        if hit is None:
+            self._miss = (question, vec, generation)
+        return hit
+
+    def _missed(self, question: str) -> Optional[Tuple[str, object, int]]:
+        return self._miss if self._miss is not None and self._miss[0] == question else None
+
+    def _query_vec(self, question: str):
+        miss = self._missed(question)
+        return miss[1] if miss is not None else self._neighborhood_vec(question)
+
+    @staticmethod
+    def _neighborhood_vec(question: str):
+        # komşuluk araması kapalıysa soru için ekstra encode yapılmaz
+        if Config.ROUTE_CACHE_NEIGHBORHOOD:
+            return get_embedding_model().encode_query(question)
+        return None
+
+    def classify_embedding(self, question: str) -> Optional[dict]:
+        """Route prototiplerine benzerlik; margin yetersizse (veya kapalıysa) None."""
+        if not Config.ROUTER_EMBEDDING:
+            return None
+        try:
+            route = get_route_classifier().predict(question)
+        except Exception as e:
+            log_warning(f"[Router] Embedding sınıflandırıcı başarısız, LLM fallback: {e}")
+            return None
+        if route is None:
+            return None
+        decision = self._decision(route, question, "embedding")
+        if Config.ROUTE_CACHE_ENABLED:
+            get_route_cache().store(question, decision, self._query_vec(question))
+        return decision
+
+    @traced()
+    def classify_local(self, question: str) -> Optional[dict]:
+        """LLM'siz karar: heuristik, route cache, sonra embedding; hiçbiri emin değilse None."""
+        return (
+            self.classify_heuristic(question)
+            or self.classify_cached(question)
+            or self.classify_embedding(question)
+        )
+
+    @property
+    def uses_llm(self) -> bool:
+        """Heuristik karar veremediğinde gerçekten bir LLM round trip'i yapılacak mı?"""
+        return bool(Config.GOOGLE_API_KEY)
+
+    def _classify_llm_uncached(self, question: str) -> dict:
+        if self.uses_llm:
             prompt = f"""Soru: "{question}"
 
 Bu soruyu sınıflandır:
@@ -69,31 +140,102 @@ Bu soruyu sınıflandır:
 Sadece şu formatta yanıt ver:
 route=DOMAIN|WEB|GENERIC_CHAT
 """
-            model = genai.GenerativeModel(Config.MODEL_NAME)
             try:
-                resp = model.generate_content(prompt)
-                raw = (resp.text or "").strip().upper()
+                raw = get_llm().generate(prompt, stage="llm_route").strip().upper()
                 if "DOMAIN" in raw:
-                    return {"route": "DOMAIN", "normalized_question": question}
+                    return self._decision("DOMAIN", question, "llm")
                 if "WEB" in raw:
-                    return {"route": "WEB", "normalized_question": question}
+                    return self._decision("WEB", question, "llm")
+                return self._decision("GENERIC_CHAT", question, "llm")
             except Exception:
                 pass  # heuristik fallback
 
-        return {"route": "GENERIC_CHAT", "normalized_question": question}
+        # anahtar yok / hata → varsayılan; cache'lenmez
+        return self._decision("GENERIC_CHAT", question, "default")
+
+    @traced()
+    def classify_llm(self, question: str) -> dict:
+        """LLM fallback (varsa); hata/anahtar yoksa GENERIC_CHAT. Aynı soru için tek çağrı."""
+        if not Config.ROUTE_CACHE_ENABLED:
+            return self._classify_llm_uncached(question)
+        miss = self._missed(question)
+        return get_route_cache().get_or_compute(
+            question,
+            lambda: self._classify_llm_uncached(question),
+            self._query_vec(question),
+            missed_at=miss[2] if miss is not None else None,
+        )
+
+    def classify(self, question: str) -> dict:
+        return self.classify_local(question) or self.classify_llm(question)
 
 
 # ===========================
 #  Retriever
 # ===========================
+# dense + sparse aramayı paralel yürütmek için paylaşılan küçük havuz
+_HYBRID_POOL = ThreadPoolExecutor(max_workers=4, thread_name_prefix="hybrid-retrieval")
+
+
+def reciprocal_rank_fusion(rankings: List[List[str]], k: int = 60) -> List[str]:
+    """RRF: her listede rank r'deki id'ye 1/(k + r) puan ekler."""
+    scores: Dict[str, float] = {}
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking, start=1):
+            scores[doc_id] = scores.get(doc_id, 0.0) + 1.0 / (k + rank)
+    return sorted(scores, key=scores.get, reverse=True)
+
+
 class RetrieverNode:
-    """ChromaDB üzerinden benzer içerikleri getirir."""
+    """
+    Hybrid retrieval:
+    - ChromaDB dense (embedding) araması
+    - BM25 sparse (anahtar kelime) araması
+    İkisi paralel çalışır, sonuçlar reciprocal rank fusion ile birleştirilir.
+    BM25 index'i yoksa veya HYBRID_RETRIEVAL kapalıysa sadece dense arama yapılır.
+    """
     def __init__(self, collection_name: str = "rag_docs"):
-        self.vdb = VectorStore(collection_name=collection_name)
+        self.vdb = get_vectorstore(collection_name)
+        self.bm25 = get_bm25_index(collection_name)
+
+    @traced("RetrieverNode.bm25")
+    def _sparse(self, query: str, n: int) -> List[str]:
+        index = self.bm25.get()
+        if index is None:
+            return []
+        return [doc_id for doc_id, _ in index.search(query, k=n)]
+
+    @traced()
+    def run_with_ids(self, query: str, k: int = 4) -> Tuple[List[str], List[str]]:
+        """(chunk_ids, documents) döndürür; sıralama füzyon skoruna göre."""
+        if not Config.HYBRID_RETRIEVAL:
+            ids, docs, _ = self.vdb.query_with_ids(query, n=k)
+            return ids, docs
+
+        n = max(k, Config.HYBRID_CANDIDATES)
+        # bağlam kopyalanır: BM25 span'ı bu çağrının altına düşsün
+        sparse_future = _HYBRID_POOL.submit(contextvars.copy_context().run, self._sparse, query, n)
+        dense_ids, dense_docs, _ = self.vdb.query_with_ids(query, n=n)
+        try:
+            sparse_ids = sparse_future.result()
+        except Exception as e:
+            log_warning(f"[Retriever] BM25 araması başarısız, sadece dense: {e}")
+            sparse_ids = []
+
+        if not sparse_ids:
+            return dense_ids[:k], dense_docs[:k]
+
+        fused = reciprocal_rank_fusion([dense_ids, sparse_ids], k=Config.RRF_K)[:k]
+        text_by_id = dict(zip(dense_ids, dense_docs))
+        missing = [i for i in fused if i not in text_by_id]
+        if missing:
+            text_by_id.update(zip(missing, self.vdb.get_documents(missing)))
+
+        ids = [i for i in fused if text_by_id.get(i)]
+        return ids, [text_by_id[i] for i in ids]
 
     def run(self, query: str, k: int = 4) -> List[str]:
-        docs = self.vdb.query(query, n=k)
-        return docs
+        return self.run_with_ids(query, k=k)[1]
 
 
 # ===========================
@@ -104,18 +246,55 @@ class RetrieverGraderNode:
     Basit uygunluk puanlayıcı:
     - Token kesişimi / keyword örtüşmesi
     - Case-insensitive / basit normalizasyon
-    Dönüş: [(doc, score), ...] skor desc.
+    Soru bir kez tokenize edilir; dokümanların token id'leri ingestion'da
+    önceden hesaplanmışsa (TokenIndex) oradan alınır ve tüm adaylar tek bir
+    vektörize geçişte puanlanır.
+    Dönüş: [(doc, score), ...] skor desc. doc_ids verilirse [(doc, score, doc_id), ...].
     """
-    def _score(self, question: str, doc: str) -> float:
-        q = re.findall(r"\w+", question.lower())
-        d = re.findall(r"\w+", (doc or "").lower())
-        if not q or not d:
-            return 0.0
-        inter = len(set(q) & set(d))
-        return inter / max(3, len(set(q)))  # normalize, aşırı cezalandırma yok
+    def __init__(self, collection_name: str = "rag_docs"):
+        self.token_index = get_token_index(collection_name)
+
+    def _doc_token_ids(self, docs: List[str], doc_ids: Optional[List[str]]) -> List[np.ndarray]:
+        index = self.token_index.get() if doc_ids else None
+        out = []
+        for i, doc in enumerate(docs):
+            arr = index.get(doc_ids[i]) if index is not None else None
+            out.append(arr if arr is not None else token_ids(doc))
+        return out
+
+    def context_token_ids(self, docs: List[str], doc_ids: Optional[List[str]] = None) -> np.ndarray:
+        """Seçilen bağlam chunk'larının token id birleşimi (HallucinationNode için)."""
+        arrays = self._doc_token_ids(docs, doc_ids)
+        if not arrays:
+            return np.zeros(0, dtype=np.uint32)
+        return np.unique(np.concatenate(arrays))
 
-    def run(self, question: str, docs: List[str], min_thresh: float = 0.05) -> List[Tuple[str, float]]:
-        scored = [(doc, self._score(question, doc)) for doc in docs]
+    def _score(self, question: str, doc: str) -> float:
+        return float(self.score_many(token_ids(question), [token_ids(doc)])[0])
+
+    def score_many(self, query_ids: np.ndarray, doc_token_ids: List[np.ndarray]) -> np.ndarray:
+        if query_ids.size == 0:
+            return np.zeros(len(doc_token_ids))
+        inter = overlap_counts(query_ids, doc_token_ids)
+        return inter / max(3, query_ids.size)  # normalize, aşırı cezalandırma yok
+
+    @traced()
+    def run(
+        self,
+        question: str,
+        docs: List[str],
+        min_thresh: float = 0.05,
+        doc_ids: Optional[List[str]] = None,
+        query_ids: Optional[np.ndarray] = None,
+    ) -> List[Tuple]:
+        if not docs:
+            return []
+        q_ids = token_ids(question) if query_ids is None else query_ids
+        scores = self.score_many(q_ids, self._doc_token_ids(docs, doc_ids))
+        if doc_ids:
+            scored = [(doc, float(sc), cid) for doc, sc, cid in zip(docs, scores, doc_ids)]
+        else:
+            scored = [(doc, float(sc)) for doc, sc in zip(docs, scores)]
         scored.sort(key=lambda x: x[1], reverse=True)
         return [x for x in scored if x[1] >= min_thresh]
 
@@ -128,8 +307,9 @@ class GeneratorNode:
     Soru+bağlam ile Gemini'den cevap üretir.
     """
     def __init__(self):
-        self.model = genai.GenerativeModel(Config.MODEL_NAME)
+        self.llm = get_llm()
 
+    @traced()
     def run(self, question: str, context: str) -> str:
         prompt = f"""You are a helpful assistant. Use ONLY the context if available.
 
@@ -143,8 +323,7 @@ Instructions:
 - If the answer is not in the context, say you don't have enough information.
 - Be concise and accurate.
 """
-        resp = self.model.generate_content(prompt)
-        return (resp.text or "").strip()
+        return self.llm.generate(prompt).strip()
 
 
 # ===========================
@@ -156,12 +335,14 @@ class HallucinationNode:
     - Cevaptaki kelimelerin ne kadarı bağlamda da geçiyor?
     0.0 ~ 1.0
     """
-    def run(self, answer: str, context: str) -> float:
-        a = set(re.findall(r"\w+", (answer or "").lower()))
-        c = set(re.findall(r"\w+", (context or "").lower()))
-        if not a or not c:
+    @traced()
+    def run(self, answer: str, context: str, context_ids: Optional[np.ndarray] = None) -> float:
+        """context_ids: bağlam chunk'larının önceden hesaplanmış token id'leri (opsiyonel)."""
+        a = token_ids(answer)
+        c = token_ids(context) if context_ids is None else context_ids
+        if not a.size or not c.size:
             return 0.0
-        overlap = len(a & c) / max(1, len(a))
+        overlap = np.intersect1d(a, c, assume_unique=True).size / max(1, a.size)
         return round(min(1.0, max(0.0, overlap)), 2)
 
 
@@ -173,6 +354,7 @@ class AnswerGraderNode:
     Basit kalite metriği:
     - Uzunluk + min. yapısal sinyal
     """
+    @traced()
     def run(self, answer: str) -> float:
         if not answer:
             return 0.0
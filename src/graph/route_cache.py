@@ -0,0 +1,140 @@
+# src/graph/route_cache.py
+"""
+QueryRouterNode için route kararı cache'i.
+
+Aynı soru tekrar geldiğinde embedding sınıflandırıcı veya LLM fallback
+yeniden çalıştırılmaz. Anahtar normalize edilmiş soru metnidir; opsiyonel
+olarak kabaca yuvarlanmış soru embedding'i (komşuluk) ile de aranır.
+
+LLM sınıflandırması single-flight yürür: aynı soru için eşzamanlı gelen
+istekler tek bir çağrıyı bekler, böylece farklı her soru için LLM en fazla
+bir kez çağrılır (TTL dolana veya kayıt atılana kadar).
+"""
+from __future__ import annotations
+
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Optional
+
+import numpy as np
+
+from src.retriever.embeddings import normalize_query
+from src.utils.cache import LRUCache
+
+
+def _quantize(vec, decimals: int) -> bytes:
+    norm = float(np.linalg.norm(vec)) or 1.0
+    return np.round(np.asarray(vec) / norm * 10 ** decimals).astype(np.int16).tobytes()
+
+
+class RouteDecisionCache:
+    """
+    Değer: {"question", "route", "normalized_question", "source"}
+    source: heuristic | embedding | llm. Başarısız LLM çağrıları (varsayılan
+    GENERIC_CHAT) cache'lenmez.
+    """
+
+    CACHEABLE_SOURCES = ("heuristic", "embedding", "llm")
+
+    def __init__(
+        self,
+        max_entries: int = 4096,
+        ttl_seconds: Optional[float] = None,
+        neighborhood_decimals: Optional[int] = None,
+    ):
+        self.exact = LRUCache(max_entries=max_entries, ttl_seconds=ttl_seconds, name="route_decision")
+        self.neighborhood_decimals = neighborhood_decimals
+        self.neighborhood = (
+            LRUCache(max_entries=max_entries, ttl_seconds=ttl_seconds, name="route_neighborhood")
+            if neighborhood_decimals is not None else None
+        )
+
+        self._inflight: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self.stored: Dict[str, int] = {}
+        self.generation = 0   # her store'da artar; aramadan beri yeni kayıt var mı?
+        self.coalesced = 0
+
+    @staticmethod
+    def _decision(entry: Dict[str, Any], question: str) -> dict:
+        # yeniden yazılmamış kararlarda normalized_question gelen sorunun kendisidir
+        nq = entry["normalized_question"]
+        if nq == entry["question"]:
+            nq = question
+        return {"route": entry["route"], "normalized_question": nq, "source": entry["source"], "cached": True}
+
+    def lookup(self, question: str, query_vec=None) -> Optional[dict]:
+        entry = self.exact.get(normalize_query(question))
+        if entry is None and self.neighborhood is not None and query_vec is not None:
+            entry = self.neighborhood.get(_quantize(query_vec, self.neighborhood_decimals))
+        return self._decision(entry, question) if entry is not None else None
+
+    def store(self, question: str, decision: dict, query_vec=None) -> None:
+        source = decision.get("source")
+        if source not in self.CACHEABLE_SOURCES:
+            return
+        entry = {
+            "question": question,
+            "route": decision["route"],
+            "normalized_question": decision["normalized_question"],
+            "source": source,
+        }
+        self.exact.set(normalize_query(question), entry)
+        if self.neighborhood is not None and query_vec is not None:
+            self.neighborhood.set(_quantize(query_vec, self.neighborhood_decimals), entry)
+        with self._lock:
+            self.stored[source] = self.stored.get(source, 0) + 1
+            self.generation += 1
+
+    def get_or_compute(
+        self, question: str, compute: Callable[[], dict], query_vec=None, missed_at: Optional[int] = None
+    ) -> dict:
+        """
+        Cache'te yoksa compute()'u aynı soru için tek sefer çalıştırır (single-flight).
+        missed_at: çağıran soruyu bu generation'da zaten arayıp bulamadıysa; o
+        zamandan beri kayıt eklenmediyse ikinci kez aranmaz (miss iki kez sayılmaz).
+        """
+        if missed_at is None or missed_at != self.generation:
+            hit = self.lookup(question, query_vec)
+            if hit is not None:
+                return hit
+
+        key = normalize_query(question)
+        with self._lock:
+            pending = self._inflight.get(key)
+            owner = pending is None
+            if owner:
+                pending = self._inflight[key] = Future()
+            else:
+                self.coalesced += 1
+
+        if not owner:
+            return dict(pending.result(), normalized_question=question)
+
+        try:
+            decision = compute()
+            self.store(question, decision, query_vec)
+            pending.set_result(decision)
+            return decision
+        except BaseException as e:
+            pending.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    def clear(self) -> None:
+        self.exact.clear()
+        if self.neighborhood is not None:
+            self.neighborhood.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            out = {
+                "exact": self.exact.stats(),
+                "stored_by_source": dict(self.stored),
+                "coalesced": self.coalesced,
+            }
+        if self.neighborhood is not None:
+            out["neighborhood"] = self.neighborhood.stats()
+        return out
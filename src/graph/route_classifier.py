@@ -0,0 +1,184 @@
+# src/graph/route_classifier.py
+"""
+Embedding tabanlı yerel route sınıflandırıcısı.
+
+QueryRouterNode'un anahtar kelime kuralları karar veremediğinde her soru
+için bir Gemini çağrısı yapmak yerine, zaten yüklü olan sentence-transformer
+ile sorunun route prototiplerine benzerliği ölçülür:
+
+- Her route için örnek cümlelerden (ve opsiyonel olarak koleksiyondan
+  örneklenen chunk'ların centroid'inden) birim prototip vektörleri üretilir.
+- Tüm prototipler tek bir matriste tutulur; soru vektörü ile tek bir
+  matris-vektör çarpımı yapılır, route skoru o route'un en yakın
+  prototipidir.
+- En iyi iki route arasındaki fark (margin) ve en iyi skor eşikleri
+  geçiyorsa karar yerel verilir; aksi halde LLM fallback'e bırakılır.
+"""
+from __future__ import annotations
+
+import threading
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from src.utils.logger import log_info, log_warning
+
+
+ROUTES = ("DOMAIN", "WEB", "GENERIC_CHAT")
+
+# Route başına tohum örnek cümleler (soru tipi; anahtar kelime kurallarını tekrar etmez)
+ROUTE_EXAMPLES: Dict[str, List[str]] = {
+    "DOMAIN": [
+        "Firmanızın sunduğu çözümler nelerdir?",
+        "Bu platform hangi modüllerden oluşuyor?",
+        "Destek süreciniz nasıl işliyor?",
+        "Lisanslama modeli nasıl çalışıyor?",
+        "Projelerinizde hangi teknolojileri kullanıyorsunuz?",
+        "Ekibiniz kaç kişiden oluşuyor ve nerede bulunuyor?",
+        "Referanslarınız ve tamamlanmış projeleriniz neler?",
+        "Veri güvenliği politikanız nedir?",
+        "Kurulum ve entegrasyon adımları nelerdir?",
+        "Dokümanda belirtilen teslim süreleri ne kadar?",
+        "What services does your company provide?",
+        "How does your onboarding process work?",
+    ],
+    "WEB": [
+        "Dolar kaç TL oldu?",
+        "İstanbul'da yarın yağmur yağacak mı?",
+        "Dün akşamki maçın sonucu ne oldu?",
+        "Son dakika gelişmeleri neler?",
+        "Borsa bugün nasıl kapandı?",
+        "Bitcoin şu anda ne kadar?",
+        "Seçim sonuçları açıklandı mı?",
+        "Yeni çıkan telefon modelinin özellikleri neler?",
+        "Bu hafta vizyona giren filmler hangileri?",
+        "Deprem oldu mu az önce?",
+        "What is the latest news about the economy?",
+        "Who won the match last night?",
+    ],
+    "GENERIC_CHAT": [
+        "Nasılsın?",
+        "Teşekkür ederim, çok yardımcı oldun.",
+        "Bana bir fıkra anlatır mısın?",
+        "Sen kimsin?",
+        "Günaydın, bugün nasıl gidiyor?",
+        "Bir şiir yazar mısın?",
+        "Canım sıkılıyor, biraz konuşalım mı?",
+        "Bana motivasyon verecek bir söz söyle.",
+        "Python'da liste nasıl sıralanır?",
+        "İyi geceler, görüşürüz.",
+        "Hello, how are you?",
+        "Thanks a lot!",
+    ],
+}
+
+
+def _unit_rows(mat: np.ndarray) -> np.ndarray:
+    mat = np.asarray(mat, dtype=np.float32)
+    norms = np.linalg.norm(mat, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return mat / norms
+
+
+class EmbeddingRouteClassifier:
+    """
+    - margin         : en iyi iki route skoru arasındaki minimum fark
+    - min_similarity : en iyi route skoru için alt sınır
+    - corpus_samples : >0 ise koleksiyondan bu kadar chunk embedding'i
+                       örneklenip centroid'i ek DOMAIN prototipi yapılır
+    predict() karar veremezse None döndürür (→ LLM fallback).
+    """
+
+    def __init__(
+        self,
+        embedding_model,
+        margin: float = 0.05,
+        min_similarity: float = 0.35,
+        examples: Optional[Dict[str, Sequence[str]]] = None,
+        corpus_samples: int = 0,
+        collection=None,
+    ):
+        self.embedding_model = embedding_model
+        self.margin = margin
+        self.min_similarity = min_similarity
+
+        self._lock = threading.Lock()
+        self.local = 0
+        self.deferred = 0
+
+        examples = examples or ROUTE_EXAMPLES
+        protos: List[np.ndarray] = []
+        labels: List[int] = []
+        for r, route in enumerate(ROUTES):
+            texts = list(examples.get(route) or [])
+            if texts:
+                protos.append(np.asarray(embedding_model.encode(texts), dtype=np.float32))
+                labels.extend([r] * len(texts))
+
+        if corpus_samples > 0 and collection is not None:
+            centroid = self._corpus_centroid(collection, corpus_samples)
+            if centroid is not None:
+                protos.append(centroid[None, :])
+                labels.append(ROUTES.index("DOMAIN"))
+
+        # prototipler route'a göre sıralı → route skoru reduceat ile tek geçişte
+        order = np.argsort(np.asarray(labels), kind="stable")
+        self._labels = np.asarray(labels)[order]
+        self._prototypes = _unit_rows(np.concatenate(protos))[order]
+        self._routes = np.unique(self._labels)
+        self._offsets = np.searchsorted(self._labels, self._routes)
+
+        log_info(
+            f"[RouteClassifier] {len(self._labels)} prototip yüklendi "
+            f"(margin={self.margin}, min_similarity={self.min_similarity})"
+        )
+
+    @staticmethod
+    def _corpus_centroid(collection, n: int) -> Optional[np.ndarray]:
+        try:
+            res = collection.get(limit=n, include=["embeddings"])
+            embs = res.get("embeddings")
+            if embs is None or len(embs) == 0:
+                return None
+            return _unit_rows(np.asarray(embs)).mean(axis=0)
+        except Exception as e:
+            log_warning(f"[RouteClassifier] Koleksiyon örneklenemedi: {e}")
+            return None
+
+    def scores(self, query_vec) -> Dict[str, float]:
+        """Route → en yakın prototip cosine benzerliği."""
+        q = np.asarray(query_vec, dtype=np.float32)
+        q = q / (float(np.linalg.norm(q)) or 1.0)
+        sims = self._prototypes @ q
+        best = np.maximum.reduceat(sims, self._offsets)
+        return {ROUTES[r]: float(s) for r, s in zip(self._routes, best)}
+
+    def decide(self, scores: Dict[str, float]) -> Optional[str]:
+        ranked = sorted(scores.items(), key=lambda x: x[1], reverse=True)
+        if not ranked:
+            return None
+        top_route, top = ranked[0]
+        second = ranked[1][1] if len(ranked) > 1 else -1.0
+        if top >= self.min_similarity and (top - second) >= self.margin:
+            return top_route
+        return None
+
+    def predict(self, question: str) -> Optional[str]:
+        # encode_query: aynı vektör DOMAIN retrieval'da cache'ten tekrar kullanılır
+        route = self.decide(self.scores(self.embedding_model.encode_query(question)))
+        with self._lock:
+            if route is None:
+                self.deferred += 1
+            else:
+                self.local += 1
+        return route
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            total = self.local + self.deferred
+            return {
+                "local": self.local,
+                "llm_fallback": self.deferred,
+                "local_rate": round(self.local / total, 4) if total else 0.0,
+                "prototypes": int(self._labels.size),
+            }
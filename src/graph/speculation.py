@@ -0,0 +1,44 @@
+# src/graph/speculation.py
+"""
+Spekülatif retrieval sayaçları.
+
+Router heuristik ile karar veremediğinde LLM sınıflandırması ile DOMAIN
+retrieval'ı aynı anda başlatılır. Route DOMAIN çıkarsa hazır sonuç
+kullanılır; WEB/GENERIC_CHAT (veya follow-up override) çıkarsa sonuç
+atılır. Bu sınıf ne sıklıkla boşa çalışıldığını raporlar.
+"""
+from __future__ import annotations
+
+import threading
+from typing import Any, Dict
+
+
+class SpeculationStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.launched = 0
+        self.used = 0
+        self.wasted: Dict[str, int] = {}  # sebep (route / override) → sayı
+
+    def record_launch(self) -> None:
+        with self._lock:
+            self.launched += 1
+
+    def record_used(self) -> None:
+        with self._lock:
+            self.used += 1
+
+    def record_wasted(self, reason: str) -> None:
+        with self._lock:
+            self.wasted[reason] = self.wasted.get(reason, 0) + 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            wasted = sum(self.wasted.values())
+            return {
+                "launched": self.launched,
+                "used": self.used,
+                "wasted": wasted,
+                "wasted_rate": round(wasted / self.launched, 4) if self.launched else 0.0,
+                "wasted_by_reason": dict(self.wasted),
+            }
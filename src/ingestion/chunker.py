@@ -0,0 +1,151 @@
+# src/ingestion/chunker.py
+"""
+Paragraf/cümle duyarlı metin parçalayıcı (chunker).
+
+Tüm dokümanı tek vektöre gömmek, modelin max sequence length'i sonrasını
+sessizce keser. Bu modül metni örtüşmeli (overlap) parçalara böler ve her
+parçanın orijinal metindeki karakter offset'lerini korur.
+"""
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+from typing import List, Tuple
+
+
+# Türkçe'de cümle sonu sanılmaması gereken yaygın kısaltmalar
+TR_ABBREVIATIONS = {
+    "vb", "vs", "vd", "dr", "prof", "doç", "av", "müh", "sn", "bkz", "örn",
+    "no", "tel", "yy", "s", "sf", "st", "cad", "sok", "mah", "apt", "ltd", "şti",
+    "a.ş", "inc", "co", "mr", "mrs", "ms",
+}
+
+_PARAGRAPH_RE = re.compile(r"\n\s*\n")
+# nokta/ünlem/soru/üç nokta sonrası boşluk → olası cümle sınırı
+_SENTENCE_END_RE = re.compile(r"(?<=[.!?…])[\"'”’)]*\s+")
+_LAST_WORD_RE = re.compile(r"([\wçğıöşüÇĞİÖŞÜ.]+)[.!?…][\"'”’)]*$")
+
+
+@dataclass
+class Chunk:
+    text: str
+    start: int  # orijinal metindeki başlangıç offset'i
+    end: int    # orijinal metindeki bitiş offset'i (hariç)
+    index: int
+
+
+def _is_abbreviation(segment: str) -> bool:
+    m = _LAST_WORD_RE.search(segment)
+    if not m:
+        return False
+    word = m.group(1).lower()
+    return word in TR_ABBREVIATIONS or len(word) == 1 or word.isdigit()
+
+
+def _sentence_spans(text: str) -> List[Tuple[int, int, bool]]:
+    """
+    (start, end, paragraph_end) üçlüleri döndürür.
+    paragraph_end=True ise bu cümle bir paragrafın son cümlesidir.
+    """
+    spans: List[Tuple[int, int, bool]] = []
+    para_start = 0
+    para_bounds = [(m.start(), m.end()) for m in _PARAGRAPH_RE.finditer(text)]
+    para_bounds.append((len(text), len(text)))
+
+    for p_end, next_start in para_bounds:
+        sent_start = para_start
+        para_sents: List[Tuple[int, int]] = []
+        for m in _SENTENCE_END_RE.finditer(text, para_start, p_end):
+            candidate = text[sent_start:m.start()]
+            if _is_abbreviation(candidate):
+                continue
+            para_sents.append((sent_start, m.start()))
+            sent_start = m.end()
+        if sent_start < p_end:
+            para_sents.append((sent_start, p_end))
+
+        for i, (s, e) in enumerate(para_sents):
+            # baş/son boşlukları offset'lerden kırp
+            while s < e and text[s].isspace():
+                s += 1
+            while e > s and text[e - 1].isspace():
+                e -= 1
+            if s < e:
+                spans.append((s, e, i == len(para_sents) - 1))
+        para_start = next_start
+
+    return spans
+
+
+def _split_long_span(text: str, start: int, end: int, size: int) -> List[Tuple[int, int]]:
+    """chunk_size'dan uzun tek bir cümleyi kelime sınırlarından böler."""
+    pieces: List[Tuple[int, int]] = []
+    s = start
+    while s < end:
+        e = min(s + size, end)
+        if e < end:
+            cut = text.rfind(" ", s, e)
+            if cut > s:
+                e = cut
+        pieces.append((s, e))
+        s = e
+        while s < end and text[s].isspace():
+            s += 1
+    return pieces
+
+
+class TextChunker:
+    """
+    - chunk_size : hedef parça uzunluğu (karakter)
+    - overlap    : ardışık parçalar arasında tekrar eden yaklaşık karakter
+    Parçalar cümle sınırlarında kesilir; mümkünse paragraf sonunda kapatılır.
+    """
+
+    def __init__(self, chunk_size: int = 1000, overlap: int = 150, min_paragraph_fill: float = 0.6):
+        if chunk_size <= 0:
+            raise ValueError("chunk_size pozitif olmalı")
+        if not 0 <= overlap < chunk_size:
+            raise ValueError("overlap 0 ile chunk_size arasında olmalı")
+        self.chunk_size = chunk_size
+        self.overlap = overlap
+        self.min_paragraph_fill = min_paragraph_fill
+
+    def split(self, text: str) -> List[Chunk]:
+        if not text or not text.strip():
+            return []
+
+        units: List[Tuple[int, int, bool]] = []
+        for s, e, para_end in _sentence_spans(text):
+            if e - s > self.chunk_size:
+                pieces = _split_long_span(text, s, e, self.chunk_size)
+                for j, (ps, pe) in enumerate(pieces):
+                    units.append((ps, pe, para_end and j == len(pieces) - 1))
+            else:
+                units.append((s, e, para_end))
+
+        chunks: List[Chunk] = []
+        i = 0
+        while i < len(units):
+            first = i
+            j = i
+            # parça dolana kadar cümle ekle
+            while j + 1 < len(units) and units[j + 1][1] - units[first][0] <= self.chunk_size:
+                if units[j][2] and units[j][1] - units[first][0] >= self.chunk_size * self.min_paragraph_fill:
+                    break  # yeterince dolu ve paragraf bitti → burada kapat
+                j += 1
+
+            start, end = units[first][0], units[j][1]
+            chunks.append(Chunk(text=text[start:end], start=start, end=end, index=len(chunks)))
+
+            if j + 1 >= len(units):
+                break
+
+            # overlap: sondan geriye, toplamı overlap'i aşmayan cümlelerle yeni parçaya başla
+            nxt = j + 1
+            k = j
+            while k > first and end - units[k][0] <= self.overlap:
+                nxt = k
+                k -= 1
+            i = nxt if nxt > first else j + 1
+
+        return chunks
@@ -0,0 +1,201 @@
+# src/ingestion/embedding_cache.py
+"""
+Memory-mapped embedding cache.
+
+Hash başına bir .pkl dosyası yerine:
+- embeddings.<dtype>.bin  : ardışık (rows x dim) float32/float16 dizi (np.memmap ile açılır)
+- embeddings.<dtype>.keys : satır satır sabit genişlikli (64 byte) sha256 hex anahtarlar
+- embeddings.<dtype>.json : {"dim", "dtype"} meta bilgisi
+Ekleme iki dosyanın da sonuna append edilir (O(batch)); hash→row index'i
+açılışta keys dosyasından kurulur. Okuma tek bir memmap üzerinden toplu yapılır.
+"""
+from __future__ import annotations
+
+import json
+import os
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+KEY_DTYPE = np.dtype("S64")  # sha256 hex
+
+
+class EmbeddingCache:
+    def __init__(self, cache_dir: str, dtype: str = "float32"):
+        if dtype not in ("float32", "float16"):
+            raise ValueError("dtype float32 veya float16 olmalı")
+        self.cache_dir = cache_dir
+        self.dtype = np.dtype(dtype)
+        self.data_path = os.path.join(cache_dir, f"embeddings.{dtype}.bin")
+        self.keys_path = os.path.join(cache_dir, f"embeddings.{dtype}.keys")
+        self.meta_path = os.path.join(cache_dir, f"embeddings.{dtype}.json")
+
+        self.dim: Optional[int] = None
+        self.rows: Dict[str, int] = {}
+        self._mmap: Optional[np.memmap] = None
+        self._n_rows = 0
+
+        os.makedirs(cache_dir, exist_ok=True)
+        self._load_index()
+
+    # ---------------------------------------------
+    # index / dosya yönetimi
+    # ---------------------------------------------
+    def _load_index(self) -> None:
+        if not os.path.exists(self.meta_path):
+            return
+        try:
+            with open(self.meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+        except (json.JSONDecodeError, OSError):
+            return
+        if meta.get("dtype") != self.dtype.name or not meta.get("dim"):
+            return
+        self.dim = int(meta["dim"])
+
+        data_rows = 0
+        if os.path.exists(self.data_path):
+            data_rows = os.path.getsize(self.data_path) // (self.dim * self.dtype.itemsize)
+        keys = np.zeros(0, dtype=KEY_DTYPE)
+        if os.path.exists(self.keys_path):
+            keys = np.fromfile(self.keys_path, dtype=KEY_DTYPE)
+        # yarım kalmış bir yazımdan sonra iki dosya farklı uzunlukta olabilir
+        self._n_rows = min(data_rows, len(keys))
+        self.rows = {k.decode("ascii"): i for i, k in enumerate(keys[: self._n_rows])}
+
+    def _save_meta(self) -> None:
+        tmp = f"{self.meta_path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"dim": self.dim, "dtype": self.dtype.name}, f)
+        os.replace(tmp, self.meta_path)
+
+    def _truncate_to(self, n_rows: int) -> None:
+        """Yarım yazımlardan kalan fazlalıkları kırpar; append'ler hizalı kalır."""
+        row_bytes = self.dim * self.dtype.itemsize
+        for path, size in ((self.data_path, n_rows * row_bytes), (self.keys_path, n_rows * KEY_DTYPE.itemsize)):
+            if os.path.exists(path) and os.path.getsize(path) != size:
+                with open(path, "r+b") as f:
+                    f.truncate(size)
+
+    def _view(self) -> Optional[np.memmap]:
+        """Dosyanın read-only memmap görünümü (append sonrası yeniden açılır)."""
+        if self._n_rows == 0:
+            return None
+        if self._mmap is None or self._mmap.shape[0] != self._n_rows:
+            self._mmap = np.memmap(
+                self.data_path, dtype=self.dtype, mode="r", shape=(self._n_rows, self.dim)
+            )
+        return self._mmap
+
+    # ---------------------------------------------
+    # public API
+    # ---------------------------------------------
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def get(self, hash_id: str) -> Optional[np.ndarray]:
+        row = self.rows.get(hash_id)
+        view = self._view()
+        if row is None or view is None:
+            return None
+        return view[row]
+
+    def get_many(self, hashes: Sequence[str]) -> Tuple[np.ndarray, List[Optional[np.ndarray]]]:
+        """
+        Çok sayıda hash'i tek seferde okur.
+        Dönüş: (found_mask, vektör listesi) — bulunamayanlar None.
+        Okuma tek bir fancy-index ile memmap'ten yapılır.
+        """
+        found = np.zeros(len(hashes), dtype=bool)
+        out: List[Optional[np.ndarray]] = [None] * len(hashes)
+        view = self._view()
+        if view is None:
+            return found, out
+
+        positions = [i for i, h in enumerate(hashes) if h in self.rows]
+        if not positions:
+            return found, out
+
+        rows = np.fromiter((self.rows[hashes[i]] for i in positions), dtype=np.int64, count=len(positions))
+        block = np.asarray(view[rows], dtype=np.float32)
+        for pos, vec in zip(positions, block):
+            out[pos] = vec
+            found[pos] = True
+        return found, out
+
+    def append(self, hashes: Sequence[str], vectors: np.ndarray) -> int:
+        """Yeni embedding'leri dosya sonuna ekler; zaten var olan hash'leri atlar."""
+        vectors = np.asarray(vectors)
+        if vectors.ndim != 2 or len(hashes) != vectors.shape[0]:
+            raise ValueError("hashes ve vectors uzunlukları eşleşmiyor")
+        if self.dim is None:
+            self.dim = int(vectors.shape[1])
+            self._save_meta()
+        elif vectors.shape[1] != self.dim:
+            raise ValueError(f"Boyut uyuşmazlığı: cache dim={self.dim}, gelen={vectors.shape[1]}")
+
+        keep: List[int] = []
+        seen = set()
+        for i, h in enumerate(hashes):
+            if h not in self.rows and h not in seen:
+                seen.add(h)
+                keep.append(i)
+        if not keep:
+            return 0
+
+        self._truncate_to(self._n_rows)
+        block = np.ascontiguousarray(vectors[keep], dtype=self.dtype)
+        keys = np.array([hashes[i] for i in keep], dtype=KEY_DTYPE)
+        # önce veri, sonra anahtar: anahtarı olan her satırın verisi diskte olur
+        for path, payload in ((self.data_path, block), (self.keys_path, keys)):
+            with open(path, "ab") as f:
+                f.write(payload.tobytes())
+                f.flush()
+                os.fsync(f.fileno())
+
+        for offset, i in enumerate(keep):
+            self.rows[hashes[i]] = self._n_rows + offset
+        self._n_rows += len(keep)
+        self._mmap = None
+        return len(keep)
+
+    def dead_ratio(self, live_hashes: Iterable[str]) -> float:
+        if not self._n_rows:
+            return 0.0
+        live = sum(1 for h in set(live_hashes) if h in self.rows)
+        return 1.0 - live / self._n_rows
+
+    def compact(self, live_hashes: Iterable[str]) -> int:
+        """
+        Sadece live_hashes'teki satırları yeni bir dosyaya kopyalar.
+        Dönüş: atılan satır sayısı.
+        """
+        view = self._view()
+        if view is None:
+            return 0
+        live = [h for h in dict.fromkeys(live_hashes) if h in self.rows]
+        removed = self._n_rows - len(live)
+        if removed <= 0:
+            return 0
+
+        tmp_data = f"{self.data_path}.tmp"
+        tmp_keys = f"{self.keys_path}.tmp"
+        rows = np.fromiter((self.rows[h] for h in live), dtype=np.int64, count=len(live))
+        with open(tmp_data, "wb") as f:
+            # büyük cache'lerde belleği şişirmemek için parça parça kopyala
+            for i in range(0, len(rows), 65536):
+                f.write(np.ascontiguousarray(view[rows[i:i + 65536]]).tobytes())
+            f.flush()
+            os.fsync(f.fileno())
+        with open(tmp_keys, "wb") as f:
+            f.write(np.array(live, dtype=KEY_DTYPE).tobytes())
+            f.flush()
+            os.fsync(f.fileno())
+
+        self._mmap = None
+        del view
+        os.replace(tmp_data, self.data_path)
+        os.replace(tmp_keys, self.keys_path)
+        self.rows = {h: i for i, h in enumerate(live)}
+        self._n_rows = len(live)
+        return removed
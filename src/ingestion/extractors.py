@@ -0,0 +1,187 @@
+# src/ingestion/extractors.py
+"""
+PDF/TXT metin çıkarımı.
+
+Fonksiyonlar modül seviyesinde tanımlıdır; böylece ProcessPoolExecutor
+worker'larına pickle ile gönderilebilirler.
+"""
+from __future__ import annotations
+
+import multiprocessing
+import os
+import signal
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import contextmanager
+from typing import Dict, Iterable, Iterator, Optional, Tuple
+
+
+class ExtractionTimeout(Exception):
+    pass
+
+
+def extract_text(file_path: str) -> str:
+    if file_path.endswith(".txt"):
+        with open(file_path, "r", encoding="utf-8") as f:
+            return f.read()
+    if file_path.endswith(".pdf"):
+        from PyPDF2 import PdfReader
+        pdf = PdfReader(file_path)
+        return "".join([p.extract_text() or "" for p in pdf.pages])
+    raise ValueError(f"{file_path} desteklenmeyen format")
+
+
+@contextmanager
+def _time_limit(seconds: Optional[float]):
+    """
+    SIGALRM tabanlı süre sınırı. Sadece Unix'te ve ana thread'de çalışır;
+    aksi durumda sınırsız çalışır (worker process'ler zaten ana thread'dir).
+    """
+    usable = (
+        seconds
+        and hasattr(signal, "SIGALRM")
+        and threading.current_thread() is threading.main_thread()
+    )
+    if not usable:
+        yield
+        return
+
+    def _raise(signum, frame):
+        raise ExtractionTimeout(f"{seconds:.0f}s içinde tamamlanamadı")
+
+    previous = signal.signal(signal.SIGALRM, _raise)
+    signal.setitimer(signal.ITIMER_REAL, seconds)
+    try:
+        yield
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
+
+
+def extract_file(file_path: str, timeout: Optional[float] = None) -> Tuple[str, str, Optional[str]]:
+    """
+    Worker giriş noktası. (file_path, text, error) döndürür; hata fırlatmaz,
+    böylece tek bir bozuk PDF tüm havuzu düşürmez.
+    """
+    try:
+        with _time_limit(timeout):
+            return file_path, extract_text(file_path), None
+    except ExtractionTimeout as e:
+        return file_path, "", f"timeout: {e}"
+    except Exception as e:
+        return file_path, "", str(e)
+
+
+# havuz çöktüğünde çalışmakta olan bir dosyanın en fazla deneme sayısı
+MAX_ATTEMPTS = 2
+
+
+def _kill_pool(pool: ProcessPoolExecutor) -> None:
+    """Takılı/çökmüş havuzu kapatır; shutdown çalışan worker'ları durdurmadığı için önce öldürülür."""
+    for proc in list((getattr(pool, "_processes", None) or {}).values()):
+        try:
+            proc.kill()
+        except Exception:
+            pass
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def iter_extracted(
+    file_paths: Iterable[str],
+    max_workers: Optional[int] = None,
+    timeout: Optional[float] = None,
+    max_in_flight: Optional[int] = None,
+) -> Iterator[Tuple[str, str, Optional[str]]]:
+    """
+    Dosyaları process havuzunda paralel çıkarır ve sonuçları bittikleri
+    sırayla (sırasız) yield eder. Bellekte tutulan sonuç sayısı
+    max_in_flight ile sınırlıdır.
+    max_workers <= 1 ise seri, aynı process içinde çalışır.
+
+    Dosya başına izolasyon:
+    - Bir worker process ölürse (bozuk PDF, OOM) havuz yeniden kurulur;
+      henüz başlamamış işler yeniden kuyruğa alınır, o sırada çalışanlar
+      bir kez daha denenir, yine havuzu düşürürlerse hatalı sayılır.
+    - Worker içindeki SIGALRM C eklentilerindeki takılmayı kesemez; bu yüzden
+      ebeveyn tarafında da bir süre sınırı (2 × timeout) vardır: aşan dosya
+      timeout hatası alır, havuz öldürülüp yeniden kurulur.
+    """
+    workers = max_workers or os.cpu_count() or 1
+    paths = list(file_paths)
+
+    if workers <= 1:
+        for path in paths:
+            yield extract_file(path, timeout)
+        return
+
+    window = max_in_flight or workers * 4
+    # çalışıyor görünen iş, önündeki worker'ın kendi timeout'unu da bekleyebilir → 2 × timeout
+    hard_timeout = 2 * timeout if timeout else None
+    tick = min(1.0, hard_timeout / 10) if hard_timeout else 1.0
+    # "spawn": ana process'te torch/embedding modeli yüklüyken fork etmek güvenli değil
+    ctx = multiprocessing.get_context("spawn")
+
+    queue = deque(paths)
+    attempts: Dict[str, int] = {}
+    in_flight: Dict[Future, str] = {}
+    started: Dict[Future, float] = {}   # çalışmaya başladığı ilk görülen an
+    pool = ProcessPoolExecutor(max_workers=workers, mp_context=ctx)
+    try:
+        while queue or in_flight:
+            broken = False
+            while queue and len(in_flight) < window:
+                path = queue.popleft()
+                try:
+                    in_flight[pool.submit(extract_file, path, timeout)] = path
+                except BrokenProcessPool:
+                    queue.appendleft(path)
+                    broken = True
+                    break
+
+            if not broken:
+                done, _ = wait(in_flight, timeout=tick, return_when=FIRST_COMPLETED)
+                for fut in done:
+                    if isinstance(fut.exception(), BrokenProcessPool):
+                        broken = True  # havuz yeniden kurulurken ele alınır
+                        continue
+                    path = in_flight.pop(fut)
+                    started.pop(fut, None)
+                    try:
+                        yield fut.result()
+                    except Exception as e:
+                        yield path, "", str(e)
+
+            now = time.monotonic()
+            for fut in in_flight:
+                if fut.running():
+                    started.setdefault(fut, now)
+            overdue = set()
+            if hard_timeout:
+                overdue = {fut for fut, t0 in started.items() if now - t0 > hard_timeout}
+
+            if not (broken or overdue):
+                continue
+
+            _kill_pool(pool)
+            # çöken işi çalışırken görmediysek hepsi şüpheli (sonsuz yeniden deneme olmasın)
+            suspects = set(started) or set(in_flight)
+            for fut, path in in_flight.items():
+                if fut.done() and not fut.cancelled() and fut.exception() is None:
+                    yield fut.result()
+                elif fut in overdue:
+                    yield path, "", f"timeout: {hard_timeout:.0f}s içinde tamamlanamadı, worker sonlandırıldı"
+                elif fut not in suspects:
+                    queue.appendleft(path)  # hiç başlamadı → suçsuz, yeniden dene
+                elif attempts.get(path, 0) + 1 < MAX_ATTEMPTS:
+                    attempts[path] = attempts.get(path, 0) + 1
+                    queue.appendleft(path)
+                else:
+                    yield path, "", "worker process beklenmedik şekilde sonlandı"
+            in_flight.clear()
+            started.clear()
+            pool = ProcessPoolExecutor(max_workers=workers, mp_context=ctx)
+    finally:
+        pool.shutdown(wait=True, cancel_futures=True)
@@ -1,19 +1,29 @@
 import os
+import time
 import hashlib
-import pickle
+from typing import Any, Dict, List
 from tqdm import tqdm
-from sentence_transformers import SentenceTransformer
-import chromadb
 from src.annotator.document_annotator import DocumentAnnotator
+from src.ingestion.chunker import TextChunker
+from src.ingestion.embedding_cache import EmbeddingCache
+from src.ingestion.extractors import iter_extracted
+from src.ingestion.manifest import IngestionManifest
 from src.config import Config
+from src.registry import get_chroma_client, get_embedding_model
+from src.retriever.bm25 import BM25Index, bm25_path
+from src.retriever.collection_version import bump_version
+from src.retriever.tokenizer import TokenIndex, token_index_path
 from src.utils.logger import log_info, log_success, log_warning, log_error
 
 class DocumentIngestor:
     """
     PDF/TXT dokümanlarını okuyup:
-    - metni çıkarır
-    - embedding üretir (cache destekli)
-    - ChromaDB koleksiyonuna kalıcı olarak yazar
+    - metni process havuzunda paralel çıkarır (dosya başına timeout)
+    - örtüşmeli chunk'lara böler (source/offset metadata ile)
+    - embedding'leri batch halinde üretir (cache destekli)
+    - ChromaDB koleksiyonuna toplu olarak yazar (upsert)
+    - aynı chunk'lar için BM25 index'ini günceller (hybrid retrieval)
+    - manifest ile sadece yeni/değişen dosyaları işler, silinenleri temizler
     """
 
     def __init__(
@@ -22,22 +32,45 @@ class DocumentIngestor:
         cache_dir="data/cache",
         collection_name="rag_docs",
         chroma_path=None,
+        chunk_size=None,
+        chunk_overlap=None,
+        embed_batch_size=None,
+        write_batch_size=None,
+        max_workers=None,
+        extract_timeout=None,
     ):
         self.source_dir = source_dir
         self.cache_dir = cache_dir
         self.collection_name = collection_name
         self.chroma_path = chroma_path or Config.CHROMA_PATH
+        self.chunker = TextChunker(
+            chunk_size=chunk_size or Config.CHUNK_SIZE,
+            overlap=Config.CHUNK_OVERLAP if chunk_overlap is None else chunk_overlap,
+        )
+        self.embed_batch_size = embed_batch_size or Config.EMBED_BATCH_SIZE
+        self.write_batch_size = write_batch_size or Config.CHROMA_WRITE_BATCH
+        self.max_workers = max_workers or Config.INGEST_WORKERS or os.cpu_count() or 1
+        self.extract_timeout = extract_timeout or Config.EXTRACT_TIMEOUT
 
         os.makedirs(self.cache_dir, exist_ok=True)
         os.makedirs(self.chroma_path, exist_ok=True)
 
         # ⬇⬇⬇ BURASI KRİTİK: PersistentClient kullanıyoruz ⬇⬇⬇
-        self.client = chromadb.PersistentClient(path=self.chroma_path)
+        self.client = get_chroma_client(self.chroma_path)
 
         self.collection = self.client.get_or_create_collection(self.collection_name)
 
-        self.model = SentenceTransformer(Config.EMBEDDING_MODEL)
+        self.model = get_embedding_model(Config.EMBEDDING_MODEL)
         self.annotator = DocumentAnnotator()
+        self.embedding_cache = EmbeddingCache(self.cache_dir, dtype=Config.EMBED_CACHE_DTYPE)
+        self.manifest = IngestionManifest(
+            os.path.join(self.cache_dir, f"manifest_{self.collection_name}.json")
+        )
+        # hybrid retrieval için Chroma ile aynı chunk id'leri üzerinde BM25 index'i
+        self.bm25_path = bm25_path(self.collection_name, self.chroma_path)
+        self.bm25 = BM25Index.load_or_create(self.bm25_path)
+        self.token_index_path = token_index_path(self.collection_name, self.chroma_path)
+        self.collection_version = None
 
         log_info("──────────────────────────────")
         log_info(f"🧠 Embedding Model   : {Config.EMBEDDING_MODEL}")
@@ -49,30 +82,6 @@ class DocumentIngestor:
     def _hash_text(self, text: str):
         return hashlib.sha256(text.encode("utf-8")).hexdigest()
 
-    def _load_cache(self, hash_id: str):
-        path = os.path.join(self.cache_dir, f"{hash_id}.pkl")
-        if os.path.exists(path):
-            with open(path, "rb") as f:
-                return pickle.load(f)
-        return None
-
-    def _save_cache(self, hash_id: str, embedding):
-        path = os.path.join(self.cache_dir, f"{hash_id}.pkl")
-        with open(path, "wb") as f:
-            pickle.dump(embedding, f)
-
-    def _extract_text(self, file_path: str):
-        if file_path.endswith(".txt"):
-            with open(file_path, "r", encoding="utf-8") as f:
-                return f.read()
-        elif file_path.endswith(".pdf"):
-            from PyPDF2 import PdfReader
-            pdf = PdfReader(file_path)
-            return "".join([p.extract_text() or "" for p in pdf.pages])
-        else:
-            log_warning(f"{file_path} desteklenmeyen format, atlanıyor.")
-            return ""
-
     def load_documents(self):
         files = [f for f in os.listdir(self.source_dir) if f.endswith((".txt", ".pdf"))]
         if not files:
@@ -81,53 +90,278 @@ class DocumentIngestor:
             log_info(f"{len(files)} doküman bulundu: {', '.join(files)}")
         return files
 
-    def process_documents(self):
-        files = self.load_documents()
+    def _source_id(self, file_name: str) -> str:
+        """Dosya yoluna bağlı sabit id öneki; değişen dosyanın chunk'ları upsert edilir."""
+        return self._hash_text(file_name)[:16]
+
+    def _bump_version(self) -> None:
+        """Koleksiyona yazıldı → API tarafındaki retrieval cache'leri geçersiz kılınır."""
+        self.collection_version = bump_version(self.collection_name, self.chroma_path)
+
+    def _delete_ids(self, ids: List[str], stats: Dict[str, float]) -> None:
+        deleted = 0
+        for i in range(0, len(ids), self.write_batch_size):
+            part = ids[i:i + self.write_batch_size]
+            try:
+                self.collection.delete(ids=part)
+                deleted += len(part)
+                for cid in part:
+                    self.bm25.remove(cid)
+            except Exception as e:
+                log_error(f"❌ {len(part)} chunk silinemedi: {e}")
+        stats["deleted"] += deleted
+        if deleted:
+            self._bump_version()
+
+    def _flush_batch(
+        self,
+        batch: List[Dict[str, Any]],
+        files: List[Dict[str, Any]],
+        stats: Dict[str, float],
+    ) -> None:
+        """
+        Bir grup dosyanın chunk'larını toplu işler:
+        - cache'te olmayanları tek bir encode çağrısında (batch halinde) gömer
+        - eski/artık chunk'ları siler, yenileri collection.upsert ile yazar
+        - başarıyla yazılan dosyaları manifest'e kaydeder
+        """
         if not files:
             return
 
+        if batch:
+            hashes = [item["hash"] for item in batch]
+            # tüm batch için cache'e tek seferde (memmap üzerinden) bak
+            found, embeddings = self.embedding_cache.get_many(hashes)
+            missing = [i for i, ok in enumerate(found) if not ok]
+
+            if missing:
+                t0 = time.perf_counter()
+                encoded = self.model.encode(
+                    [batch[i]["text"] for i in missing],
+                    batch_size=self.embed_batch_size,
+                    show_progress_bar=False,
+                )
+                stats["encode_seconds"] += time.perf_counter() - t0
+                for i, vec in zip(missing, encoded):
+                    embeddings[i] = vec
+                self.embedding_cache.append([hashes[i] for i in missing], encoded)
+
+            stats["encoded"] += len(missing)
+            stats["cached"] += len(batch) - len(missing)
+
+        stale = [cid for f in files for cid in f["stale_ids"]]
+        if stale:
+            self._delete_ids(stale, stats)
+
+        try:
+            for i in range(0, len(batch), self.write_batch_size):
+                part = slice(i, i + self.write_batch_size)
+                self.collection.upsert(
+                    ids=[item["id"] for item in batch[part]],
+                    documents=[item["text"] for item in batch[part]],
+                    embeddings=[e.tolist() for e in embeddings[part]],
+                    metadatas=[item["metadata"] for item in batch[part]],
+                )
+            stats["written"] += len(batch)
+            if batch:
+                self._bump_version()
+            for item in batch:
+                self.bm25.add(item["id"], item["text"])
+        except Exception as e:
+            log_error(f"❌ {len(batch)} chunk kaydedilemedi: {e}")
+            return  # manifest'e yazmıyoruz → bir sonraki çalıştırmada tekrar denenir
+
+        for f in files:
+            self.manifest.record(
+                f["name"], f["size"], f["mtime_ns"], f["content_hash"], f["chunk_ids"], f["chunk_hashes"]
+            )
+        self.manifest.save()
+
+    def _sync_bm25(self) -> None:
+        """
+        BM25 index'ini manifest ile hizalar. Yarıda kalmış bir çalıştırma ya da
+        silinmiş bm25 dosyası sonrası eksik chunk'lar Chroma'dan okunup eklenir.
+        """
+        expected = {cid for entry in self.manifest.files.values() for cid in entry["chunk_ids"]}
+        current = set(self.bm25.ids())
+        for cid in current - expected:
+            self.bm25.remove(cid)
+        missing = sorted(expected - current)
+        for i in range(0, len(missing), self.write_batch_size):
+            part = missing[i:i + self.write_batch_size]
+            res = self.collection.get(ids=part, include=["documents"])
+            for cid, doc in zip(res.get("ids", []), res.get("documents", [])):
+                if doc:
+                    self.bm25.add(cid, doc)
+        if missing or (current - expected):
+            log_info(f"🔤 BM25 index senkronize edildi (+{len(missing)} / -{len(current - expected)}).")
+
+    def _maybe_compact_cache(self) -> None:
+        """Manifest'te artık referansı olmayan embedding'ler eşiği aşınca cache'i sıkıştırır."""
+        live = self.manifest.live_chunk_hashes()
+        if self.embedding_cache.dead_ratio(live) < Config.EMBED_CACHE_COMPACT_RATIO:
+            return
+        removed = self.embedding_cache.compact(live)
+        if removed:
+            log_info(f"🧹 Embedding cache sıkıştırıldı: {removed} kullanılmayan satır atıldı.")
+
+    def process_documents(self, force: bool = False):
+        """
+        Artımlı ingest:
+        - manifest'teki size/mtime ile aynı dosyalar hiç okunmaz
+        - içeriği değişmeyen (hash aynı) dosyalar yeniden encode edilmez
+        - değişen dosyaların chunk'ları upsert edilir, artık chunk'lar silinir
+        - kaynak dizinden kaldırılan dosyaların chunk'ları silinir
+        force=True ise tüm dosyalar yeniden çıkarılır.
+        """
+        files = self.load_documents()
+
         log_info(f"🚀 Koleksiyona ingest başlıyor -> '{self.collection_name}'")
+        log_info(f"⚙️  Extraction workers={self.max_workers} timeout={self.extract_timeout}s")
+        log_info(
+            f"✂️  Chunk size={self.chunker.chunk_size} overlap={self.chunker.overlap} "
+            f"| encode batch={self.embed_batch_size} | write batch={self.write_batch_size}"
+        )
 
-        for file_name in tqdm(files, desc="📄 Dokümanlar işleniyor", colour="cyan"):
-            file_path = os.path.join(self.source_dir, file_name)
-            text = self._extract_text(file_path)
+        started = time.perf_counter()
+        stats: Dict[str, float] = {
+            "files": 0, "skipped": 0, "unchanged": 0, "removed": 0, "failed": 0,
+            "empty": 0, "chunks": 0, "encoded": 0, "cached": 0, "written": 0, "deleted": 0,
+            "encode_seconds": 0.0,
+        }
 
-            if not text.strip():
-                log_warning(f"{file_name} boş veya okunamadı, atlandı.")
-                continue
+        self._sync_bm25()
 
-            text_hash = self._hash_text(text)
-            cached_embedding = self._load_cache(text_hash)
+        # 1. Silinen dosyalar → chunk'larını koleksiyondan kaldır
+        for name in self.manifest.missing(files):
+            ids = self.manifest.remove(name)
+            self._delete_ids(ids, stats)
+            stats["removed"] += 1
+            log_info(f"🗑️  {name}: kaynakta yok, {len(ids)} chunk silindi.")
+        if stats["removed"]:
+            self.manifest.save()
 
-            if cached_embedding is not None:
-                embedding = cached_embedding
-                log_info(f"{file_name}: cache bulundu (yeniden encode edilmedi).")
+        # 2. size/mtime değişmemiş dosyaları hiç okumadan atla
+        file_stats: Dict[str, os.stat_result] = {}
+        to_extract: List[str] = []
+        for name in files:
+            st = os.stat(os.path.join(self.source_dir, name))
+            file_stats[name] = st
+            if not force and self.manifest.is_unchanged(name, st.st_size, st.st_mtime_ns):
+                stats["skipped"] += 1
             else:
-                embedding = self.model.encode([text])[0]
-                self._save_cache(text_hash, embedding)
-                log_info(f"{file_name}: yeni embedding üretildi ve cache'e kaydedildi.")
+                to_extract.append(name)
 
-            try:
-                self.collection.add(
-                    documents=[text],
-                    embeddings=[embedding.tolist()],
-                    ids=[text_hash],
-                    metadatas=[{
+        log_info(f"🔎 {len(to_extract)} yeni/değişmiş dosya, {int(stats['skipped'])} dosya değişmemiş.")
+
+        pending: List[Dict[str, Any]] = []
+        pending_files: List[Dict[str, Any]] = []
+
+        # metin çıkarımı process havuzunda paralel; sonuçlar bittikçe (sırasız) gelir
+        extracted = iter_extracted(
+            [os.path.join(self.source_dir, f) for f in to_extract],
+            max_workers=self.max_workers,
+            timeout=self.extract_timeout,
+        )
+        for file_path, text, error in tqdm(
+            extracted, total=len(to_extract), desc="📄 Dokümanlar işleniyor", colour="cyan"
+        ):
+            file_name = os.path.basename(file_path)
+            if error:
+                log_warning(f"{file_name} okunamadı ({error}), atlandı.")
+                stats["failed"] += 1
+                continue
+
+            st = file_stats[file_name]
+            doc_hash = self._hash_text(text)
+            previous = self.manifest.get(file_name)
+
+            # mtime değişmiş ama içerik aynı → sadece stat bilgisini güncelle
+            if previous and previous["content_hash"] == doc_hash and not force:
+                self.manifest.record(
+                    file_name, st.st_size, st.st_mtime_ns, doc_hash,
+                    previous["chunk_ids"], previous.get("chunk_hashes"),
+                )
+                stats["unchanged"] += 1
+                continue
+
+            if not text.strip():
+                # atlanmaz: manifest'e 0 chunk ile yazılır, eski chunk'ları silinir
+                log_warning(f"{file_name} boş, chunk üretilmedi (varsa eski chunk'ları silinecek).")
+                stats["empty"] += 1
+
+            source_id = self._source_id(file_name)
+            chunks = self.chunker.split(text)
+            chunk_ids = [f"{source_id}:{ch.index}" for ch in chunks]
+            chunk_hashes = [self._hash_text(ch.text) for ch in chunks]
+            for ch, cid, chash in zip(chunks, chunk_ids, chunk_hashes):
+                pending.append({
+                    "id": cid,
+                    "hash": chash,
+                    "text": ch.text,
+                    "metadata": {
                         "source": file_name,
+                        "doc_hash": doc_hash,
+                        "chunk_index": ch.index,
+                        "start": ch.start,
+                        "end": ch.end,
                         "ingested_via": "local_ingestion",
-                    }]
-                )
+                    },
+                })
 
+            old_ids = previous["chunk_ids"] if previous else []
+            pending_files.append({
+                "name": file_name,
+                "size": st.st_size,
+                "mtime_ns": st.st_mtime_ns,
+                "content_hash": doc_hash,
+                "chunk_ids": chunk_ids,
+                "chunk_hashes": chunk_hashes,
+                "stale_ids": sorted(set(old_ids) - set(chunk_ids)),
+            })
+
+            stats["files"] += 1
+            stats["chunks"] += len(chunks)
+            log_info(f"{file_name}: {len(chunks)} chunk üretildi.")
+
+            if chunks:
                 # dokümanı anotla (basit relevance tag vs.)
                 self.annotator.annotate([text], [("AI_relevance", 0.95)])
 
-                log_success(f"✅ {file_name} -> '{self.collection_name}' koleksiyonuna kaydedildi.")
+            if len(pending) >= self.write_batch_size:
+                self._flush_batch(pending, pending_files, stats)
+                pending, pending_files = [], []
 
-            except Exception as e:
-                log_error(f"❌ {file_name} kaydedilemedi: {e}")
+        self._flush_batch(pending, pending_files, stats)
+        if stats["unchanged"]:
+            self.manifest.save()
+        self._maybe_compact_cache()
+        self.bm25.save(self.bm25_path)
+        log_info(f"🔤 BM25 index: {len(self.bm25)} chunk → {self.bm25_path}")
+        # grader/hallucination için chunk token id'leri (BM25 terimlerinden türetilir)
+        token_index = TokenIndex.from_terms(self.bm25.doc_terms.items())
+        token_index.save(self.token_index_path)
+        log_info(f"🔢 Token index: {len(token_index)} chunk → {self.token_index_path}")
+
+        elapsed = max(time.perf_counter() - started, 1e-9)
+        enc_secs = stats["encode_seconds"]
+        log_info("──────────────────────────────")
+        log_info(
+            f"📄 Dosya             : {int(stats['files'])} işlendi | {int(stats['skipped'])} atlandı | "
+            f"{int(stats['unchanged'])} içerik aynı | {int(stats['removed'])} silindi | {int(stats['failed'])} hatalı | {int(stats['empty'])} boş"
+        )
+        log_info(f"✂️  Chunk             : {int(stats['chunks'])} (yazılan: {int(stats['written'])}, silinen: {int(stats['deleted'])})")
+        log_info(f"🧠 Encode edilen      : {int(stats['encoded'])} | cache'ten: {int(stats['cached'])}")
+        if self.collection_version is not None:
+            log_info(f"🔖 Koleksiyon versiyonu : {self.collection_version}")
+        log_info(f"⏱️  Süre              : {elapsed:.2f}s (encode: {enc_secs:.2f}s)")
+        log_info(f"⚡ Throughput        : {stats['chunks'] / elapsed:.1f} chunk/sn")
+        if stats["encoded"] and enc_secs > 0:
+            log_info(f"⚡ Encode throughput : {stats['encoded'] / enc_secs:.1f} chunk/sn")
+        log_info("──────────────────────────────")
 
         # debug amaçlı koleksiyon boyutunu yazdıralım
-        count = len(self.collection.get()["ids"])
+        count = self.collection.count()
         log_info(f"📊 Toplam kayıt sayısı (collection='{self.collection_name}'): {count}")
 
         log_success(f"💾 Kalıcı veritabanı dizini: {os.path.abspath(self.chroma_path)}")
@@ -135,5 +369,11 @@ class DocumentIngestor:
 
 
 if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Kaynak dokümanları Chroma'ya artımlı ingest eder.")
+    parser.add_argument("--full", action="store_true", help="Manifest'i yok say, tüm dosyaları yeniden işle")
+    args = parser.parse_args()
+
     ingestor = DocumentIngestor()
-    ingestor.process_documents()
+    ingestor.process_documents(force=args.full)
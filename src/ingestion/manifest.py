@@ -0,0 +1,80 @@
+# src/ingestion/manifest.py
+"""
+Artımlı ingestion manifest'i.
+
+Her kaynak dosya için (size, mtime, content hash, chunk id'leri) saklanır.
+Böylece yeniden çalıştırmada sadece yeni/değişen dosyalar çıkarılıp
+encode edilir, silinen dosyaların chunk'ları koleksiyondan kaldırılır.
+"""
+from __future__ import annotations
+
+import json
+import os
+from typing import Any, Dict, Iterable, List, Optional
+
+
+class IngestionManifest:
+    VERSION = 1
+
+    def __init__(self, path: str):
+        self.path = path
+        self.files: Dict[str, Dict[str, Any]] = {}
+        self._load()
+
+    def _load(self) -> None:
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") == self.VERSION:
+                self.files = data.get("files", {})
+        except (json.JSONDecodeError, OSError):
+            # bozuk manifest → tam yeniden ingest (upsert sayesinde güvenli)
+            self.files = {}
+
+    def save(self) -> None:
+        """Atomik yazım: önce geçici dosya, sonra os.replace."""
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"version": self.VERSION, "files": self.files}, f, ensure_ascii=False)
+        os.replace(tmp, self.path)
+
+    def get(self, name: str) -> Optional[Dict[str, Any]]:
+        return self.files.get(name)
+
+    def is_unchanged(self, name: str, size: int, mtime_ns: int) -> bool:
+        entry = self.files.get(name)
+        return bool(entry) and entry["size"] == size and entry["mtime_ns"] == mtime_ns
+
+    def record(
+        self,
+        name: str,
+        size: int,
+        mtime_ns: int,
+        content_hash: str,
+        chunk_ids: List[str],
+        chunk_hashes: Optional[List[str]] = None,
+    ) -> None:
+        self.files[name] = {
+            "size": size,
+            "mtime_ns": mtime_ns,
+            "content_hash": content_hash,
+            "chunk_ids": list(chunk_ids),
+            "chunk_hashes": list(chunk_hashes or []),
+        }
+
+    def remove(self, name: str) -> List[str]:
+        """Dosyayı manifest'ten çıkarır ve silinmesi gereken chunk id'lerini döndürür."""
+        entry = self.files.pop(name, None)
+        return entry["chunk_ids"] if entry else []
+
+    def live_chunk_hashes(self) -> List[str]:
+        """Embedding cache sıkıştırması için hâlâ kullanılan chunk hash'leri."""
+        return [h for entry in self.files.values() for h in entry.get("chunk_hashes", [])]
+
+    def missing(self, present: Iterable[str]) -> List[str]:
+        """Manifest'te olup kaynak dizinde artık bulunmayan dosyalar."""
+        present_set = set(present)
+        return [name for name in self.files if name not in present_set]
@@ -0,0 +1,133 @@
+# src/llm/answer_cache.py
+"""
+Gemini üretim adımının önündeki semantik cevap cache'i (opsiyonel).
+
+Normalize edilmiş sorunun embedding'i ile en yakın önceki sorular aranır.
+Benzerlik eşiği aşılıyor VE route ile getirilen chunk id'leri birebir
+aynıysa, LLM çağrısı yapılmadan önceki cevap ve skorları döndürülür.
+"""
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+import numpy as np
+
+from src.retriever.tokenizer import token_ids
+
+
+def history_is_relevant(question: str, history_context: str, min_overlap: float) -> bool:
+    """
+    Soru token'larının geçmiş bağlamda geçme oranı eşiği aşıyorsa cevap
+    muhtemelen geçmişe bağlıdır → cache atlanmalı.
+    """
+    if not (history_context or "").strip():
+        return False
+    q = token_ids(question)
+    if not q.size:
+        return False
+    h = token_ids(history_context)
+    overlap = np.intersect1d(q, h, assume_unique=True).size / q.size
+    return overlap >= min_overlap
+
+
+class SemanticAnswerCache:
+    def __init__(self, max_entries: int = 512, ttl_seconds: Optional[float] = 3600, threshold: float = 0.92):
+        self.max_entries = max(1, int(max_entries))
+        self.ttl_seconds = ttl_seconds
+        self.threshold = threshold
+
+        self._entries: "OrderedDict[int, Dict[str, Any]]" = OrderedDict()
+        self._next_id = 0
+        self._matrix: Optional[np.ndarray] = None  # (n, dim) birim vektörler
+        self._matrix_ids: Tuple[int, ...] = ()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.bypassed = 0
+        self.evictions = 0
+
+    @staticmethod
+    def _unit(vec) -> np.ndarray:
+        v = np.asarray(vec, dtype=np.float32)
+        norm = float(np.linalg.norm(v)) or 1.0
+        return v / norm
+
+    def _expired(self, entry: Dict[str, Any], now: float) -> bool:
+        return self.ttl_seconds is not None and (now - entry["stored_at"]) > self.ttl_seconds
+
+    def _rebuild_matrix(self) -> None:
+        if self._matrix is not None:
+            return
+        self._matrix_ids = tuple(self._entries)
+        self._matrix = (
+            np.stack([self._entries[i]["vec"] for i in self._matrix_ids])
+            if self._matrix_ids else None
+        )
+
+    def lookup(self, question_vec, route: str, chunk_ids: Sequence[str]) -> Optional[Dict[str, Any]]:
+        q = self._unit(question_vec)
+        key_ids = tuple(chunk_ids)
+        now = time.time()
+        with self._lock:
+            self._rebuild_matrix()
+            if self._matrix is None:
+                self.misses += 1
+                return None
+
+            # tüm önceki sorularla tek matris çarpımında cosine benzerliği
+            sims = self._matrix @ q
+            order = np.argsort(-sims)
+            for pos in order:
+                if sims[pos] < self.threshold:
+                    break
+                entry_id = self._matrix_ids[pos]
+                entry = self._entries.get(entry_id)
+                if entry is None:
+                    continue
+                if self._expired(entry, now):
+                    self._entries.pop(entry_id)
+                    self._matrix = None
+                    continue
+                if entry["route"] == route and entry["chunk_ids"] == key_ids:
+                    self._entries.move_to_end(entry_id)
+                    self.hits += 1
+                    return {**entry["payload"], "similarity": float(sims[pos])}
+
+            self.misses += 1
+            return None
+
+    def store(self, question_vec, route: str, chunk_ids: Sequence[str], payload: Dict[str, Any]) -> None:
+        with self._lock:
+            self._entries[self._next_id] = {
+                "vec": self._unit(question_vec),
+                "route": route,
+                "chunk_ids": tuple(chunk_ids),
+                "payload": dict(payload),
+                "stored_at": time.time(),
+            }
+            self._next_id += 1
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+            self._matrix = None
+
+    def note_bypass(self) -> None:
+        with self._lock:
+            self.bypassed += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "name": "semantic_answer",
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 4) if total else 0.0,
+                "bypassed": self.bypassed,
+                "evictions": self.evictions,
+            }
@@ -1,12 +1,355 @@
-import google.generativeai as genai
+# src/llm/gemini_client.py
+"""
+Tüm Gemini çağrıları için tek LLM geçidi (gateway).
+
+- Provider (GeminiProvider / FakeProvider) model nesnelerini bir kez kurar
+  ve yeniden kullanır; çağrı yerleri artık her seferinde GenerativeModel
+  oluşturmaz.
+- Global eşzamanlılık sınırı (LLM_MAX_CONCURRENCY) ve opsiyonel hız
+  sınırı (LLM_RATE_LIMIT, istek/sn) sync ve async çağrılar için ortaktır.
+- Her çağrıya LLM_TIMEOUT uygulanır; geçici hatalar (429/503/timeout)
+  jitter'lı üstel backoff ile LLM_MAX_RETRIES kez yeniden denenir.
+  Streaming'de yeniden deneme sadece ilk parça gelmeden önce yapılır.
+- Süreler `stage` adıyla rag_stage_seconds'a yazılır (src/utils/metrics.py);
+  streaming'de ayrıca ilk parçaya kadar geçen süre (<stage>_ttft).
+- LLM_PROVIDER=fake ile ağsız sahte provider kullanılır (test / benchmark).
+"""
+from __future__ import annotations
+
+import asyncio
+import random
+import threading
+import time
+from collections import deque
+from typing import AsyncIterator, Deque, Dict, Optional, Tuple, Type
+
 from src.config import Config
+from src.utils.logger import log_warning
+from src.utils.metrics import observe_stage, stage as metrics_stage
+
+
+def _retryable_errors() -> Tuple[Type[BaseException], ...]:
+    errors: Tuple[Type[BaseException], ...] = (TimeoutError, ConnectionError, asyncio.TimeoutError)
+    try:
+        from google.api_core import exceptions as gexc
+
+        errors += (
+            gexc.ResourceExhausted,
+            gexc.ServiceUnavailable,
+            gexc.DeadlineExceeded,
+            gexc.InternalServerError,
+        )
+    except ImportError:
+        pass
+    return errors
+
+
+RETRYABLE_ERRORS = _retryable_errors()
+
+
+# =====================================================
+# Provider'lar
+# =====================================================
+class GeminiProvider:
+    """google.generativeai üzerinde; model adı başına tek GenerativeModel."""
+
+    def __init__(self, api_key: str = ""):
+        import google.generativeai as genai
+
+        self._genai = genai
+        if api_key:
+            genai.configure(api_key=api_key)
+        else:
+            log_warning("[LLM] GOOGLE_API_KEY bulunamadı → LLM çağrıları hata verebilir.")
+        self._models: Dict[str, object] = {}
+        self._lock = threading.Lock()
+
+    def _model(self, name: str):
+        model = self._models.get(name)
+        if model is None:
+            with self._lock:
+                model = self._models.get(name)
+                if model is None:
+                    model = self._models[name] = self._genai.GenerativeModel(name)
+        return model
+
+    def generate(self, prompt: str, model: str, timeout: float) -> str:
+        resp = self._model(model).generate_content(prompt, request_options={"timeout": timeout})
+        return resp.text or ""
+
+    async def astream(self, prompt: str, model: str, timeout: float) -> AsyncIterator[str]:
+        response = await self._model(model).generate_content_async(
+            prompt, stream=True, request_options={"timeout": timeout}
+        )
+        async for chunk in response:
+            text = getattr(chunk, "text", "") or ""
+            if text:
+                yield text
+
+
+class FakeProvider:
+    """
+    Ağ gerektirmeyen sahte provider.
+    Yanıt: `reply` verilmişse o, yoksa prompt'un son satırının yankısı.
+    Streaming'de kelime kelime, parçalar arasında `delay` saniye beklenir.
+    """
+
+    def __init__(self, reply: Optional[str] = None, delay: float = 0.0):
+        self.reply = reply
+        self.delay = delay
+
+    def _text(self, prompt: str) -> str:
+        if self.reply is not None:
+            return self.reply
+        lines = [ln for ln in (prompt or "").strip().splitlines() if ln.strip()]
+        return f"[fake] {lines[-1] if lines else ''}"
+
+    def generate(self, prompt: str, model: str, timeout: float) -> str:
+        if self.delay:
+            time.sleep(self.delay)
+        return self._text(prompt)
+
+    async def astream(self, prompt: str, model: str, timeout: float) -> AsyncIterator[str]:
+        for word in self._text(prompt).split():
+            if self.delay:
+                await asyncio.sleep(self.delay)
+            yield word + " "
+
+
+# =====================================================
+# Sınırlayıcılar
+# =====================================================
+class _Waiter:
+    """Kuyruktaki bir bekleyen: thread (Event) ya da coroutine (loop + future)."""
 
-genai.configure(api_key=Config.GOOGLE_API_KEY)
+    __slots__ = ("event", "loop", "future", "granted")
 
+    def __init__(self, loop: Optional[asyncio.AbstractEventLoop] = None):
+        self.loop = loop
+        self.future = loop.create_future() if loop is not None else None
+        self.event = threading.Event() if loop is None else None
+        self.granted = False
+
+    def wake(self) -> bool:
+        """Lock altında: slotu bu bekleyene devreder; uyandırılamadıysa False."""
+        if self.loop is None:
+            self.granted = True
+            self.event.set()
+            return True
+        try:
+            self.loop.call_soon_threadsafe(_resolve, self.future)
+        except RuntimeError:  # loop kapanmış
+            return False
+        self.granted = True
+        return True
+
+
+def _resolve(future: "asyncio.Future") -> None:
+    if not future.done():
+        future.set_result(None)
+
+
+class _ConcurrencyLimiter:
+    """
+    Sync (thread) ve async çağrılar için ortak sayaçlı sınır.
+    Bekleyenler tek bir FIFO kuyrukta tutulur; release() slotu doğrudan
+    sıradaki bekleyene devreder (thread → Event, coroutine → future,
+    loop.call_soon_threadsafe ile). Async bekleme event loop'u tıkamaz
+    ve yoklama (polling) yapmaz.
+    """
+
+    def __init__(self, limit: int):
+        self.limit = max(1, int(limit))
+        self.in_flight = 0
+        self._lock = threading.Lock()
+        self._waiters: Deque[_Waiter] = deque()
+
+    def _try_acquire(self) -> bool:
+        """Lock altında: boş slot var ve sırada bekleyen yoksa alır."""
+        if self.in_flight < self.limit and not self._waiters:
+            self.in_flight += 1
+            return True
+        return False
+
+    def acquire(self) -> None:
+        with self._lock:
+            if self._try_acquire():
+                return
+            waiter = _Waiter()
+            self._waiters.append(waiter)
+        waiter.event.wait()
+
+    async def aacquire(self) -> None:
+        with self._lock:
+            if self._try_acquire():
+                return
+            waiter = _Waiter(asyncio.get_running_loop())
+            self._waiters.append(waiter)
+        try:
+            await waiter.future
+        except BaseException:
+            # iptal: slot devredildiyse geri ver, değilse kuyruktan çık
+            with self._lock:
+                if not waiter.granted:
+                    self._waiters.remove(waiter)
+                    raise
+            self.release()
+            raise
+
+    def release(self) -> None:
+        with self._lock:
+            while self._waiters:
+                if self._waiters.popleft().wake():
+                    return  # slot devredildi, in_flight değişmez
+            self.in_flight -= 1
+
+
+class _RateLimiter:
+    """Token bucket; rate <= 0 ise sınırsız. reserve() beklenecek süreyi döndürür."""
+
+    def __init__(self, rate: float, burst: Optional[float] = None):
+        self.rate = rate
+        self.capacity = burst or max(1.0, rate)
+        self._tokens = self.capacity
+        self._stamp = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        if self.rate <= 0:
+            return 0.0
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._stamp) * self.rate)
+            self._stamp = now
+            self._tokens -= 1.0
+            return 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+
+
+# =====================================================
+# Gateway
+# =====================================================
 class GeminiClient:
-    def __init__(self, model=Config.MODEL_NAME):
-        self.model = genai.GenerativeModel(model)
+    def __init__(
+        self,
+        provider=None,
+        model: str = Config.MODEL_NAME,
+        timeout: float = 60.0,
+        max_concurrency: int = 16,
+        rate_limit: float = 0.0,
+        max_retries: int = 2,
+        backoff_base: float = 0.5,
+        backoff_max: float = 8.0,
+    ):
+        self.provider = provider if provider is not None else GeminiProvider(Config.GOOGLE_API_KEY)
+        self.model_name = model
+        self.timeout = timeout
+        self.max_retries = max(0, int(max_retries))
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._limiter = _ConcurrencyLimiter(max_concurrency)
+        self._rate = _RateLimiter(rate_limit)
+
+        self._stats_lock = threading.Lock()
+        self.calls = 0
+        self.retries = 0
+        self.failures = 0
+        self.throttled_seconds = 0.0
+
+    def _backoff(self, attempt: int) -> float:
+        # full jitter: [0, min(max, base * 2^attempt)]
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    def _count(self, **deltas) -> None:
+        with self._stats_lock:
+            for name, delta in deltas.items():
+                setattr(self, name, getattr(self, name) + delta)
+
+    def generate(
+        self, prompt: str, model: Optional[str] = None, timeout: Optional[float] = None, stage: str = "llm_generate"
+    ) -> str:
+        with metrics_stage(stage):
+            return self._generate(prompt, model or self.model_name, timeout or self.timeout)
+
+    def _generate(self, prompt: str, model: str, timeout: float) -> str:
+        self._count(calls=1)
+        attempt = 0
+        while True:
+            wait = self._rate.reserve()
+            if wait:
+                self._count(throttled_seconds=wait)
+                time.sleep(wait)
+            self._limiter.acquire()
+            try:
+                return self.provider.generate(prompt, model, timeout)
+            except RETRYABLE_ERRORS as e:
+                if attempt >= self.max_retries:
+                    self._count(failures=1)
+                    raise
+                log_warning(f"[LLM] Geçici hata, yeniden denenecek ({attempt + 1}/{self.max_retries}): {e}")
+            except Exception:
+                self._count(failures=1)
+                raise
+            finally:
+                self._limiter.release()
+            self._count(retries=1)
+            time.sleep(self._backoff(attempt))
+            attempt += 1
+
+    async def astream(
+        self, prompt: str, model: Optional[str] = None, timeout: Optional[float] = None, stage: str = "llm_stream"
+    ) -> AsyncIterator[str]:
+        """Parça parça metin; slot stream bitene kadar tutulur."""
+        t0 = time.perf_counter()
+        first = True
+        inner = self._astream(prompt, model or self.model_name, timeout or self.timeout)
+        try:
+            async for text in inner:
+                if first:
+                    observe_stage(f"{stage}_ttft", time.perf_counter() - t0)
+                    first = False
+                yield text
+        finally:
+            await inner.aclose()  # istemci koptuysa slot hemen bırakılsın
+            observe_stage(stage, time.perf_counter() - t0)
+
+    async def _astream(self, prompt: str, model: str, timeout: float) -> AsyncIterator[str]:
+        self._count(calls=1)
+        attempt = 0
+        while True:
+            wait = self._rate.reserve()
+            if wait:
+                self._count(throttled_seconds=wait)
+                await asyncio.sleep(wait)
+            await self._limiter.aacquire()
+            started = False
+            try:
+                async for text in self.provider.astream(prompt, model, timeout):
+                    started = True
+                    yield text
+                return
+            except RETRYABLE_ERRORS as e:
+                if started or attempt >= self.max_retries:
+                    self._count(failures=1)
+                    raise
+                log_warning(f"[LLM] Stream açılamadı, yeniden denenecek ({attempt + 1}/{self.max_retries}): {e}")
+            except Exception:
+                self._count(failures=1)
+                raise
+            finally:
+                self._limiter.release()
+            self._count(retries=1)
+            await asyncio.sleep(self._backoff(attempt))
+            attempt += 1
 
-    def generate(self, prompt: str) -> str:
-        response = self.model.generate_content(prompt)
-        return response.text.strip()
+    def stats(self) -> Dict[str, object]:
+        with self._stats_lock:
+            return {
+                "provider": type(self.provider).__name__,
+                "model": self.model_name,
+                "in_flight": self._limiter.in_flight,
+                "max_concurrency": self._limiter.limit,
+                "calls": self.calls,
+                "retries": self.retries,
+                "failures": self.failures,
+                "throttled_seconds": round(self.throttled_seconds, 3),
+            }
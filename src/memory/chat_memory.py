@@ -1,15 +1,34 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
 from langchain.memory import ConversationSummaryBufferMemory
-from langchain.schema import HumanMessage, AIMessage
-from typing import List, Dict, Any
+from langchain.schema import HumanMessage, AIMessage, get_buffer_string
+from typing import Callable, List, Dict, Any, Optional
 
+from src.config import Config
 from src.memory.llm_provider import build_llm_for_memory
+from src.memory.token_counter import estimate_message_tokens
+from src.utils.logger import log_warning
+from src.utils.metrics import timed
+
+
+# Özetleme LLM çağrıları istek yolunda değil, bu havuzda yürür
+_SUMMARY_POOL = ThreadPoolExecutor(
+    max_workers=Config.MEMORY_SUMMARY_WORKERS,
+    thread_name_prefix="memory-summary",
+)
 
 
 class ChatMemoryManager:
     """
     Session bazlı konuşma hafızası.
-    - ConversationSummaryBufferMemory: uzun geçmişi özetler, son mesajları ham saklar.
-    - build_context(): LLM'e promotta enjekte edeceğimiz "geçmiş konuşma özeti"ni döndürür.
+    - chat_memory yalnızca henüz özete katlanmamış mesajları tutar.
+    - Ham kısım token limitini aşınca taşan eski mesajlar arka planda özete katlanır
+      ve bellekten silinir; bekleyen birden çok tur tek bir LLM çağrısında birleştirilir.
+    - Token bütçesi yerel tahminle ölçülür: her mesajın sayısı eklenirken bir kez
+      hesaplanır, ham kısmın toplamı artımlı tutulur (sağlayıcıya gidilmez).
+    - build_context(): son tamamlanmış özet + henüz katlanmamış ham turları hemen
+      döndürür (LLM beklemez); metin hafıza değişene kadar cache'lenir.
     """
 
     def __init__(self, max_token_limit: int = 1000):
@@ -19,32 +38,214 @@ class ChatMemoryManager:
             max_token_limit=max_token_limit,
             return_messages=True,  # history'yi structured şekilde döndürsün
         )
+        self.max_token_limit = max_token_limit
+
+        self._lock = threading.Lock()
+        self._token_counts: List[int] = []  # mesajlarla paralel, tahmini token sayıları
+        self._raw_tokens = 0             # katlanmamış mesajların token toplamı
+        self._version = 0                # her add_turn / özet güncellemesinde artar
+        self._context: Optional[str] = None
+        self._context_version = -1
+        self._scheduled = False          # arka plan özetleme işi kuyrukta/çalışıyor mu
+        self._dirty = False              # iş çalışırken yeni tur geldi mi
+        # store'dan atıldıktan sonra gelen yazımlar için (ör. diske yeniden yazma)
+        self.on_change: Optional[Callable[["ChatMemoryManager"], None]] = None
 
+        # paylaşılan backend (çok worker'lı mod); None → yalnızca süreç belleği
+        self.backend = None
+        self.session_id: Optional[str] = None
+        self.seq_offset = 0                      # ilk yerel mesajdan önce backend'de katlanmış mesaj sayısı
+        self.synced_rev: Optional[int] = None    # backend'in bilinen son revizyonu; None → eskimiş
+
+    @timed("memory_add_turn")
     def add_turn(self, user_msg: str, ai_msg: str) -> None:
         """
         Bir soru-cevap turu tamamlandıktan sonra hafızaya yaz.
+        Özetleme gerekiyorsa arka plana bırakılır; bu çağrı LLM beklemez.
         """
-        self.memory.chat_memory.add_user_message(user_msg)
-        self.memory.chat_memory.add_ai_message(ai_msg)
+        user_tokens = estimate_message_tokens(user_msg)
+        ai_tokens = estimate_message_tokens(ai_msg)
+        rev = self.backend.append_turn(self.session_id, user_msg, ai_msg) if self.backend else None
+        with self._lock:
+            self._append("user", user_msg, user_tokens)
+            self._append("assistant", ai_msg, ai_tokens)
+            self._version += 1
+            if self.backend is not None:
+                self._advance_rev(rev)
+            schedule = False
+            if self._scheduled:
+                self._dirty = True
+            elif self._raw_tokens > self.max_token_limit:
+                schedule = self._scheduled = True
+        if schedule:
+            _SUMMARY_POOL.submit(self._summarize_loop)
+        self._notify_change()
+
+    def _append(self, role: str, content: str, tokens: Optional[int] = None) -> None:
+        """Lock altında (ya da henüz paylaşılmamış nesnede): mesaj + token sayısı."""
+        if role == "user":
+            self.memory.chat_memory.add_user_message(content)
+        else:
+            self.memory.chat_memory.add_ai_message(content)
+        if tokens is None:
+            tokens = estimate_message_tokens(content)
+        self._token_counts.append(tokens)
+        self._raw_tokens += tokens
+
+    def _advance_rev(self, rev: Optional[int]) -> None:
+        """Lock altında: yazım tam olarak bir revizyon ilerlettiyse ayna güncel kalır."""
+        if rev is not None and self.synced_rev is not None and rev == self.synced_rev + 1:
+            self.synced_rev = rev
+        else:
+            self.synced_rev = None  # araya başka bir worker girdi → store yeniden yükler
+
+    def _notify_change(self) -> None:
+        if self.on_change is not None:
+            self.on_change(self)
 
+    # -------------------------------------------------
+    # Arka plan özetleme
+    # -------------------------------------------------
+    def _overflow(self) -> int:
+        """Lock altında: ham mesajlardan özete katlanması gereken baştaki mesaj sayısı."""
+        total = self._raw_tokens
+        n = 0
+        while total > self.max_token_limit and n < len(self._token_counts):
+            total -= self._token_counts[n]
+            n += 1
+        return n
+
+    def _summarize_once(self) -> None:
+        with self._lock:
+            if self.backend is not None and self.synced_rev is None:
+                # ayna eskimiş: yerel sıra backend'in seq sırası değil; store yeniden yükleyince katlanır
+                return
+            n = self._overflow()
+            if n == 0:
+                return
+            raw = list(self.memory.chat_memory.messages[:n])
+            summary = self.memory.moving_summary_buffer
+            expected_rev = self.synced_rev
+
+        new_summary = self.memory.predict_new_summary(raw, summary)
+        rev = None
+        if self.backend is not None:
+            rev = self.backend.save_summary(
+                self.session_id, new_summary, self.seq_offset + n, expected_rev
+            )
+            if rev is None:
+                # araya başka bir yazım girdi → katlama reddedildi; yerel durum değişmez
+                with self._lock:
+                    self.synced_rev = None
+                return
+
+        with self._lock:
+            # mesajlar yalnızca sona eklenir → baştaki n mesaj hâlâ aynı mesajlar;
+            # katlananlar silinir (ConversationSummaryBufferMemory.prune gibi), bellek sınırlı kalır
+            self.memory.moving_summary_buffer = new_summary
+            self._raw_tokens -= sum(self._token_counts[:n])
+            del self.memory.chat_memory.messages[:n]
+            del self._token_counts[:n]
+            self.seq_offset += n   # backend sırası: save_summary'nin folded_seq'i ile aynı
+            self._version += 1
+            if self.backend is not None:
+                self._advance_rev(rev)
+        self._notify_change()
+
+    def _summarize_loop(self) -> None:
+        while True:
+            try:
+                self._summarize_once()
+            except Exception as e:
+                # mesajlar ham kalır; bir sonraki turda yeniden denenir
+                log_warning(f"[Memory] Arka plan özetleme başarısız: {e}")
+            with self._lock:
+                if not self._dirty:
+                    self._scheduled = False
+                    return
+                self._dirty = False
+
+    # -------------------------------------------------
+    # Okuma
+    # -------------------------------------------------
+    @timed("memory_context")
     def build_context(self) -> str:
         """
         LLM'e aktarılacak geçmiş bağlamı string olarak üret.
         Bu metin geçmiş diyalogların özetini ve yakın tur mesajlarını içerir.
         """
-        vars = self.memory.load_memory_variables({})
-        # load_memory_variables() tipik olarak {"history": "..."} döndürür.
-        return vars.get("history", "")
+        with self._lock:
+            if self._context is not None and self._context_version == self._version:
+                return self._context
+            summary = self.memory.moving_summary_buffer
+            raw = list(self.memory.chat_memory.messages)
+            version = self._version
 
-    def export_messages(self) -> List[Dict[str, Any]]:
-        """
-        UI tarafında oturum penceresini göstermek istersek kullanırız.
-        (Debug / izleme için.)
-        """
+        parts = []
+        if summary:
+            parts.append(f"Özet: {summary}")
+        if raw:
+            parts.append(get_buffer_string(raw, human_prefix="Kullanıcı", ai_prefix="Asistan"))
+        context = "\n".join(parts)
+
+        with self._lock:
+            if version == self._version:
+                self._context = context
+                self._context_version = version
+        return context
+
+    # -------------------------------------------------
+    # Serileştirme (session store spill / rehydrate)
+    # -------------------------------------------------
+    def to_state(self) -> Dict[str, Any]:
+        """Özet + henüz katlanmamış mesajlar; katlanmış eski mesajlar diske yazılmaz."""
+        with self._lock:
+            summary = self.memory.moving_summary_buffer
+            raw = list(self.memory.chat_memory.messages)
+        return {"summary": summary, "messages": self._as_dicts(raw)}
+
+    @classmethod
+    def from_state(cls, state: Dict[str, Any], max_token_limit: int = 1000) -> "ChatMemoryManager":
+        mgr = cls(max_token_limit=max_token_limit)
+        mgr.memory.moving_summary_buffer = state.get("summary") or ""
+        for m in state.get("messages") or []:
+            mgr._append(m["role"], m["content"])
+        return mgr
+
+    @classmethod
+    def from_backend(
+        cls, backend, session_id: str, state: Optional[Dict[str, Any]], max_token_limit: int = 1000
+    ) -> "ChatMemoryManager":
+        """Paylaşılan backend'deki durumun aynası; yazımlar backend'e de gider."""
+        mgr = cls.from_state(state or {}, max_token_limit=max_token_limit)
+        mgr.backend = backend
+        mgr.session_id = session_id
+        mgr.seq_offset = (state or {}).get("folded_seq", 0)
+        mgr.synced_rev = (state or {}).get("rev", 0)
+        return mgr
+
+    def approx_bytes(self) -> int:
+        """Özet + mesaj metinlerinin yaklaşık boyutu (metrikler için)."""
+        with self._lock:
+            size = len(self.memory.moving_summary_buffer or "")
+            size += sum(len(m.content) for m in self.memory.chat_memory.messages)
+        return size
+
+    @staticmethod
+    def _as_dicts(messages: List) -> List[Dict[str, Any]]:
         msgs = []
-        for m in self.memory.chat_memory.messages:
+        for m in messages:
             if isinstance(m, HumanMessage):
                 msgs.append({"role": "user", "content": m.content})
             elif isinstance(m, AIMessage):
                 msgs.append({"role": "assistant", "content": m.content})
         return msgs
+
+    def export_messages(self) -> List[Dict[str, Any]]:
+        """
+        UI tarafında oturum penceresini göstermek istersek kullanırız.
+        (Debug / izleme için.)
+        """
+        with self._lock:
+            messages = list(self.memory.chat_memory.messages)
+        return self._as_dicts(messages)
@@ -1,13 +1,31 @@
-from langchain_google_genai import ChatGoogleGenerativeAI
-from src.config import Config
+from typing import Any, List, Optional
+
+from langchain_core.language_models.llms import LLM
+
+from src.registry import get_llm
+
+
+class GatewayLLM(LLM):
+    """
+    LangChain LLM arayüzü ile paylaşılan LLM gateway'i (src/llm/gemini_client.py).
+    Özetleme çağrıları da aynı timeout / eşzamanlılık sınırı / retry politikasına tabidir.
+    """
+
+    @property
+    def _llm_type(self) -> str:
+        return "gemini-gateway"
+
+    def _call(self, prompt: str, stop: Optional[List[str]] = None, run_manager: Any = None, **kwargs: Any) -> str:
+        return get_llm().generate(prompt, stage="llm_summarize")
+
+
+_LLM = GatewayLLM()
+
 
 def build_llm_for_memory():
     """
     Memory özetleme ve sohbet bağlamı için kullanılacak LLM.
-    Bu nesne LangChain'in beklediği ChatModel arayüzünü sağlıyor.
+    Bu nesne LangChain'in beklediği LLM arayüzünü sağlıyor.
+    Tüm session'lar aynı nesneyi (ve altındaki gateway'i) paylaşır.
     """
-    return ChatGoogleGenerativeAI(
-        model=Config.MODEL_NAME,           # ör: "gemini-pro"
-        google_api_key=Config.GOOGLE_API_KEY,
-        temperature=0.3,
-    )
+    return _LLM
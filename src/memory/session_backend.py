@@ -0,0 +1,200 @@
+# src/memory/session_backend.py
+"""
+Süreçler arası paylaşılan session backend'i.
+
+Birden fazla uvicorn worker'ı aynı session'ın turlarını farklı süreçlerde
+işleyebilir. Konuşma durumu (özet + henüz özete katlanmamış mesajlar) bu
+yüzden süreç belleğinde değil, paylaşılan bir depoda tutulur; her süreç
+sadece bir ayna (ChatMemoryManager) tutar ve `rev` değiştiğinde yeniler.
+
+- append_turn : tur atomik olarak eklenir (eşzamanlı worker'lar birbirini ezmez)
+- save_summary: compare-and-set; yalnızca aynanın bildiği revizyon hâlâ
+                güncelse ve daha ileri bir noktaya kadar katlanmışsa
+                kabul edilir, katlanan mesajlar silinir
+- rev         : her ekleme / özet güncellemesinde artan sayaç
+"""
+from __future__ import annotations
+
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Optional
+
+
+class SessionBackend:
+    """Paylaşılan session deposu arayüzü."""
+
+    def load(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """{"summary", "folded_seq", "rev", "messages": [{"role", "content"}]} ya da None."""
+        raise NotImplementedError
+
+    def rev(self, session_id: str) -> int:
+        """Session'ın güncel revizyonu (yoksa 0)."""
+        raise NotImplementedError
+
+    def append_turn(self, session_id: str, user_msg: str, ai_msg: str) -> int:
+        """Turu ekler; yeni revizyonu döndürür."""
+        raise NotImplementedError
+
+    def save_summary(self, session_id: str, summary: str, folded_seq: int, expected_rev: int) -> Optional[int]:
+        """
+        Revizyon hâlâ expected_rev ise (araya başka yazım girmediyse) ve folded_seq
+        mevcut değerden büyükse özeti yazar, yeni revizyonu döndürür; değilse None.
+        """
+        raise NotImplementedError
+
+    def stats(self) -> Dict[str, Any]:
+        return {}
+
+
+class SQLiteSessionBackend(SessionBackend):
+    """
+    Tek host üzerindeki süreçler için WAL modunda SQLite.
+    Yazımlar BEGIN IMMEDIATE ile serileşir; okuyucular yazarları beklemez.
+    """
+
+    def __init__(self, path: str, busy_timeout: float = 5.0, ttl_seconds: Optional[float] = None):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        # bağlantı thread başına; sqlite3 bağlantıları thread'ler arasında paylaşılmamalı
+        self._busy_timeout = busy_timeout
+        self._local = threading.local()
+
+        conn = self._conn()
+        conn.execute("PRAGMA journal_mode=WAL")
+        with conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS session_meta ("
+                " session_id TEXT PRIMARY KEY,"
+                " summary TEXT NOT NULL DEFAULT '',"
+                " folded_seq INTEGER NOT NULL DEFAULT 0,"
+                " last_seq INTEGER NOT NULL DEFAULT 0,"
+                " rev INTEGER NOT NULL DEFAULT 0,"
+                " updated_at REAL NOT NULL)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS session_messages ("
+                " session_id TEXT NOT NULL,"
+                " seq INTEGER NOT NULL,"
+                " role TEXT NOT NULL,"
+                " content TEXT NOT NULL,"
+                " PRIMARY KEY (session_id, seq))"
+            )
+        self.purge_expired()
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=self._busy_timeout, isolation_level=None)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def load(self, session_id: str) -> Optional[Dict[str, Any]]:
+        conn = self._conn()
+        conn.execute("BEGIN")  # meta ve mesajlar aynı snapshot'tan okunsun
+        try:
+            meta = conn.execute(
+                "SELECT summary, folded_seq, rev FROM session_meta WHERE session_id = ?", (session_id,)
+            ).fetchone()
+            if meta is None:
+                return None
+            rows = conn.execute(
+                "SELECT role, content FROM session_messages"
+                " WHERE session_id = ? AND seq > ? ORDER BY seq",
+                (session_id, meta[1]),
+            ).fetchall()
+        finally:
+            conn.execute("COMMIT")
+        return {
+            "summary": meta[0],
+            "folded_seq": meta[1],
+            "rev": meta[2],
+            "messages": [{"role": r, "content": c} for r, c in rows],
+        }
+
+    def rev(self, session_id: str) -> int:
+        row = self._conn().execute(
+            "SELECT rev FROM session_meta WHERE session_id = ?", (session_id,)
+        ).fetchone()
+        return row[0] if row else 0
+
+    def append_turn(self, session_id: str, user_msg: str, ai_msg: str) -> int:
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(
+                "INSERT OR IGNORE INTO session_meta (session_id, updated_at) VALUES (?, ?)",
+                (session_id, time.time()),
+            )
+            last_seq, rev = conn.execute(
+                "SELECT last_seq, rev FROM session_meta WHERE session_id = ?", (session_id,)
+            ).fetchone()
+            conn.executemany(
+                "INSERT INTO session_messages (session_id, seq, role, content) VALUES (?, ?, ?, ?)",
+                [
+                    (session_id, last_seq + 1, "user", user_msg),
+                    (session_id, last_seq + 2, "assistant", ai_msg),
+                ],
+            )
+            conn.execute(
+                "UPDATE session_meta SET last_seq = ?, rev = ?, updated_at = ? WHERE session_id = ?",
+                (last_seq + 2, rev + 1, time.time(), session_id),
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return rev + 1
+
+    def save_summary(self, session_id: str, summary: str, folded_seq: int, expected_rev: int) -> Optional[int]:
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            cur = conn.execute(
+                "UPDATE session_meta SET summary = ?, folded_seq = ?, rev = rev + 1, updated_at = ?"
+                " WHERE session_id = ? AND rev = ? AND folded_seq < ? AND last_seq >= ?",
+                (summary, folded_seq, time.time(), session_id, expected_rev, folded_seq, folded_seq),
+            )
+            if cur.rowcount == 0:
+                conn.execute("ROLLBACK")
+                return None
+            conn.execute(
+                "DELETE FROM session_messages WHERE session_id = ? AND seq <= ?",
+                (session_id, folded_seq),
+            )
+            rev = conn.execute(
+                "SELECT rev FROM session_meta WHERE session_id = ?", (session_id,)
+            ).fetchone()[0]
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return rev
+
+    def purge_expired(self) -> int:
+        if self.ttl_seconds is None:
+            return 0
+        cutoff = time.time() - self.ttl_seconds
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(
+                "DELETE FROM session_messages WHERE session_id IN"
+                " (SELECT session_id FROM session_meta WHERE updated_at < ?)",
+                (cutoff,),
+            )
+            cur = conn.execute("DELETE FROM session_meta WHERE updated_at < ?", (cutoff,))
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return cur.rowcount
+
+    def stats(self) -> Dict[str, Any]:
+        conn = self._conn()
+        sessions = conn.execute("SELECT COUNT(*) FROM session_meta").fetchone()[0]
+        messages = conn.execute("SELECT COUNT(*) FROM session_messages").fetchone()[0]
+        return {"backend": "sqlite", "path": self.path, "sessions": sessions, "messages": messages}
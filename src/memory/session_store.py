@@ -1,17 +1,226 @@
-from typing import Dict
+"""
+Session bazlı ChatMemoryManager deposu.
+
+Bellekte en fazla SESSION_MAX_LIVE session tutulur (LRU); SESSION_IDLE_TTL
+boyunca erişilmeyen session'lar da atılır. Atılan session'ın özeti ve son
+mesajları SQLite'a yazılır, sonraki get_memory çağrısında sessizce geri
+yüklenir.
+
+SESSION_BACKEND=sqlite ile durum süreçler arası paylaşılan bir SQLite (WAL)
+dosyasında tutulur; bellekteki nesneler yalnızca aynadır ve backend
+revizyonu değişince yeniden yüklenir. Böylece API birden çok uvicorn
+worker'ı ile çalışabilir.
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from src.config import Config
 from src.memory.chat_memory import ChatMemoryManager
+from src.memory.session_backend import SessionBackend, SQLiteSessionBackend
+from src.memory.session_spill import SQLiteSessionSpill
+from src.utils.logger import log_warning
+
+
+class SessionStore:
+    def __init__(
+        self,
+        max_live: int = 1000,
+        idle_ttl: Optional[float] = None,
+        spill: Optional[SQLiteSessionSpill] = None,
+        max_token_limit: int = 1000,
+        backend: Optional[SessionBackend] = None,
+    ):
+        self.max_live = max(1, int(max_live))
+        self.idle_ttl = idle_ttl
+        self.spill = spill
+        # paylaşılan backend varsa durum zaten orada; bellekteki kopya sadece aynadır
+        self.backend = backend
+        self.max_token_limit = max_token_limit
+
+        # session_id → (memory, last_access); en eski erişilen başta
+        self._live: "OrderedDict[str, Tuple[ChatMemoryManager, float]]" = OrderedDict()
+        # diske yazılmakta olanlar; bu arada gelen get_memory aynı nesneyi geri alır
+        self._spilling: Dict[str, ChatMemoryManager] = {}
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.reloads = 0
+        self.created = 0
+        self.rehydrated = 0
+        self.evictions = {"lru": 0, "ttl": 0}
+        self.spilled = 0
+        self.spilled_bytes = 0
+        self.spill_errors = 0
+
+    def get(self, session_id: str) -> ChatMemoryManager:
+        now = time.monotonic()
+        with self._lock:
+            item = self._live.get(session_id)
+            mem = item[0] if item is not None else None
+
+        if mem is not None and self.backend is not None:
+            # başka bir worker bu session'a yazdıysa ayna eskimiştir
+            if mem.synced_rev is None or mem.synced_rev != self.backend.rev(session_id):
+                mem = None
+                with self._lock:
+                    self.reloads += 1
+
+        if mem is not None:
+            with self._lock:
+                self._live[session_id] = (mem, now)
+                self._live.move_to_end(session_id)
+                self.hits += 1
+                evicted = self._collect_evictions(now)
+            self._spill_all(evicted)
+            return mem
+
+        mem = self._load_shared(session_id) if self.backend is not None else self._rehydrate(session_id)
+        with self._lock:
+            # başka bir thread aynı session'ı bu arada yüklemiş olabilir
+            item = self._live.get(session_id)
+            if item is not None and (self.backend is None or item[0].synced_rev == mem.synced_rev):
+                mem = item[0]
+            else:
+                mem.on_change = None
+                self._live[session_id] = (mem, now)
+            self._live.move_to_end(session_id)
+            evicted = self._collect_evictions(now)
+        self._spill_all(evicted)
+        return mem
+
+    def _load_shared(self, session_id: str) -> ChatMemoryManager:
+        state = self.backend.load(session_id)
+        with self._lock:
+            if state is None:
+                self.created += 1
+            else:
+                self.rehydrated += 1
+        return ChatMemoryManager.from_backend(
+            self.backend, session_id, state, max_token_limit=self.max_token_limit
+        )
 
-# Basit global store. Prod'da Redis gibi bir KV store'a taşınabilir.
-SESSION_MEMORIES: Dict[str, ChatMemoryManager] = {}
+    def _rehydrate(self, session_id: str) -> ChatMemoryManager:
+        with self._lock:
+            pending = self._spilling.pop(session_id, None)
+            if pending is not None:
+                self.rehydrated += 1
+        if pending is not None:
+            return pending
+
+        state = None
+        if self.spill is not None:
+            try:
+                state = self.spill.load(session_id)
+            except Exception as e:
+                log_warning(f"[SessionStore] Session diskten okunamadı ({session_id}): {e}")
+        if state is None:
+            with self._lock:
+                self.created += 1
+            return ChatMemoryManager(max_token_limit=self.max_token_limit)
+
+        mem = ChatMemoryManager.from_state(state, max_token_limit=self.max_token_limit)
+        self.spill.delete(session_id)
+        with self._lock:
+            self.rehydrated += 1
+        return mem
+
+    def _collect_evictions(self, now: float) -> List[Tuple[str, ChatMemoryManager]]:
+        """Lock altında çağrılır: TTL'i dolan ve kapasiteyi aşan session'ları çıkarır."""
+        out = []
+        if self.idle_ttl is not None:
+            while self._live:
+                sid, (mem, last) = next(iter(self._live.items()))
+                if now - last <= self.idle_ttl:
+                    break
+                self._live.popitem(last=False)
+                self.evictions["ttl"] += 1
+                out.append((sid, mem))
+        while len(self._live) > self.max_live:
+            sid, (mem, _) = self._live.popitem(last=False)
+            self.evictions["lru"] += 1
+            out.append((sid, mem))
+        for sid, mem in out:
+            self._spilling[sid] = mem
+        return out
+
+    def _spill_all(self, evicted: List[Tuple[str, ChatMemoryManager]]) -> None:
+        for sid, mem in evicted:
+            with self._lock:
+                if self._spilling.get(sid) is not mem:
+                    continue  # yazılmadan önce tekrar get_memory ile geri alındı
+                if self.spill is not None:
+                    # atıldıktan sonra gelen yazımlar (süren bir tur / arka plan özet) da diske gitsin
+                    mem.on_change = lambda m, sid=sid: self._persist(sid, m)
+            if self.spill is not None:
+                self._persist(sid, mem)
+            with self._lock:
+                if self._spilling.get(sid) is mem:
+                    del self._spilling[sid]
+
+    def _persist(self, session_id: str, mem: ChatMemoryManager) -> None:
+        try:
+            size = self.spill.save(session_id, mem.to_state())
+            with self._lock:
+                self.spilled += 1
+                self.spilled_bytes += size
+        except Exception as e:
+            with self._lock:
+                self.spill_errors += 1
+            log_warning(f"[SessionStore] Session diske yazılamadı ({session_id}): {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            live = [mem for mem, _ in self._live.values()]
+            out = {
+                "live_sessions": len(live),
+                "max_live": self.max_live,
+                "idle_ttl": self.idle_ttl,
+                "hits": self.hits,
+                "reloads": self.reloads,
+                "created": self.created,
+                "rehydrated": self.rehydrated,
+                "evictions": dict(self.evictions),
+                "spilled": self.spilled,
+                "spilled_bytes": self.spilled_bytes,
+                "spill_errors": self.spill_errors,
+            }
+        out["live_bytes"] = sum(mem.approx_bytes() for mem in live)
+        if self.spill is not None:
+            out["spilled_sessions"] = self.spill.count()
+        if self.backend is not None:
+            out["backend"] = self.backend.stats()
+        return out
+
+
+def _build_store() -> SessionStore:
+    backend = None
+    spill = None
+    if Config.SESSION_BACKEND == "sqlite":
+        # çok worker'lı mod: durum paylaşılan SQLite'ta, atılan session için spill gerekmez
+        backend = SQLiteSessionBackend(Config.SESSION_SHARED_PATH, ttl_seconds=Config.SESSION_SPILL_TTL)
+    elif Config.SESSION_SPILL_PATH:
+        spill = SQLiteSessionSpill(Config.SESSION_SPILL_PATH, ttl_seconds=Config.SESSION_SPILL_TTL)
+    return SessionStore(
+        max_live=Config.SESSION_MAX_LIVE,
+        idle_ttl=Config.SESSION_IDLE_TTL,
+        spill=spill,
+        max_token_limit=1000,
+        backend=backend,
+    )
+
+
+SESSION_STORE = _build_store()
 
 
 def get_memory(session_id: str) -> ChatMemoryManager:
     """
     Aynı session_id için her çağrıda aynı memory nesnesini döndürür.
-    Yoksa oluşturur.
+    Yoksa diskten geri yükler ya da oluşturur.
     """
-    if session_id not in SESSION_MEMORIES:
-        SESSION_MEMORIES[session_id] = ChatMemoryManager(
-            max_token_limit=1000
-        )
-    return SESSION_MEMORIES[session_id]
+    return SESSION_STORE.get(session_id)
+
+
+def session_stats() -> Dict[str, Any]:
+    return SESSION_STORE.stats()
@@ -0,0 +1,32 @@
+# src/memory/token_counter.py
+"""
+Hafıza bütçesi için yerel token tahmini.
+
+ChatGoogleGenerativeAI.get_num_tokens sağlayıcıya gidebilir; budama
+kararları için kesin sayı gerekmez. Burada SentencePiece benzeri
+tokenizer'ların davranışına yakın, ağ gerektirmeyen bir tahmin yapılır:
+her kelime ~4 karakterlik alt parçalara, her noktalama işareti tek bir
+token'a sayılır. Mesaj başına rol/ayraç maliyeti de eklenir.
+
+Sayım her mesaj için eklendiği anda bir kez yapılır; ChatMemoryManager
+sonucu mesajla birlikte saklar ve ham kısmın toplamını artımlı tutar.
+"""
+from __future__ import annotations
+
+import re
+
+_PIECE_RE = re.compile(r"\w+|[^\w\s]", re.UNICODE)
+
+CHARS_PER_TOKEN = 4
+MESSAGE_OVERHEAD = 4  # rol etiketi + ayraçlar
+
+
+def estimate_tokens(text: str) -> int:
+    total = 0
+    for piece in _PIECE_RE.findall(text or ""):
+        total += -(-len(piece) // CHARS_PER_TOKEN)  # ceil
+    return total
+
+
+def estimate_message_tokens(content: str) -> int:
+    return estimate_tokens(content) + MESSAGE_OVERHEAD
@@ -1,23 +1,41 @@
 from __future__ import annotations
 
+import contextvars
 import os
-from typing import Dict, Any, List, AsyncGenerator, Any as AnyType
-
-import google.generativeai as genai
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import aclosing
+from functools import partial
+from typing import Dict, Any, List, AsyncGenerator, Optional, Any as AnyType
 
 from src.config import Config
-from src.graph.graph_builder import RAGGraph
 from src.graph.nodes import QueryRouterNode
 from src.retriever.web_search import TavilySearch
 from src.utils.logger import (
+    bind_log_context,
+    is_debug_enabled,
+    log_debug,
     log_info,
     log_success,
     log_warning,
     log_error,
+    new_request_id,
 )
+from src.utils.metrics import observe_stage, set_route, stage, track_request
+from src.utils.profiling import profiled
+from src.utils.tracing import set_trace_attrs, span, start_trace, traced
 import asyncio
 from src.utils.state_tracker import StateTracker
 from src.memory.session_store import get_memory  # session-based memory
+from src.llm.answer_cache import history_is_relevant
+from src.registry import (
+    get_answer_cache,
+    get_embedding_model,
+    get_llm,
+    get_rag_graph,
+    get_speculation_stats,
+)
+from src.retriever.tokenizer import token_ids
 
 
 # =====================================================
@@ -33,15 +51,6 @@ else:
     print("[TRACE] LangChain tracing pasif.")
 
 
-# =====================================================
-# Gemini API Configure
-# =====================================================
-if Config.GOOGLE_API_KEY:
-    genai.configure(api_key=Config.GOOGLE_API_KEY)
-else:
-    log_warning("[LLM] GOOGLE_API_KEY bulunamadı → LLM çağrıları hata verebilir.")
-
-
 # =====================================================
 # Heuristik: takip sorusu tespiti
 # =====================================================
@@ -65,13 +74,36 @@ def _looks_like_followup(question: str) -> bool:
     return False
 
 
+# =====================================================
+# Semantik cevap cache'i
+# =====================================================
+@traced()
+def _answer_cache_probe(question: str, route: str, chunk_ids: List[str], history_context: str):
+    """
+    Dönüş: (cache, question_vec, cached_payload)
+    cache None ise cache kapalı ya da bu soru için bypass edildi (geçmişe bağlı soru).
+    """
+    if not Config.ANSWER_CACHE_ENABLED:
+        return None, None, None
+
+    cache = get_answer_cache()
+    if _looks_like_followup(question) or history_is_relevant(
+        question, history_context, Config.ANSWER_CACHE_HISTORY_OVERLAP
+    ):
+        cache.note_bypass()
+        return None, None, None
+
+    # retrieval zaten encode ettiği için bu çağrı query embedding cache'inden gelir
+    q_vec = get_embedding_model().encode_query(question)
+    return cache, q_vec, cache.lookup(q_vec, route, chunk_ids)
+
+
 # =====================================================
 # LLM yardımcıları
 # =====================================================
+@traced()
 def _direct_llm_answer(question: str, history_context: str) -> str:
     log_info("[GENERIC_CHAT] LLM answering with memory...")
-    model = genai.GenerativeModel(Config.MODEL_NAME)
-
     prompt = f"""
 Geçmiş konuşma özeti:
 {history_context}
@@ -82,17 +114,16 @@ Kullanıcının yeni mesajı:
 Bağlamı koruyarak Türkçe ve net cevap ver.
 Cevabı **mutlaka Markdown formatında** üret; sadece markdown içeriği döndür.
 """
-    resp = model.generate_content(prompt)
-    return (resp.text or "").strip()
+    return get_llm().generate(prompt).strip()
 
 
+@traced()
 def _web_search_answer(question: str, history_context: str) -> Dict[str, Any]:
     log_info("[WEB] Tavily searching...")
     tav = TavilySearch()
     snippets = tav.search(question) or []
     top = " ".join(snippets[:3])
 
-    model = genai.GenerativeModel(Config.MODEL_NAME)
     prompt = f"""
 Geçmiş konuşma özeti:
 {history_context}
@@ -107,8 +138,7 @@ Emin olmadığın noktaları varsayma.
 Cevabı **mutlaka Markdown formatında** üret; sadece markdown içeriği döndür.
 """
     try:
-        resp = model.generate_content(prompt)
-        answer = (resp.text or "").strip()
+        answer = get_llm().generate(prompt).strip()
     except Exception as e:
         log_error(f"[WEB] LLM error: {e}")
         answer = "Web sonuçlarını işlerken bir hata oluştu."
@@ -125,24 +155,135 @@ Cevabı **mutlaka Markdown formatında** üret; sadece markdown içeriği dönd
     }
 
 
+# =====================================================
+# Bloklayan işler için paylaşılan havuz
+# (async stream yolu + spekülatif retrieval)
+# =====================================================
+_BLOCKING_POOL = ThreadPoolExecutor(
+    max_workers=Config.BLOCKING_POOL_WORKERS,
+    thread_name_prefix="rag-blocking",
+)
+
+
+@traced()
+def _domain_retrieve(normalized_q: str):
+    """DOMAIN retrieval + grading (CPU/IO ağırlıklı). Dönüş: (graph, graded)."""
+    g = get_rag_graph()
+    log_info("[RAG] Retrieving documents...")
+    with stage("retrieve"):
+        doc_ids, docs = g.retriever.run_with_ids(normalized_q, k=4)
+    log_info("[RAG] Grading retrieved docs...")
+    with stage("grade"):
+        graded = g.retriever_grader.run(
+            normalized_q, docs, min_thresh=0.05, doc_ids=doc_ids, query_ids=token_ids(normalized_q)
+        )
+    return g, graded
+
+
+# =====================================================
+# Router + spekülatif retrieval
+# =====================================================
+def _should_speculate(router: QueryRouterNode) -> bool:
+    return Config.SPECULATIVE_RETRIEVAL and router.uses_llm
+
+
+def _route(router: QueryRouterNode, user_query: str, memory):
+    """
+    Dönüş: (route_info, history_context, speculative_future | None)
+
+    Heuristik, route cache ve embedding sınıflandırıcı karar veremezse LLM router çağrısı sürerken DOMAIN retrieval'ı
+    (ve SPECULATIVE_CONTEXT açıksa memory bağlamını) havuzda paralel başlatır.
+    Böylece DOMAIN kritik yolundan bir LLM gecikmesi düşer.
+    """
+    t0 = time.perf_counter()
+    route_info = router.classify_local(user_query)
+    if route_info is not None or not _should_speculate(router):
+        route_info = route_info or router.classify_llm(user_query)
+        observe_stage("route", time.perf_counter() - t0)
+        return route_info, memory.build_context(), None
+
+    get_speculation_stats().record_launch()
+    retrieval = _BLOCKING_POOL.submit(contextvars.copy_context().run, profiled(_domain_retrieve), user_query)
+    context = (
+        _BLOCKING_POOL.submit(contextvars.copy_context().run, profiled(memory.build_context))
+        if Config.SPECULATIVE_CONTEXT else None
+    )
+
+    route_info = router.classify_llm(user_query)
+    observe_stage("route", time.perf_counter() - t0)
+    history_context = context.result() if context is not None else memory.build_context()
+    return route_info, history_context, retrieval
+
+
+async def _aroute(router: QueryRouterNode, user_query: str, memory):
+    """_route'un async karşılığı; dönüşteki spekülatif iş bir asyncio.Future'dır."""
+    # heuristik ucuz; route cache + embedding sınıflandırıcı encode yapabildiği için havuzda
+    t0 = time.perf_counter()
+    route_info = router.classify_heuristic(user_query)
+    if route_info is None:
+        route_info = await _offload(router.classify_local, user_query)
+    if route_info is not None or not _should_speculate(router):
+        if route_info is None:
+            route_info = await _offload(router.classify_llm, user_query)
+        observe_stage("route", time.perf_counter() - t0)
+        return route_info, await _offload(memory.build_context), None
+
+    get_speculation_stats().record_launch()
+    retrieval = asyncio.ensure_future(_offload(_domain_retrieve, user_query))
+    # atılan spekülasyonun hatası "never retrieved" uyarısı üretmesin
+    retrieval.add_done_callback(lambda f: f.cancelled() or f.exception())
+
+    async def _classify():
+        info = await _offload(router.classify_llm, user_query)
+        observe_stage("route", time.perf_counter() - t0)
+        return info
+
+    if Config.SPECULATIVE_CONTEXT:
+        route_info, history_context = await asyncio.gather(_classify(), _offload(memory.build_context))
+    else:
+        route_info = await _classify()
+        history_context = await _offload(memory.build_context)
+    return route_info, history_context, retrieval
+
+
+def _claim_speculation(speculative, route: str, normalized_q: str, user_query: str) -> bool:
+    """Spekülatif sonuç kullanılabilir mi? Değilse iptal edip boşa gideni sayar."""
+    if speculative is None:
+        return False
+    if route == "DOMAIN" and normalized_q == user_query:
+        get_speculation_stats().record_used()
+        return True
+    # çalışmaya başlamış thread durdurulamaz; sonucu sadece yok sayılır
+    speculative.cancel()
+    get_speculation_stats().record_wasted(route if route != "DOMAIN" else "rewritten_query")
+    return False
+
+
 # =====================================================
 # Ana RAG Çalıştırıcısı (stateful sync)
 # =====================================================
-def run_rag(user_query: str, session_id: str) -> Dict[str, Any]:
+def run_rag(user_query: str, session_id: str, request_id: Optional[str] = None) -> Dict[str, Any]:
+    bind_log_context(request_id=request_id or new_request_id(), session_id=session_id)
+    with track_request("sync"), start_trace("run_rag", mode="sync", session_id=session_id):
+        return _run_rag(user_query, session_id)
+
+
+def _run_rag(user_query: str, session_id: str) -> Dict[str, Any]:
     state = StateTracker()
     memory = get_memory(session_id)
 
     router = QueryRouterNode()
-    route_info = router.classify(user_query)
+    route_info, history_context, speculative = _route(router, user_query, memory)
     route = route_info["route"]
     normalized_q = route_info["normalized_question"]
 
-    history_context = memory.build_context()
-
     # FOLLOWUP override (ör: "benim adım neydi?")
     if route == "DOMAIN" and _looks_like_followup(normalized_q):
         log_warning("[Router Override] Kısa kişisel takip sorusu algılandı → GENERIC_CHAT'a force ediliyor.")
         route = "GENERIC_CHAT"
+    set_route(route)
+
+    use_speculative = _claim_speculation(speculative, route, normalized_q, user_query)
 
     log_info(f"[Router] route={route} session={session_id} → '{normalized_q}'")
 
@@ -187,19 +328,12 @@ def run_rag(user_query: str, session_id: str) -> Dict[str, Any]:
             "docs": web["docs"],
         }
 
-    # 3. DOMAIN → ChromaDB RAG
-    g = RAGGraph()
-
-    log_info("[RAG] Retrieving documents...")
-    docs = g.retriever.run(normalized_q, k=4)
-
-    log_info("[RAG] Grading retrieved docs...")
-    graded = g.retriever_grader.run(normalized_q, docs, min_thresh=0.05)
+    # 3. DOMAIN → ChromaDB RAG (spekülatif retrieval hazırsa onu kullan)
+    g, graded = speculative.result() if use_speculative else _domain_retrieve(normalized_q)
 
     # Hiç ilgili yoksa → rewrite yap, yeniden dene
     if not graded:
         log_warning("[RAG] No docs → rewrite attempt")
-        model = genai.GenerativeModel(Config.MODEL_NAME)
         rewrite_prompt = f"""
 Geçmiş konuşma özeti:
 {history_context}
@@ -211,18 +345,19 @@ Bu soruyu şirket içi bilgi tabanına uygun olacak şekilde yeniden yaz.
 Sadece yeniden yazılmış soruyu döndür.
 """
         try:
-            resp = model.generate_content(rewrite_prompt)
-            rewritten = (resp.text or "").strip()
-            if rewritten and rewritten.lower() != normalized_q.lower():
-                docs = g.retriever.run(rewritten, k=4)
-                graded = g.retriever_grader.run(rewritten, docs, min_thresh=0.05)
-                normalized_q = rewritten
+            with stage("rewrite"):
+                rewritten = get_llm().generate(rewrite_prompt, stage="llm_rewrite").strip()
+                if rewritten and rewritten.lower() != normalized_q.lower():
+                    doc_ids, docs = g.retriever.run_with_ids(rewritten, k=4)
+                    graded = g.retriever_grader.run(rewritten, docs, min_thresh=0.05, doc_ids=doc_ids)
+                    normalized_q = rewritten
         except Exception as e:
             log_warning(f"[RAG] Rewrite fail: {e}")
 
     # Hala yoksa → WEB fallback
     if not graded:
         log_warning("[RAG] Still no docs → WEB fallback")
+        set_trace_attrs(fallback="web")
         web = _web_search_answer(normalized_q, history_context)
         memory.add_turn(user_query, web["answer"])
         return {
@@ -234,12 +369,32 @@ Sadece yeniden yazılmış soruyu döndür.
             "docs": web["docs"],
         }
 
-    # graded listesinde en alakalı 2 dokümanın text kısmını al
+    # graded listesinde en alakalı 2 dokümanın text kısmını al: (doc, score, chunk_id)
     context_chunks = [doc for doc, *_ in graded[:2]]
+    context_ids = [cid for _, _, cid in graded[:2]]
     context_block = " ".join(context_chunks)
 
+    answer_cache, q_vec, cached = _answer_cache_probe(normalized_q, "DOMAIN", context_ids, history_context)
+    if cached:
+        log_info(f"[RAG] Answer cache hit (similarity={cached['similarity']:.3f}) → LLM atlandı")
+        set_trace_attrs(answer_cache="hit")
+        memory.add_turn(user_query, cached["answer"])
+        state.log_state(
+            user_query,
+            cached["answer"],
+            {"hallucination": cached["hallucination_score"], "grade": cached["answer_grade"]},
+        )
+        log_success("[RAG] ✅ DOMAIN (cache)")
+        return {
+            "query": user_query,
+            "source": "chroma_db",
+            "answer": cached["answer"],
+            "hallucination_score": cached["hallucination_score"],
+            "answer_grade": cached["answer_grade"],
+            "docs": context_chunks,
+        }
+
     log_info("[RAG] Generating answer...")
-    model = genai.GenerativeModel(Config.MODEL_NAME)
     gen_prompt = f"""
 Geçmiş konuşma özeti:
 {history_context}
@@ -253,12 +408,22 @@ Kullanıcı sorusu:
 Profesyonel, kurumsal tonda Türkçe bir yanıt ver.
 Cevabı **mutlaka Markdown formatında** üret; sadece markdown içeriği döndür.
 """
-    final = model.generate_content(gen_prompt)
-    answer = (final.text or "").strip()
+    answer = get_llm().generate(gen_prompt).strip()
 
-    halluc_score = g.hallucination.run(answer, context_block)
+    halluc_score = g.hallucination.run(
+        answer,
+        context_block,
+        context_ids=g.retriever_grader.context_token_ids(context_chunks, context_ids),
+    )
     ans_score = g.answer_grader.run(answer)
 
+    if answer_cache is not None and answer:
+        answer_cache.store(q_vec, "DOMAIN", context_ids, {
+            "answer": answer,
+            "hallucination_score": halluc_score,
+            "answer_grade": ans_score,
+        })
+
     memory.add_turn(user_query, answer)
     state.log_state(
         user_query,
@@ -312,7 +477,55 @@ def _safe_extract_docs_text(docs: List[AnyType], limit: int = 2) -> str:
 
     return " ".join(chunks)
 
-async def stream_rag(user_query: str, session_id: str) -> AsyncGenerator[str, None]:
+# -----------------------------------------------------
+# Async yardımcılar
+# -----------------------------------------------------
+async def _offload(fn, *args, **kwargs):
+    """Bloklayan (CPU/IO) bir çağrıyı event loop'u tıkamadan havuzda çalıştırır."""
+    loop = asyncio.get_running_loop()
+    # log bağlamı (request/session id) havuz thread'ine de taşınsın
+    # profil açıksa havuz thread'i de örneklensin (kapalıyken fn aynen döner)
+    ctx = contextvars.copy_context()
+    return await loop.run_in_executor(_BLOCKING_POOL, partial(ctx.run, profiled(fn), *args, **kwargs))
+
+
+async def _astream_llm(prompt: str) -> AsyncGenerator[str, None]:
+    """LLM gateway üzerinden non-blocking (async) streaming; her parçanın metnini yield eder."""
+    async for text in get_llm().astream(prompt):
+        yield text
+
+
+async def _stream_answer(prompt: str, tag: str, session_id: str, collected: List[str]) -> AsyncGenerator[str, None]:
+    """
+    LLM parçalarını SSE satırları olarak yield eder; tam cevabı `collected`
+    listesine biriktirir (async generator değer döndüremediği için).
+    """
+    chunk_idx = 0
+    # parça logları DEBUG'da ve örneklenerek; INFO'da döngü içi maliyet tek bir bool kontrolü
+    debug = is_debug_enabled()
+    sample = max(1, Config.LOG_CHUNK_SAMPLE)
+    log_info(f"[STREAM][{tag}] starting stream for session={session_id}")
+    with span("stream_answer", tag=tag) as s:
+        async for text in _astream_llm(prompt):
+            chunk_idx += 1
+            if debug and (chunk_idx - 1) % sample == 0:
+                preview = (text[:120] + '...') if len(text) > 120 else text
+                log_debug(f"[STREAM CHUNK][{tag}] idx={chunk_idx} len={len(text)} preview={preview!r}")
+            collected.append(text)
+            # escape newlines so client can rehydrate chunks safely
+            chunk_text = text.replace("\n", "\\n")
+            yield f"data: {chunk_text}\n\n"
+        if s is not None:
+            s.set(chunks=chunk_idx)
+    log_info(f"[STREAM][{tag}] finished stream, chunks={chunk_idx} session={session_id}")
+
+
+def _web_snippets(question: str) -> List[str]:
+    log_info("[STREAM][WEB] Tavily araması başlatılıyor...")
+    return TavilySearch().search(question) or []
+
+
+async def stream_rag(user_query: str, session_id: str, request_id: Optional[str] = None) -> AsyncGenerator[str, None]:
     """
     SSE için parçalı yanıt üretir.
     Bu fonksiyon run_rag() ile aynı routing mantığını uygular:
@@ -320,28 +533,41 @@ async def stream_rag(user_query: str, session_id: str) -> AsyncGenerator[str, No
       - WEB           → Tavily + LLM
       - DOMAIN (RAG)  → ChromaDB bağlamı + LLM
     Yalnızca çok kısa, kişisel follow-up sorularında DOMAIN → GENERIC_CHAT override edilir.
+
+    Event loop hiçbir adımda bloklanmaz: router LLM çağrısı, memory, Tavily,
+    retrieval ve grading sınırlı bir thread havuzunda; Gemini streaming ise
+    LLM gateway'in async stream'i (generate_content_async) ile yürür. Böylece eşzamanlı SSE stream'leri
+    birbirini beklemeden ilerler.
     """
 
-    memory = get_memory(session_id)
+    bind_log_context(request_id=request_id or new_request_id(), session_id=session_id)
+    # aclosing: istemci koparsa iç generator (ve LLM slotu) hemen kapansın
+    with track_request("stream"), start_trace("stream_rag", mode="stream", session_id=session_id):
+        async with aclosing(_stream_rag(user_query, session_id)) as lines:
+            async for line in lines:
+                yield line
+
 
-    # 1. Soru analizi / yönlendirme
+async def _stream_rag(user_query: str, session_id: str) -> AsyncGenerator[str, None]:
+    memory = await _offload(get_memory, session_id)
+
+    # 1. Soru analizi / yönlendirme + 2. geçmiş bağlam (gerekirse spekülatif retrieval ile paralel)
     router = QueryRouterNode()
-    route_info = router.classify(user_query)
+    route_info, history_context, speculative = await _aroute(router, user_query, memory)
     route = route_info["route"]
     normalized_q = route_info["normalized_question"]
 
-    # 2. Geçmiş bağlam
-    history_context = memory.build_context()
-
     # 3. Follow-up override: sadece bu koşulda DOMAIN -> GENERIC_CHAT
     # Amaç: "benim adım neydi?" gibi saf sohbet devamı sorularını gereksiz yere RAG'e göndermemek.
     if route == "DOMAIN" and _looks_like_followup(normalized_q):
         log_warning("[Router Override/STREAM] Kısa kişisel takip sorusu algılandı → GENERIC_CHAT'a force ediliyor.")
         route = "GENERIC_CHAT"
+    set_route(route)
 
     log_info(f"[STREAM] route={route} session={session_id} → '{normalized_q}'")
+    use_speculative = _claim_speculation(speculative, route, normalized_q, user_query)
 
-    model = genai.GenerativeModel(Config.MODEL_NAME)
+    full_answer_chunks: List[str] = []
 
     # ============================================================
     # CASE 1: GENERIC_CHAT (saf sohbet / hafıza üzerinden devam)
@@ -356,31 +582,13 @@ Kullanıcının yeni mesajı:
 
 Bağlama sadık kalarak Türkçe, net ve profesyonel bir cevap ver.
 """
-        # Streaming yanıt
-        stream = model.generate_content(prompt, stream=True)
-        full_answer_chunks: List[str] = []
-        chunk_idx = 0
-
-        log_info(f"[STREAM][GENERIC_CHAT] starting stream for session={session_id}")
-        for chunk in stream:
-            if chunk.text:
-                chunk_idx += 1
-                preview = (chunk.text[:120] + '...') if len(chunk.text) > 120 else chunk.text
-                log_info(f"[STREAM CHUNK][GENERIC_CHAT] idx={chunk_idx} len={len(chunk.text)} preview={preview!r}")
-                full_answer_chunks.append(chunk.text)
-                log_info(f"[STREAM CHUNK][GENERIC_CHAT] sending chunk idx={chunk_idx}")
-                # escape newlines so client can rehydrate chunks safely
-                chunk_text = (chunk.text or "").replace("\n", "\\n")
-                yield f"data: {chunk_text}\n\n"
-                # küçük bir sleep ile event loop'e ve socket flush'a fırsat ver
-                await asyncio.sleep(0)
-                log_info(f"[STREAM CHUNK][GENERIC_CHAT] sent chunk idx={chunk_idx}")
-        log_info(f"[STREAM][GENERIC_CHAT] finished stream, chunks={chunk_idx} session={session_id}")
+        async for line in _stream_answer(prompt, "GENERIC_CHAT", session_id, full_answer_chunks):
+            yield line
 
         # full answer'i memory'e yaz
         final_answer = "".join(full_answer_chunks).strip()
         if final_answer:
-            memory.add_turn(user_query, final_answer)
+            await _offload(memory.add_turn, user_query, final_answer)
 
         # bitti bildirimi
         yield "data: [DONE]\n\n"
@@ -390,9 +598,7 @@ Bağlama sadık kalarak Türkçe, net ve profesyonel bir cevap ver.
     # CASE 2: WEB (Tavily + LLM)
     # ============================================================
     if route == "WEB":
-        log_info("[STREAM][WEB] Tavily araması başlatılıyor...")
-        tav = TavilySearch()
-        snippets = tav.search(normalized_q) or []
+        snippets = await _offload(_web_snippets, normalized_q)
         top_context = " ".join(snippets[:3])
 
         prompt = f"""
@@ -408,26 +614,12 @@ Soru:
 Sadece bu bağlamı kullan. Türkçe, profesyonel, mümkün olduğunca güvenilir bir yanıt ver.
 Emin olmadığın yerde açıkça "emin değilim" de.
 """
-        stream = model.generate_content(prompt, stream=True)
-        full_answer_chunks: List[str] = []
-        chunk_idx = 0
-        log_info(f"[STREAM][WEB] starting stream for session={session_id}")
-        for chunk in stream:
-            if chunk.text:
-                chunk_idx += 1
-                preview = (chunk.text[:120] + '...') if len(chunk.text) > 120 else chunk.text
-                log_info(f"[STREAM CHUNK][WEB] idx={chunk_idx} len={len(chunk.text)} preview={preview!r}")
-                full_answer_chunks.append(chunk.text)
-                log_info(f"[STREAM CHUNK][WEB] sending chunk idx={chunk_idx}")
-                chunk_text = (chunk.text or "").replace("\n", "\\n")
-                yield f"data: {chunk_text}\n\n"
-                await asyncio.sleep(0)
-                log_info(f"[STREAM CHUNK][WEB] sent chunk idx={chunk_idx}")
-        log_info(f"[STREAM][WEB] finished stream, chunks={chunk_idx} session={session_id}")
+        async for line in _stream_answer(prompt, "WEB", session_id, full_answer_chunks):
+            yield line
 
         final_answer = "".join(full_answer_chunks).strip()
         if final_answer:
-            memory.add_turn(user_query, final_answer)
+            await _offload(memory.add_turn, user_query, final_answer)
 
         yield "data: [DONE]\n\n"
         return
@@ -437,20 +629,14 @@ Emin olmadığın yerde açıkça "emin değilim" de.
     # ============================================================
     # Burada gerçek RAG akışı yapılır. Yani bu RAG'i kapatmıyoruz,
     # sadece gerçekten domain tipi bir soruysa buraya gelmiş oluyoruz.
-    g = RAGGraph()
-
-    log_info("[STREAM][RAG] Doküman getiriliyor...")
-    docs_raw = g.retriever.run(normalized_q, k=4)
-
-    log_info("[STREAM][RAG] Dokümanlar puanlanıyor...")
-    graded = g.retriever_grader.run(normalized_q, docs_raw, min_thresh=0.05)
+    g, graded = await speculative if use_speculative else await _offload(_domain_retrieve, normalized_q)
 
     # Eğer hiçbir alakalı doküman yoksa → fallback olarak WEB'e geçebiliriz
     # çünkü bu genelde şirket içi veri yoksa ama soru halen bilgi soruyorsa olur.
     if not graded:
         log_warning("[STREAM][RAG] İlgili doküman yok. WEB fallback'e düşülüyor.")
-        tav = TavilySearch()
-        snippets = tav.search(normalized_q) or []
+        set_trace_attrs(fallback="web")
+        snippets = await _offload(_web_snippets, normalized_q)
         top_context = " ".join(snippets[:3])
 
         prompt = f"""
@@ -465,21 +651,12 @@ Soru:
 
 Türkçe, profesyonel ve güvenilir bir cevap yaz.
 """
-        stream = model.generate_content(prompt, stream=True)
-        full_answer_chunks: List[str] = []
-
-        for chunk in stream:
-            if chunk.text:
-                full_answer_chunks.append(chunk.text)
-                log_info(f"[STREAM CHUNK][RAG-fallback] sending chunk len={len(chunk.text)}")
-                chunk_text = (chunk.text or "").replace("\n", "\\n")
-                yield f"data: {chunk_text}\n\n"
-                await asyncio.sleep(0)
-                log_info(f"[STREAM CHUNK][RAG-fallback] sent chunk")
+        async for line in _stream_answer(prompt, "RAG-fallback", session_id, full_answer_chunks):
+            yield line
 
         final_answer = "".join(full_answer_chunks).strip()
         if final_answer:
-            memory.add_turn(user_query, final_answer)
+            await _offload(memory.add_turn, user_query, final_answer)
 
         yield "data: [DONE]\n\n"
         return
@@ -500,8 +677,21 @@ Türkçe, profesyonel ve güvenilir bir cevap yaz.
         return str(d)
 
     top_context_chunks = [_only_text(item) for item in graded[:2]]
+    top_context_ids = [item[2] for item in graded[:2]]
     rag_context_block = " ".join(top_context_chunks)
 
+    answer_cache, q_vec, cached = await _offload(
+        _answer_cache_probe, normalized_q, "DOMAIN", top_context_ids, history_context
+    )
+    if cached:
+        log_info(f"[STREAM][RAG] Answer cache hit (similarity={cached['similarity']:.3f}) → LLM atlandı")
+        set_trace_attrs(answer_cache="hit")
+        chunk_text = cached["answer"].replace("\n", "\\n")
+        yield f"data: {chunk_text}\n\n"
+        await _offload(memory.add_turn, user_query, cached["answer"])
+        yield "data: [DONE]\n\n"
+        return
+
     # RAG cevabını oluşturacak prompt
     prompt = f"""
 Geçmiş konuşma özeti:
@@ -517,21 +707,24 @@ Kurumsal, profesyonel ve gerçekçi bir Türkçe yanıt üret.
 Yanıtta uydurma yapma; emin değilsen açıkça belirt.
 """
 
-    stream = model.generate_content(prompt, stream=True)
-    full_answer_chunks: List[str] = []
-
-    for chunk in stream:
-        if chunk.text:
-            full_answer_chunks.append(chunk.text)
-            log_info(f"[STREAM CHUNK][RAG] sending chunk len={len(chunk.text)}")
-            chunk_text = (chunk.text or "").replace("\n", "\\n")
-            yield f"data: {chunk_text}\n\n"
-            await asyncio.sleep(0)
-            log_info(f"[STREAM CHUNK][RAG] sent chunk")
+    async for line in _stream_answer(prompt, "RAG", session_id, full_answer_chunks):
+        yield line
 
     final_answer = "".join(full_answer_chunks).strip()
     if final_answer:
-        memory.add_turn(user_query, final_answer)
+        await _offload(memory.add_turn, user_query, final_answer)
+        if answer_cache is not None:
+            def _store_answer():
+                answer_cache.store(q_vec, "DOMAIN", top_context_ids, {
+                    "answer": final_answer,
+                    "hallucination_score": g.hallucination.run(
+                        final_answer,
+                        rag_context_block,
+                        context_ids=g.retriever_grader.context_token_ids(top_context_chunks, top_context_ids),
+                    ),
+                    "answer_grade": g.answer_grader.run(final_answer),
+                })
+            await _offload(_store_answer)
 
     yield "data: [DONE]\n\n"
     return
@@ -0,0 +1,302 @@
+# src/registry.py
+"""
+Süreç genelinde paylaşılan (warm) bileşen kaydı.
+
+Her DOMAIN isteğinde RAGGraph → RetrieverNode → VectorStore zinciri
+yeniden kurulursa yeni bir SentenceTransformer yüklenir ve yeni bir
+Chroma PersistentClient açılır. Bu modül bu ağır nesneleri lazy olarak
+ve thread-safe biçimde bir kez oluşturur, sonra hep aynısını döndürür.
+"""
+from __future__ import annotations
+
+import threading
+from typing import Any, Callable, Dict, Optional
+
+from src.config import Config
+from src.utils.logger import log_info, log_success, log_error
+from src.utils.metrics import register_collector
+
+
+_LOCK = threading.RLock()
+_INSTANCES: Dict[Any, Any] = {}
+_KEY_LOCKS: Dict[Any, threading.Lock] = {}
+
+_READY = threading.Event()
+_WARMUP_ERROR: Optional[str] = None
+_WARMUP_THREAD: Optional[threading.Thread] = None
+
+
+def _get_or_create(key: Any, factory: Callable[[], Any]) -> Any:
+    """
+    Double-checked locking ile tekil nesne üretir. Factory yalnızca anahtarın
+    kendi kilidi altında çalışır: yavaş bir yükleme (ör. embedding modeli)
+    başka anahtarların oluşturulmasını bekletmez.
+    """
+    inst = _INSTANCES.get(key)
+    if inst is not None:
+        return inst
+    with _LOCK:
+        key_lock = _KEY_LOCKS.setdefault(key, threading.Lock())
+    with key_lock:
+        inst = _INSTANCES.get(key)
+        if inst is None:
+            inst = factory()
+            _INSTANCES[key] = inst
+        return inst
+
+
+# =====================================================
+# Paylaşılan bileşenler
+# =====================================================
+def get_embedding_model(model_name: Optional[str] = None):
+    """Model adı başına tek bir EmbeddingModel (SentenceTransformer) döndürür."""
+    from src.retriever.embeddings import EmbeddingModel
+
+    name = model_name or Config.EMBEDDING_MODEL
+
+    def _build():
+        log_info(f"[Registry] Embedding model yükleniyor: {name}")
+        return EmbeddingModel(name)
+
+    return _get_or_create(("embedding", name), _build)
+
+
+def get_llm():
+    """Tüm çağrı yerlerinin paylaştığı LLM gateway'i (GeminiClient)."""
+    from src.llm.gemini_client import FakeProvider, GeminiClient
+
+    def _build():
+        provider = FakeProvider() if Config.LLM_PROVIDER == "fake" else None
+        return GeminiClient(
+            provider=provider,
+            model=Config.MODEL_NAME,
+            timeout=Config.LLM_TIMEOUT,
+            max_concurrency=Config.LLM_MAX_CONCURRENCY,
+            rate_limit=Config.LLM_RATE_LIMIT,
+            max_retries=Config.LLM_MAX_RETRIES,
+            backoff_base=Config.LLM_BACKOFF_BASE,
+            backoff_max=Config.LLM_BACKOFF_MAX,
+        )
+
+    return _get_or_create("llm", _build)
+
+
+def set_llm_provider(provider) -> None:
+    """Gateway'in provider'ını değiştirir (test / benchmark için sahte provider)."""
+    get_llm().provider = provider
+
+
+def get_chroma_client(path: Optional[str] = None):
+    """Dizin başına tek bir chromadb.PersistentClient döndürür."""
+    import chromadb
+
+    chroma_path = path or Config.CHROMA_PATH
+
+    def _build():
+        log_info(f"[Registry] Chroma client açılıyor: {chroma_path}")
+        return chromadb.PersistentClient(path=chroma_path)
+
+    return _get_or_create(("chroma", chroma_path), _build)
+
+
+def get_vectorstore(collection_name: str = "rag_docs"):
+    """Koleksiyon başına tek bir VectorStore döndürür."""
+    from src.retriever.vectorstore import VectorStore
+
+    return _get_or_create(
+        ("vectorstore", collection_name),
+        lambda: VectorStore(collection_name=collection_name),
+    )
+
+
+def get_bm25_index(collection_name: str = "rag_docs"):
+    """Koleksiyonun BM25 index'i için (dosya değişince yeniden yüklenen) handle."""
+    from src.retriever.bm25 import BM25Index, bm25_path
+    from src.utils.reloading import ReloadingFile
+
+    return _get_or_create(
+        ("bm25", collection_name),
+        lambda: ReloadingFile(bm25_path(collection_name), BM25Index.load),
+    )
+
+
+def get_collection_version(collection_name: str = "rag_docs"):
+    """Ingestion'ın artırdığı koleksiyon versiyon sayacı (yoksa get() → None)."""
+    from src.retriever.collection_version import read_version, version_path
+    from src.utils.reloading import ReloadingFile
+
+    return _get_or_create(
+        ("version", collection_name),
+        lambda: ReloadingFile(version_path(collection_name), read_version),
+    )
+
+
+def get_token_index(collection_name: str = "rag_docs"):
+    """Chunk token id'lerinin (grader/hallucination için) yeniden yüklenen handle'ı."""
+    from src.retriever.tokenizer import TokenIndex, token_index_path
+    from src.utils.reloading import ReloadingFile
+
+    return _get_or_create(
+        ("tokens", collection_name),
+        lambda: ReloadingFile(token_index_path(collection_name), TokenIndex.load),
+    )
+
+
+def get_answer_cache():
+    """Süreç genelinde tek SemanticAnswerCache."""
+    from src.llm.answer_cache import SemanticAnswerCache
+
+    return _get_or_create(
+        "answer_cache",
+        lambda: SemanticAnswerCache(
+            max_entries=Config.ANSWER_CACHE_SIZE,
+            ttl_seconds=Config.ANSWER_CACHE_TTL,
+            threshold=Config.ANSWER_CACHE_THRESHOLD,
+        ),
+    )
+
+
+def get_route_classifier(collection_name: str = "rag_docs"):
+    """Router için paylaşılan EmbeddingRouteClassifier (warm embedding modelini kullanır)."""
+    from src.graph.route_classifier import EmbeddingRouteClassifier
+
+    def _build():
+        collection = None
+        if Config.ROUTER_CORPUS_SAMPLES > 0:
+            collection = get_vectorstore(collection_name).collection
+        return EmbeddingRouteClassifier(
+            get_embedding_model(),
+            margin=Config.ROUTER_MARGIN,
+            min_similarity=Config.ROUTER_MIN_SIMILARITY,
+            corpus_samples=Config.ROUTER_CORPUS_SAMPLES,
+            collection=collection,
+        )
+
+    return _get_or_create(("route_classifier", collection_name), _build)
+
+
+def get_route_cache():
+    """QueryRouterNode kararları için süreç genelinde tek RouteDecisionCache."""
+    from src.graph.route_cache import RouteDecisionCache
+
+    return _get_or_create(
+        "route_cache",
+        lambda: RouteDecisionCache(
+            max_entries=Config.ROUTE_CACHE_SIZE,
+            ttl_seconds=Config.ROUTE_CACHE_TTL,
+            neighborhood_decimals=Config.ROUTE_CACHE_DECIMALS if Config.ROUTE_CACHE_NEIGHBORHOOD else None,
+        ),
+    )
+
+
+def get_speculation_stats():
+    """Spekülatif retrieval'ın kullanılan/boşa giden sayaçları."""
+    from src.graph.speculation import SpeculationStats
+
+    return _get_or_create("speculation", SpeculationStats)
+
+
+def get_rag_graph():
+    """Tüm DOMAIN istekleri için yeniden kullanılan RAGGraph örneği."""
+    from src.graph.graph_builder import RAGGraph
+
+    return _get_or_create("rag_graph", RAGGraph)
+
+
+def cache_stats() -> Dict[str, Any]:
+    """Yüklenmiş bileşenlerin cache hit/miss sayaçları."""
+    stats: Dict[str, Any] = {}
+    for key, inst in list(_INSTANCES.items()):
+        if isinstance(key, tuple) and key[0] == "embedding":
+            stats[f"query_embedding:{key[1]}"] = inst.cache_stats()
+        elif isinstance(key, tuple) and key[0] == "vectorstore":
+            stats[f"retrieval:{key[1]}"] = inst.retrieval_cache.stats()
+        elif isinstance(key, tuple) and key[0] == "route_classifier":
+            stats[f"route_classifier:{key[1]}"] = inst.stats()
+        elif key == "route_cache":
+            stats["route_decision"] = inst.stats()
+        elif key == "answer_cache":
+            stats["semantic_answer"] = inst.stats()
+        elif key == "speculation":
+            stats["speculative_retrieval"] = inst.stats()
+    return stats
+
+
+def _hit_miss_caches(stats: Dict[str, Any], prefix: str = ""):
+    """cache_stats() ağacında hits/misses taşıyan her düğüm → (etiket, stats)."""
+    for name, value in stats.items():
+        if not isinstance(value, dict):
+            continue
+        label = f"{prefix}{name}"
+        if "hits" in value and "misses" in value:
+            yield label, value
+        else:
+            yield from _hit_miss_caches(value, f"{label}:")
+
+
+@register_collector
+def _component_metrics():
+    """/metrics için yüklenmiş bileşenlerin sayaçları (yeni bileşen oluşturmaz)."""
+    caches = list(_hit_miss_caches(cache_stats()))
+    yield "rag_cache_hits_total", "counter", "Cache isabetleri.", [({"cache": c}, s["hits"]) for c, s in caches]
+    yield "rag_cache_misses_total", "counter", "Cache ıskalamaları.", [({"cache": c}, s["misses"]) for c, s in caches]
+    yield "rag_cache_hit_ratio", "gauge", "Cache isabet oranı.", [({"cache": c}, s["hit_rate"]) for c, s in caches]
+
+    llm = _INSTANCES.get("llm")
+    if llm is not None:
+        s = llm.stats()
+        yield "rag_llm_in_flight", "gauge", "Süren LLM çağrıları.", [({}, s["in_flight"])]
+        yield "rag_llm_calls_total", "counter", "LLM gateway çağrıları.", [({}, s["calls"])]
+        yield "rag_llm_retries_total", "counter", "LLM yeniden denemeleri.", [({}, s["retries"])]
+        yield "rag_llm_failures_total", "counter", "Başarısız LLM çağrıları.", [({}, s["failures"])]
+
+
+# =====================================================
+# Warmup / Readiness
+# =====================================================
+def warmup() -> None:
+    """
+    Embedding modelini, Chroma client'ını, RAGGraph'ı ve (açıksa) route
+    sınıflandırıcısının prototiplerini önceden yükler.
+    Model yüklendikten sonra küçük bir encode çağrısı ile ilk-istek
+    gecikmesini (torch init vb.) da ödemiş oluruz.
+    """
+    global _WARMUP_ERROR
+    try:
+        model = get_embedding_model()
+        model.encode(["warmup"])
+        get_rag_graph()
+        if Config.ROUTER_EMBEDDING:
+            get_route_classifier()
+        _WARMUP_ERROR = None
+        _READY.set()
+        log_success("[Registry] ✅ Warmup tamamlandı, servis hazır.")
+    except Exception as e:
+        _WARMUP_ERROR = str(e)
+        log_error(f"[Registry] Warmup hatası: {e}")
+
+
+def start_background_warmup() -> threading.Thread:
+    """Warmup'ı arka planda başlatır; API bu sırada liveness'a cevap verebilir."""
+    global _WARMUP_THREAD
+    with _LOCK:
+        if _WARMUP_THREAD is None or not _WARMUP_THREAD.is_alive():
+            _WARMUP_THREAD = threading.Thread(
+                target=warmup, name="registry-warmup", daemon=True
+            )
+            _WARMUP_THREAD.start()
+        return _WARMUP_THREAD
+
+
+def is_ready() -> bool:
+    return _READY.is_set()
+
+
+def readiness() -> Dict[str, Any]:
+    """/ready endpoint'i için durum özeti."""
+    return {
+        "ready": is_ready(),
+        "embedding_model": Config.EMBEDDING_MODEL,
+        "warming_up": bool(_WARMUP_THREAD and _WARMUP_THREAD.is_alive()),
+        "error": _WARMUP_ERROR,
+    }
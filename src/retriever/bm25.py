@@ -0,0 +1,128 @@
+# src/retriever/bm25.py
+"""
+Süreç içi BM25 inverted index.
+
+Ingestion sırasında Chroma ile aynı chunk id'leri üzerinden kurulur ve
+JSON olarak diske yazılır. API tarafı dosyayı ReloadingFile ile okur;
+dosya değişince (yeniden ingest) otomatik olarak yeniden yüklenir.
+"""
+from __future__ import annotations
+
+import json
+import math
+import os
+from collections import Counter, defaultdict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from src.config import Config
+from src.retriever.tokenizer import tokenize
+
+
+def bm25_path(collection_name: str, chroma_path: Optional[str] = None) -> str:
+    """BM25 dosyası Chroma dizininin yanında tutulur; aynı volume'de yaşar."""
+    return os.path.join(chroma_path or Config.CHROMA_PATH, f"bm25_{collection_name}.json")
+
+
+class BM25Index:
+    VERSION = 1
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.doc_terms: Dict[str, Dict[str, int]] = {}
+        self.doc_len: Dict[str, int] = {}
+        self.postings: Dict[str, Dict[str, int]] = defaultdict(dict)
+        self._total_len = 0
+
+    # ---------------------------------------------
+    # yazma
+    # ---------------------------------------------
+    def add(self, doc_id: str, text: str) -> None:
+        if doc_id in self.doc_terms:
+            self.remove(doc_id)
+        tf = Counter(tokenize(text))
+        self.doc_terms[doc_id] = dict(tf)
+        length = sum(tf.values())
+        self.doc_len[doc_id] = length
+        self._total_len += length
+        for term, count in tf.items():
+            self.postings[term][doc_id] = count
+
+    def remove(self, doc_id: str) -> None:
+        terms = self.doc_terms.pop(doc_id, None)
+        if terms is None:
+            return
+        self._total_len -= self.doc_len.pop(doc_id, 0)
+        for term in terms:
+            plist = self.postings.get(term)
+            if plist is not None:
+                plist.pop(doc_id, None)
+                if not plist:
+                    del self.postings[term]
+
+    def __len__(self) -> int:
+        return len(self.doc_terms)
+
+    def ids(self) -> Iterable[str]:
+        return self.doc_terms.keys()
+
+    # ---------------------------------------------
+    # okuma
+    # ---------------------------------------------
+    def search(self, query: str, k: int = 10) -> List[Tuple[str, float]]:
+        n_docs = len(self.doc_terms)
+        if not n_docs:
+            return []
+        avgdl = self._total_len / n_docs or 1.0
+        scores: Dict[str, float] = defaultdict(float)
+
+        for term in set(tokenize(query)):
+            plist = self.postings.get(term)
+            if not plist:
+                continue
+            df = len(plist)
+            idf = math.log(1.0 + (n_docs - df + 0.5) / (df + 0.5))
+            for doc_id, tf in plist.items():
+                norm = self.k1 * (1.0 - self.b + self.b * self.doc_len[doc_id] / avgdl)
+                scores[doc_id] += idf * tf * (self.k1 + 1.0) / (tf + norm)
+
+        return sorted(scores.items(), key=lambda x: x[1], reverse=True)[:k]
+
+    # ---------------------------------------------
+    # kalıcılık
+    # ---------------------------------------------
+    def save(self, path: str) -> None:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp = f"{path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(
+                {"version": self.VERSION, "k1": self.k1, "b": self.b, "docs": self.doc_terms},
+                f,
+                ensure_ascii=False,
+            )
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str) -> "BM25Index":
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        index = cls(k1=data.get("k1", 1.5), b=data.get("b", 0.75))
+        if data.get("version") != cls.VERSION:
+            return index
+        for doc_id, terms in data.get("docs", {}).items():
+            index.doc_terms[doc_id] = terms
+            length = sum(terms.values())
+            index.doc_len[doc_id] = length
+            index._total_len += length
+            for term, count in terms.items():
+                index.postings[term][doc_id] = count
+        return index
+
+    @classmethod
+    def load_or_create(cls, path: str) -> "BM25Index":
+        if os.path.exists(path):
+            try:
+                return cls.load(path)
+            except (json.JSONDecodeError, OSError):
+                pass
+        return cls()
@@ -0,0 +1,38 @@
+# src/retriever/collection_version.py
+"""
+Koleksiyon versiyon sayacı.
+
+Ingestion koleksiyona her yazdığında sayacı artırır; retrieval cache'i
+anahtarına bu versiyonu katar. Böylece index gerçekten değişene kadar
+sonuçlar yeniden kullanılır, yeniden ingest sonrası otomatik geçersizleşir.
+"""
+from __future__ import annotations
+
+import os
+from typing import Optional
+
+from src.config import Config
+
+
+def version_path(collection_name: str, chroma_path: Optional[str] = None) -> str:
+    return os.path.join(chroma_path or Config.CHROMA_PATH, f"version_{collection_name}")
+
+
+def read_version(path: str) -> int:
+    with open(path, "r", encoding="utf-8") as f:
+        return int(f.read().strip() or 0)
+
+
+def bump_version(collection_name: str, chroma_path: Optional[str] = None) -> int:
+    """Sayacı atomik olarak bir artırır ve yeni değeri döndürür (tek yazar: ingestion)."""
+    path = version_path(collection_name, chroma_path)
+    try:
+        current = read_version(path)
+    except (FileNotFoundError, ValueError):
+        current = 0
+    new = current + 1
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(str(new))
+    os.replace(tmp, path)
+    return new
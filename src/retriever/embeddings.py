@@ -1,8 +1,42 @@
+import re
+
 from sentence_transformers import SentenceTransformer
 
+from src.config import Config
+from src.utils.cache import LRUCache
+from src.utils.metrics import stage
+
+
+def normalize_query(text: str) -> str:
+    """Cache anahtarı için: küçük harf + baş/son boşluk + tekil boşluk."""
+    return re.sub(r"\s+", " ", (text or "").strip().lower())
+
+
 class EmbeddingModel:
     def __init__(self, model_name: str):
+        self.model_name = model_name
         self.model = SentenceTransformer(model_name)
+        # Sorgu embedding cache'i: aynı/FAQ tipi sorular MiniLM forward pass'ini atlar
+        self.query_cache = LRUCache(
+            max_entries=Config.QUERY_EMBED_CACHE_SIZE,
+            max_bytes=int(Config.QUERY_EMBED_CACHE_MAX_MB * 1024 * 1024),
+            ttl_seconds=Config.QUERY_EMBED_CACHE_TTL,
+            name="query_embedding",
+        )
+
+    def encode(self, texts, **kwargs):
+        return self.model.encode(texts, convert_to_numpy=True, **kwargs)
+
+    def encode_query(self, query: str):
+        """Tek bir sorguyu encode eder; sonuç normalize metin + model adı ile cache'lenir."""
+        key = (self.model_name, normalize_query(query))
+        vec = self.query_cache.get(key)
+        if vec is None:
+            with stage("embed_query"):
+                vec = self.encode([query])[0]
+            vec.setflags(write=False)  # paylaşılan dizi, yanlışlıkla değiştirilmesin
+            self.query_cache.set(key, vec)
+        return vec
 
-    def encode(self, texts):
-        return self.model.encode(texts, convert_to_numpy=True)
+    def cache_stats(self) -> dict:
+        return self.query_cache.stats()
@@ -0,0 +1,107 @@
+# src/retriever/tokenizer.py
+"""
+Ortak tokenizasyon katmanı.
+
+BM25 index'i, retriever grader ve hallucination kontrolü aynı kuralla
+token üretir: küçük harf + \\w+ parçaları. Örtüşme skorları için token'lar
+crc32 ile uint32 id'lere çevrilir; doküman id'leri ingestion sırasında
+önceden hesaplanıp TokenIndex'te saklanır.
+"""
+from __future__ import annotations
+
+import os
+import re
+import zlib
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from src.config import Config
+
+_TOKEN_RE = re.compile(r"\w+")
+
+
+def normalize_text(text: str) -> str:
+    # "İ".lower() → "i̇" (birleşik nokta) olmasın diye önce sade "i"ye çeviriyoruz
+    return (text or "").replace("İ", "i").lower()
+
+
+def tokenize(text: str) -> List[str]:
+    return _TOKEN_RE.findall(normalize_text(text))
+
+
+# =====================================================
+# Token ID'leri (hashlenmiş, sıralı, tekil uint32 dizileri)
+# =====================================================
+def token_hash(token: str) -> int:
+    return zlib.crc32(token.encode("utf-8"))
+
+
+def token_ids(text: str) -> np.ndarray:
+    """Metnin tekil token'larını sıralı uint32 hash dizisi olarak döndürür."""
+    return terms_to_ids(set(tokenize(text)))
+
+
+def terms_to_ids(terms: Iterable[str]) -> np.ndarray:
+    ids = np.fromiter((token_hash(t) for t in terms), dtype=np.uint32)
+    return np.unique(ids)
+
+
+def overlap_counts(query_ids: np.ndarray, doc_ids: Sequence[np.ndarray]) -> np.ndarray:
+    """
+    Tüm adaylar için |query ∩ doc| değerini tek bir vektörize geçişte hesaplar.
+    doc_ids elemanları sıralı/tekil dizilerdir.
+    """
+    n = len(doc_ids)
+    if n == 0 or query_ids.size == 0:
+        return np.zeros(n, dtype=np.int64)
+    lengths = np.fromiter((d.size for d in doc_ids), dtype=np.int64, count=n)
+    if lengths.sum() == 0:
+        return np.zeros(n, dtype=np.int64)
+    concat = np.concatenate(doc_ids)
+    hits = np.isin(concat, query_ids, assume_unique=True)
+    segment = np.repeat(np.arange(n), lengths)
+    return np.bincount(segment, weights=hits, minlength=n).astype(np.int64)
+
+
+class TokenIndex:
+    """
+    chunk_id → sıralı token id dizisi. Ingestion sırasında üretilir ve
+    tek bir .npz dosyasında (ids / offsets / tokens) saklanır.
+    """
+
+    def __init__(self, arrays: Optional[Dict[str, np.ndarray]] = None):
+        self.arrays: Dict[str, np.ndarray] = arrays or {}
+
+    def __len__(self) -> int:
+        return len(self.arrays)
+
+    def get(self, chunk_id: str) -> Optional[np.ndarray]:
+        return self.arrays.get(chunk_id)
+
+    @classmethod
+    def from_terms(cls, doc_terms: Iterable[Tuple[str, Iterable[str]]]) -> "TokenIndex":
+        return cls({cid: terms_to_ids(terms) for cid, terms in doc_terms})
+
+    def save(self, path: str) -> None:
+        ids = list(self.arrays)
+        lengths = np.fromiter((self.arrays[i].size for i in ids), dtype=np.int64, count=len(ids))
+        offsets = np.concatenate([[0], np.cumsum(lengths)]).astype(np.int64)
+        tokens = (
+            np.concatenate([self.arrays[i] for i in ids]) if ids else np.zeros(0, dtype=np.uint32)
+        )
+        tmp = f"{path}.tmp.npz"
+        np.savez(tmp, ids=np.array(ids, dtype=str), offsets=offsets, tokens=tokens.astype(np.uint32))
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str) -> "TokenIndex":
+        with np.load(path, allow_pickle=False) as data:
+            ids, offsets, tokens = data["ids"], data["offsets"], data["tokens"]
+        return cls({
+            str(cid): tokens[offsets[i]:offsets[i + 1]] for i, cid in enumerate(ids)
+        })
+
+
+def token_index_path(collection_name: str, chroma_path: Optional[str] = None) -> str:
+    return os.path.join(chroma_path or Config.CHROMA_PATH, f"tokens_{collection_name}.npz")
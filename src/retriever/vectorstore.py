@@ -1,19 +1,30 @@
 # src/retriever/vectorstore.py
-import chromadb
+import numpy as np
+
 from src.config import Config
-from src.retriever.embeddings import EmbeddingModel
+from src.registry import get_chroma_client, get_collection_version, get_embedding_model
+from src.utils.cache import LRUCache
 from src.utils.logger import log_info
+from src.utils.metrics import stage
 
 
 class VectorStore:
     def __init__(self, collection_name: str = "rag_docs"):
         self.collection_name = collection_name
-        self.client = chromadb.PersistentClient(
-            path=Config.CHROMA_PATH
-        )
+        # client ve embedding modeli süreç genelinde paylaşılır (src/registry.py)
+        self.client = get_chroma_client(Config.CHROMA_PATH)
 
         self.collection = self.client.get_or_create_collection(self.collection_name)
-        self.embedding_model = EmbeddingModel(Config.EMBEDDING_MODEL)
+        self.embedding_model = get_embedding_model(Config.EMBEDDING_MODEL)
+
+        # (quantized query embedding, n, koleksiyon versiyonu) → (ids, docs, distances)
+        self.version = get_collection_version(self.collection_name)
+        self.retrieval_cache = LRUCache(
+            max_entries=Config.RETRIEVAL_CACHE_SIZE,
+            ttl_seconds=Config.RETRIEVAL_CACHE_TTL,
+            name="retrieval",
+        )
+        self._cached_version = None
 
         log_info(f"[VectorStore] Chroma path   : {Config.CHROMA_PATH}")
         log_info(f"[VectorStore] Collection    : {self.collection_name}")
@@ -27,10 +38,46 @@ class VectorStore:
             ids=ids,
         )
 
+    def _quantize(self, vec) -> bytes:
+        """Neredeyse aynı sorgular aynı anahtara düşsün diye embedding'i kabaca yuvarlar."""
+        norm = float(np.linalg.norm(vec)) or 1.0
+        scale = 10 ** Config.RETRIEVAL_CACHE_DECIMALS
+        return np.round(np.asarray(vec) / norm * scale).astype(np.int16).tobytes()
+
+    def query_with_ids(self, query: str, n: int = 3):
+        """(ids, documents, distances) üçlüsünü döndürür; sonuç koleksiyon versiyonuna göre cache'lenir."""
+        query_vec = self.embedding_model.encode_query(query)
+
+        version = self.version.get() or 0
+        if version != self._cached_version:
+            # ingestion koleksiyona yazdı → eski sonuçlar geçersiz
+            self.retrieval_cache.clear()
+            self._cached_version = version
+
+        key = (self._quantize(query_vec), n, version)
+        hit = self.retrieval_cache.get(key)
+        if hit is not None:
+            return hit
+
+        with stage("chroma_query"):
+            results = self.collection.query(
+                query_embeddings=[query_vec.tolist()],
+                n_results=n,
+            )
+        ids = (results.get("ids") or [[]])[0]
+        docs = (results.get("documents") or [[]])[0]
+        dists = (results.get("distances") or [[]])[0]
+        out = (ids, docs, dists)
+        self.retrieval_cache.set(key, out)
+        return out
+
     def query(self, query: str, n: int = 3):
-        query_vec = self.embedding_model.encode([query])[0]
-        results = self.collection.query(
-            query_embeddings=[query_vec],
-            n_results=n,
-        )
-        return results.get("documents", [[]])[0]
+        return self.query_with_ids(query, n=n)[1]
+
+    def get_documents(self, ids):
+        """id listesi için dokümanları aynı sırada döndürür (bulunamayan → None)."""
+        if not ids:
+            return []
+        res = self.collection.get(ids=list(ids), include=["documents"])
+        by_id = dict(zip(res.get("ids", []), res.get("documents", [])))
+        return [by_id.get(i) for i in ids]
@@ -1,19 +1,195 @@
+# src/utils/logger.py
+"""
+Seviyeli, yapılandırılmış ve bloklamayan log katmanı.
+
+- log_debug / log_info / log_success / log_warning / log_error aynı imzayla
+  kalır; kayıtlar stdlib logging üzerinden bir kuyruğa bırakılır ve stdout'a
+  yazım tek bir arka plan thread'inde (QueueListener) yapılır. Kuyruk
+  doluysa kayıt atılır, çağıran hiçbir zaman beklemez.
+- Seviye LOG_LEVEL ile seçilir; kapalı seviyeler için maliyet tek bir
+  isEnabledFor kontrolüdür (mesaj formatlanmaz, kuyruğa girmez).
+- Biçim LOG_FORMAT ile: text (renkli, konsol), kv (key=value) veya json.
+- request_id / session_id gibi alanlar contextvars ile bağlanır
+  (bind_log_context / log_context) ve o bağlamdaki her kayda eklenir.
+"""
+from __future__ import annotations
+
+import atexit
+import contextvars
+import json
+import logging
+import logging.handlers
+import queue
+import sys
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional
+
 from colorama import Fore, Style, init
+
+from src.config import Config
+
 init(autoreset=True)
 
-from datetime import datetime
+SUCCESS = 25
+logging.addLevelName(SUCCESS, "SUCCESS")
+
+_LOG_CONTEXT: contextvars.ContextVar[Dict[str, Any]] = contextvars.ContextVar("log_context", default={})
+
+
+# =====================================================
+# Bağlam (request / session id)
+# =====================================================
+def new_request_id() -> str:
+    return uuid.uuid4().hex[:12]
+
+
+def bind_log_context(**fields: Any) -> None:
+    """Geçerli bağlamın (task / thread) log alanlarını ayarlar; mevcut alanların yerini alır."""
+    _LOG_CONTEXT.set({k: v for k, v in fields.items() if v is not None})
+
+
+@contextmanager
+def log_context(**fields: Any) -> Iterator[None]:
+    """Blok boyunca mevcut alanlara ek alanlar bağlar."""
+    token = _LOG_CONTEXT.set({**_LOG_CONTEXT.get(), **fields})
+    try:
+        yield
+    finally:
+        _LOG_CONTEXT.reset(token)
+
+
+def current_log_context() -> Dict[str, Any]:
+    return dict(_LOG_CONTEXT.get())
+
+
+# =====================================================
+# Formatlayıcılar
+# =====================================================
+_COLORS = {
+    logging.DEBUG: Fore.WHITE,
+    logging.INFO: Fore.CYAN,
+    SUCCESS: Fore.GREEN,
+    logging.WARNING: Fore.YELLOW,
+    logging.ERROR: Fore.RED,
+}
+
+
+def _kv(value: Any) -> str:
+    text = str(value)
+    return json.dumps(text, ensure_ascii=False) if (" " in text or "=" in text or not text) else text
+
+
+class _TextFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        ts = time.strftime("%H:%M:%S", time.localtime(record.created))
+        ctx = getattr(record, "ctx", None)
+        suffix = (" " + " ".join(f"{k}={_kv(v)}" for k, v in ctx.items())) if ctx else ""
+        color = _COLORS.get(record.levelno, "")
+        return f"{color}[{ts}][{record.levelname}] {Style.RESET_ALL}{record.getMessage()}{suffix}"
+
+
+class _KVFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        ts = time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(record.created))
+        parts = [f"ts={ts}.{int(record.msecs):03d}", f"level={record.levelname}"]
+        parts += [f"{k}={_kv(v)}" for k, v in (getattr(record, "ctx", None) or {}).items()]
+        parts.append(f"msg={_kv(record.getMessage())}")
+        return " ".join(parts)
 
-def _ts():
-    return datetime.now().strftime('%H:%M:%S')
+
+class _JSONFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            "ts": record.created,
+            "level": record.levelname,
+            **(getattr(record, "ctx", None) or {}),
+            "msg": record.getMessage(),
+        }
+        return json.dumps(payload, ensure_ascii=False, default=str)
+
+
+_FORMATTERS = {"text": _TextFormatter, "kv": _KVFormatter, "json": _JSONFormatter}
+
+
+# =====================================================
+# Kuyruklu handler
+# =====================================================
+class _DroppingQueueHandler(logging.handlers.QueueHandler):
+    """Bağlamı çağıranın thread'inde yakalar; kuyruk doluysa kaydı atar."""
+
+    dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record.ctx = _LOG_CONTEXT.get()
+        record.msg = record.getMessage()
+        record.args = None
+        record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            _DroppingQueueHandler.dropped += 1
+
+
+def _resolve_level(name: str) -> Optional[int]:
+    """Bilinen seviye adı → sayısal seviye; tanınmazsa None (getLevelName bilinmeyende str döner)."""
+    level = logging.getLevelName((name or "").strip().upper())
+    return level if isinstance(level, int) else None
+
+
+def _build_logger() -> logging.Logger:
+    logger = logging.getLogger("rag")
+    level = _resolve_level(Config.LOG_LEVEL)
+    logger.setLevel(logging.INFO if level is None else level)
+    logger.propagate = False
+
+    sink = logging.StreamHandler(sys.stdout)
+    sink.setFormatter(_FORMATTERS.get(Config.LOG_FORMAT, _TextFormatter)())
+
+    q: "queue.Queue[logging.LogRecord]" = queue.Queue(maxsize=Config.LOG_QUEUE_SIZE)
+    logger.handlers[:] = [_DroppingQueueHandler(q)]
+    listener = logging.handlers.QueueListener(q, sink, respect_handler_level=False)
+    listener.start()
+    atexit.register(listener.stop)  # çıkışta kuyruktakiler yazılır
+    if level is None:
+        # env'deki bir yazım hatası import anında API'yi düşürmesin
+        logger.warning(f"[Logger] Geçersiz LOG_LEVEL={Config.LOG_LEVEL!r}, INFO kullanılıyor.")
+    return logger
+
+
+_logger = _build_logger()
+
+
+# =====================================================
+# Public API
+# =====================================================
+def is_debug_enabled() -> bool:
+    return _logger.isEnabledFor(logging.DEBUG)
+
+
+def log_debug(msg: str):
+    if _logger.isEnabledFor(logging.DEBUG):
+        _logger.debug(msg)
 
 def log_info(msg: str):
-    print(Fore.CYAN + f"[{_ts()}][INFO] " + Style.RESET_ALL + msg)
+    if _logger.isEnabledFor(logging.INFO):
+        _logger.info(msg)
 
 def log_success(msg: str):
-    print(Fore.GREEN + f"[{_ts()}][SUCCESS] " + Style.RESET_ALL + msg)
+    if _logger.isEnabledFor(SUCCESS):
+        _logger.log(SUCCESS, msg)
 
 def log_warning(msg: str):
-    print(Fore.YELLOW + f"[{_ts()}][WARNING] " + Style.RESET_ALL + msg)
+    _logger.warning(msg)
 
 def log_error(msg: str):
-    print(Fore.RED + f"[{_ts()}][ERROR] " + Style.RESET_ALL + msg)
+    _logger.error(msg)
+
+
+def log_dropped() -> int:
+    """Kuyruk dolduğu için atılan kayıt sayısı."""
+    return _DroppingQueueHandler.dropped
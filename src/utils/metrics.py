@@ -0,0 +1,310 @@
+# src/utils/metrics.py
+"""
+Süreç içi metrikler (harici collector gerekmez) ve Prometheus text çıktısı.
+
+- Counter / Gauge / Histogram: etiketli, thread-safe, yalnızca stdlib.
+- stage("chroma_query") / @timed("tavily"): bir aşamanın süresini
+  rag_stage_seconds{stage, route} histogramına yazar.
+- track_request("sync" | "stream"): istek süresi, sayaç ve in-flight
+  gauge'u. Route istek sırasında set_route() ile belirlenir; aşama
+  süreleri istek bitene kadar biriktirilip nihai route etiketiyle
+  yazılır (route'tan önce koşan routing / memory aşamaları da doğru
+  route altında görünür). İstek dışındaki (veya istek bittikten sonra
+  biten) aşamalar route="none" alır.
+- Aşamalar aktif trace'e de span olarak düşer (src/utils/tracing.py).
+- register_collector(): /metrics okunurken çağrılan ek üreticiler
+  (cache hit/miss, LLM gateway sayaçları vb. mevcut stats() çıktıları).
+
+Bağlam contextvars ile taşınır; _offload / spekülatif işler bağlamı
+kopyaladığı için havuz thread'lerindeki aşamalar da isteğe bağlanır.
+"""
+from __future__ import annotations
+
+import contextvars
+import math
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from src.config import Config
+from src.utils.tracing import record_span, set_trace_attrs, span
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# (labels, value) çiftleri
+Sample = Tuple[Dict[str, str], float]
+
+
+def _escape(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(labels: Dict[str, Any]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in labels.items()) + "}"
+
+
+def _num(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+# =====================================================
+# Metrik tipleri
+# =====================================================
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, Any]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(n, "")) for n in self.labelnames)
+
+    def _header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, help, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: Any) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        lines = self._header()
+        for key, value in items:
+            lines.append(f"{self.name}{_labels(dict(zip(self.labelnames, key)))} {_num(value)}")
+        return lines
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, amount: float = 1.0, **labels: Any) -> None:
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels: Any) -> None:
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # label anahtarı → [bucket sayaçları (kümülatif değil)..., +Inf], toplam
+        self._counts: Dict[Tuple[str, ...], List[int]] = {}
+        self._sums: Dict[Tuple[str, ...], float] = {}
+
+    def observe(self, value: float, **labels: Any) -> None:
+        key = self._key(labels)
+        idx = len(self.buckets)
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                idx = i
+                break
+        with self._lock:
+            counts = self._counts.get(key)
+            if counts is None:
+                counts = self._counts[key] = [0] * (len(self.buckets) + 1)
+                self._sums[key] = 0.0
+            counts[idx] += 1
+            self._sums[key] += value
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = sorted((k, list(v), self._sums[k]) for k, v in self._counts.items())
+        lines = self._header()
+        for key, counts, total in items:
+            base = dict(zip(self.labelnames, key))
+            running = 0
+            for bound, count in zip(self.buckets + (math.inf,), counts):
+                running += count
+                lines.append(f"{self.name}_bucket{_labels({**base, 'le': _num(bound)})} {running}")
+            lines.append(f"{self.name}_sum{_labels(base)} {_num(total)}")
+            lines.append(f"{self.name}_count{_labels(base)} {running}")
+        return lines
+
+
+# =====================================================
+# Kayıt
+# =====================================================
+Collector = Callable[[], Iterable[Tuple[str, str, str, List[Sample]]]]
+
+_METRICS: List[_Metric] = []
+_COLLECTORS: List[Collector] = []
+
+
+def _register(metric):
+    _METRICS.append(metric)
+    return metric
+
+
+def register_collector(fn: Collector) -> Collector:
+    """
+    /metrics okunurken çağrılır; (isim, tip, açıklama, [(etiketler, değer), ...])
+    dörtlüleri üretir. Hata veren collector çıktıyı bozmaz, atlanır.
+    """
+    _COLLECTORS.append(fn)
+    return fn
+
+
+STAGE_SECONDS = _register(Histogram(
+    "rag_stage_seconds", "RAG pipeline aşama süreleri (saniye).", ("stage", "route"),
+))
+REQUEST_SECONDS = _register(Histogram(
+    "rag_request_seconds", "Uçtan uca istek süresi (saniye).", ("mode", "route"),
+))
+REQUESTS_TOTAL = _register(Counter(
+    "rag_requests_total", "Tamamlanan istekler.", ("mode", "route", "status"),
+))
+IN_FLIGHT = _register(Gauge(
+    "rag_requests_in_flight", "Şu an işlenen istekler.", ("mode",),
+))
+
+
+def render_metrics() -> str:
+    """Prometheus text exposition formatı (0.0.4)."""
+    lines: List[str] = []
+    for metric in _METRICS:
+        lines.extend(metric.render())
+    for collector in list(_COLLECTORS):
+        try:
+            families = list(collector())
+        except Exception:
+            continue
+        for name, kind, help, samples in families:
+            lines.append(f"# HELP {name} {help}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, value in samples:
+                lines.append(f"{name}{_labels(labels)} {_num(value)}")
+    return "\n".join(lines) + "\n"
+
+
+# =====================================================
+# İstek bağlamı ve aşama zamanlayıcıları
+# =====================================================
+class RequestMetrics:
+    """Bir isteğin route'u ve (istek bitene kadar) biriken aşama süreleri."""
+
+    def __init__(self, mode: str):
+        self.mode = mode
+        self.route = "unknown"
+        self.started = time.perf_counter()
+        self.finished = False
+        self._pending: List[Tuple[str, float]] = []
+        self._lock = threading.Lock()
+
+    def record(self, stage: str, seconds: float) -> None:
+        with self._lock:
+            if not self.finished:
+                self._pending.append((stage, seconds))
+                return
+        # istek bittikten sonra biten iş (ör. atılan spekülatif retrieval) isteğe sayılmaz
+        STAGE_SECONDS.observe(seconds, stage=stage, route="none")
+
+    def finish(self, status: str = "ok") -> None:
+        with self._lock:
+            if self.finished:
+                return
+            self.finished = True
+            pending, self._pending = self._pending, []
+        for stage, seconds in pending:
+            STAGE_SECONDS.observe(seconds, stage=stage, route=self.route)
+        REQUEST_SECONDS.observe(time.perf_counter() - self.started, mode=self.mode, route=self.route)
+        REQUESTS_TOTAL.inc(mode=self.mode, route=self.route, status=status)
+        IN_FLIGHT.dec(mode=self.mode)
+
+
+_REQUEST: contextvars.ContextVar[Optional[RequestMetrics]] = contextvars.ContextVar("request_metrics", default=None)
+
+
+@contextmanager
+def track_request(mode: str) -> Iterator[Optional[RequestMetrics]]:
+    """
+    İsteği ölçer. Bağlam değişkeni bind_log_context gibi reset edilmeden
+    ayarlanır: async generator içinde farklı bir context'ten kapanınca
+    (istemci koptuğunda) token hatası olmaz.
+    """
+    if not Config.METRICS_ENABLED:
+        yield None
+        return
+    request = RequestMetrics(mode)
+    _REQUEST.set(request)
+    IN_FLIGHT.inc(mode=mode)
+    status = "ok"
+    try:
+        yield request
+    except (GeneratorExit, KeyboardInterrupt):
+        status = "cancelled"
+        raise
+    except BaseException as e:
+        # asyncio.CancelledError BaseException'dır; istemci kopması hata sayılmaz
+        status = "cancelled" if type(e).__name__ == "CancelledError" else "error"
+        raise
+    finally:
+        request.finish(status)
+
+
+def set_route(route: str) -> None:
+    """İsteğin route'unu metrik etiketine ve (varsa) trace özniteliğine yazar."""
+    set_trace_attrs(route=route)
+    request = _REQUEST.get()
+    if request is not None:
+        request.route = route
+
+
+def _observe(stage: str, seconds: float) -> None:
+    if not Config.METRICS_ENABLED:
+        return
+    request = _REQUEST.get()
+    if request is None:
+        STAGE_SECONDS.observe(seconds, stage=stage, route="none")
+    else:
+        request.record(stage, seconds)
+
+
+def observe_stage(stage: str, seconds: float) -> None:
+    """Başka yerde ölçülmüş (şimdi biten) süreyi kaydeder; aktif trace'e span olarak da eklenir."""
+    _observe(stage, seconds)
+    record_span(stage, seconds)
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    """Bloğun süresini `name` aşaması olarak kaydeder (hata olsa da); blok trace'te span olur."""
+    t0 = time.perf_counter()
+    with span(name):
+        try:
+            yield
+        finally:
+            _observe(name, time.perf_counter() - t0)
+
+
+def timed(name: str) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
+    """Fonksiyonun her çağrısını `name` aşaması olarak ölçen dekoratör."""
+    def decorator(fn: Callable[..., Any]) -> Callable[..., Any]:
+        @wraps(fn)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            with stage(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
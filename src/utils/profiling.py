@@ -0,0 +1,270 @@
+# src/utils/profiling.py
+"""
+Canlı istekler için isteğe bağlı (opt-in) örneklemeli profiler.
+
+- PROFILE_ENABLED=false (varsayılan) iken hiçbir şey çalışmaz: should_profile()
+  ilk satırda False döner, profiled() fonksiyonu olduğu gibi geri verir.
+- Açıkken istek PROFILE_HEADER başlığıyla (PROFILE_TOKEN tanımlıysa değeri
+  eşleşmeli) veya PROFILE_SAMPLE_RATE olasılığıyla profillenir.
+- Profil, istek süresince ayrı bir thread'de PROFILE_INTERVAL_MS aralıkla
+  yalnızca bu isteğin kodunu koşturan thread'lerin yığınını örnekler:
+  isteği başlatan thread + profiled() ile sarılıp havuza atılan işler
+  (_offload, spekülatif retrieval). Profillenen kod yavaşlamaz (cProfile'ın
+  her çağrıya eklediği maliyet yok).
+- Çıktı PROFILE_DIR altında request id ile: <id>.folded (flamegraph /
+  speedscope "collapsed stack" biçimi) + <id>.json (özet, en çok süre alan
+  fonksiyonlar). En fazla PROFILE_KEEP profil tutulur.
+
+Not: stream isteklerinde event loop thread'i diğer isteklerle paylaşılır;
+o thread'den alınan örneklerde eşzamanlı başka isteklerin async kodu da
+görünebilir.
+"""
+from __future__ import annotations
+
+import contextvars
+import glob
+import json
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from functools import wraps
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from src.config import Config
+from src.utils.logger import log_info, log_warning
+
+
+def should_profile(header_value: Optional[str]) -> bool:
+    if not Config.PROFILE_ENABLED:
+        return False
+    if header_value:
+        return not Config.PROFILE_TOKEN or header_value == Config.PROFILE_TOKEN
+    return Config.PROFILE_SAMPLE_RATE > 0 and random.random() < Config.PROFILE_SAMPLE_RATE
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{os.path.basename(code.co_filename)}:{code.co_name}"
+
+
+class RequestProfile:
+    """
+    - interval     : örnekleme aralığı (saniye)
+    - max_seconds  : bundan uzun süren isteklerde örnekleme durur (stream koruması)
+    - max_depth    : yığın başına en fazla çerçeve (kökten itibaren kırpılır)
+    """
+
+    def __init__(self, request_id: str, mode: str, out_dir: str, interval: float = 0.005,
+                 max_seconds: float = 60.0, max_depth: int = 128):
+        self.request_id = request_id
+        self.mode = mode
+        self.out_dir = out_dir
+        self.interval = max(0.001, interval)
+        self.max_seconds = max_seconds
+        self.max_depth = max_depth
+
+        self.started_at = time.time()
+        self._t0 = time.perf_counter()
+        self.duration = 0.0
+        self.samples = 0
+        self.stacks: "Counter[str]" = Counter()
+        self._threads: Dict[int, int] = {}      # thread ident → aktif çağrı sayısı
+        self._seen_threads: set = set()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._sampler = threading.Thread(target=self._run, name=f"profiler-{request_id}", daemon=True)
+
+    # -------------------------------------------------
+    # Hedef thread'ler
+    # -------------------------------------------------
+    def enter_thread(self) -> int:
+        ident = threading.get_ident()
+        with self._lock:
+            self._threads[ident] = self._threads.get(ident, 0) + 1
+            self._seen_threads.add(ident)
+        return ident
+
+    def exit_thread(self, ident: int) -> None:
+        with self._lock:
+            left = self._threads.get(ident, 0) - 1
+            if left > 0:
+                self._threads[ident] = left
+            else:
+                self._threads.pop(ident, None)
+
+    # -------------------------------------------------
+    # Örnekleyici thread
+    # -------------------------------------------------
+    def _sample(self) -> None:
+        with self._lock:
+            targets = list(self._threads)
+        if not targets:
+            return
+        frames = sys._current_frames()
+        for ident in targets:
+            frame = frames.get(ident)
+            if frame is None:
+                continue
+            stack: List[str] = []
+            while frame is not None and len(stack) < self.max_depth:
+                stack.append(_frame_label(frame))
+                frame = frame.f_back
+            self.stacks[";".join(reversed(stack))] += 1
+            self.samples += 1
+
+    def _run(self) -> None:
+        deadline = self._t0 + self.max_seconds
+        while not self._stop.wait(self.interval):
+            if time.perf_counter() > deadline:
+                break
+            self._sample()
+        self._stop.wait()
+        try:
+            self._write()
+        except Exception as e:
+            log_warning(f"[Profiler] {self.request_id} yazılamadı: {e}")
+
+    def start(self) -> None:
+        self._sampler.start()
+
+    def finish(self) -> None:
+        """Örneklemeyi durdurur; dosyalar örnekleyici thread'inde yazılır (çağıran beklemez)."""
+        self.duration = time.perf_counter() - self._t0
+        self._stop.set()
+
+    # -------------------------------------------------
+    # Çıktı
+    # -------------------------------------------------
+    def top_functions(self, limit: int = 25) -> List[Dict[str, Any]]:
+        """Kendi süresine (yığının tepesinde görülme) göre en pahalı fonksiyonlar."""
+        own: "Counter[str]" = Counter()
+        total: "Counter[str]" = Counter()
+        for stack, count in self.stacks.items():
+            frames = stack.split(";")
+            own[frames[-1]] += count
+            for fn in set(frames):
+                total[fn] += count
+        samples = max(1, self.samples)
+        return [
+            {
+                "function": fn,
+                "self": own[fn],
+                "total": total[fn],
+                "self_pct": round(100.0 * own[fn] / samples, 1),
+                "total_pct": round(100.0 * total[fn] / samples, 1),
+            }
+            for fn, _ in own.most_common(limit)
+        ]
+
+    def _write(self) -> None:
+        os.makedirs(self.out_dir, exist_ok=True)
+        base = os.path.join(self.out_dir, self.request_id)
+        with open(base + ".folded", "w", encoding="utf-8") as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+        meta = {
+            "request_id": self.request_id,
+            "mode": self.mode,
+            "started_at": self.started_at,
+            "duration_ms": round(self.duration * 1000, 3),
+            "interval_ms": round(self.interval * 1000, 3),
+            "samples": self.samples,
+            "threads": len(self._seen_threads),
+            "folded": os.path.basename(base + ".folded"),
+            "top": self.top_functions(),
+        }
+        with open(base + ".json", "w", encoding="utf-8") as f:
+            json.dump(meta, f, ensure_ascii=False, indent=2)
+        _prune(self.out_dir, Config.PROFILE_KEEP)
+        log_info(f"[Profiler] {self.request_id}: {self.samples} örnek → {base}.folded")
+
+
+def _prune(out_dir: str, keep: int) -> None:
+    metas = sorted(glob.glob(os.path.join(out_dir, "*.json")), key=os.path.getmtime, reverse=True)
+    for stale in metas[max(0, keep):]:
+        for path in (stale, stale[: -len(".json")] + ".folded"):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+
+# =====================================================
+# İstek bağlamı
+# =====================================================
+_PROFILE: contextvars.ContextVar[Optional[RequestProfile]] = contextvars.ContextVar("request_profile", default=None)
+
+
+@contextmanager
+def profile_request(request_id: str, mode: str) -> Iterator[RequestProfile]:
+    """
+    Bloğu profiller; bloğu çalıştıran thread hedeflenir. Bağlam değişkeni
+    reset edilmeden ayarlanır (async generator farklı context'ten kapanabilir).
+    """
+    profile = RequestProfile(
+        request_id,
+        mode,
+        Config.PROFILE_DIR,
+        interval=Config.PROFILE_INTERVAL_MS / 1000.0,
+        max_seconds=Config.PROFILE_MAX_SECONDS,
+    )
+    _PROFILE.set(profile)
+    ident = profile.enter_thread()
+    profile.start()
+    try:
+        yield profile
+    finally:
+        profile.exit_thread(ident)
+        profile.finish()
+
+
+def profiled(fn: Callable[..., Any]) -> Callable[..., Any]:
+    """
+    Aktif profil varsa fn'i, çalıştığı (havuz) thread'ini de örneklenecekler
+    arasına ekleyen bir sarmalayıcıyla döndürür; yoksa fn'in kendisini.
+    """
+    profile = _PROFILE.get()
+    if profile is None:
+        return fn
+
+    @wraps(fn)
+    def wrapper(*args: Any, **kwargs: Any) -> Any:
+        ident = profile.enter_thread()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            profile.exit_thread(ident)
+    return wrapper
+
+
+# =====================================================
+# Okuma (admin endpoint'leri)
+# =====================================================
+def list_profiles(limit: int = 20) -> List[Dict[str, Any]]:
+    metas = sorted(glob.glob(os.path.join(Config.PROFILE_DIR, "*.json")), key=os.path.getmtime, reverse=True)
+    out = []
+    for path in metas[:limit]:
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            continue
+        meta.pop("top", None)
+        out.append(meta)
+    return out
+
+
+def read_profile(request_id: str, kind: str = "json") -> Optional[str]:
+    """kind: json (özet) | folded (collapsed stack). Bulunamazsa None."""
+    if os.path.basename(request_id) != request_id or kind not in ("json", "folded"):
+        return None
+    path = os.path.join(Config.PROFILE_DIR, f"{request_id}.{kind}")
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return f.read()
+    except OSError:
+        return None
@@ -0,0 +1,41 @@
+# src/utils/reloading.py
+from __future__ import annotations
+
+import os
+import threading
+from typing import Callable, Generic, Optional, Tuple, TypeVar
+
+T = TypeVar("T")
+
+
+class ReloadingFile(Generic[T]):
+    """
+    Diskteki bir index dosyasını lazy yükler; dosya değiştiğinde (ör. yeniden
+    ingest sonrası) bir sonraki get() çağrısında yeniden yükler. Değişiklik
+    (mtime, inode, size) üçlüsüyle anlaşılır; os.replace ile yazılan dosyalar
+    aynı mtime tick'inde bile yeni inode alır. Dosya yoksa None döner.
+    """
+
+    def __init__(self, path: str, loader: Callable[[str], T]):
+        self.path = path
+        self._loader = loader
+        self._value: Optional[T] = None
+        self._stamp: Optional[Tuple[int, int, int]] = None
+        self._lock = threading.Lock()
+
+    def get(self) -> Optional[T]:
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        stamp = (st.st_mtime_ns, st.st_ino, st.st_size)
+        if stamp == self._stamp:
+            return self._value
+        with self._lock:
+            if stamp != self._stamp:
+                try:
+                    self._value = self._loader(self.path)
+                    self._stamp = stamp
+                except (ValueError, OSError):
+                    pass  # yazım sürerken okunduysa bir sonraki çağrıda tekrar dene
+        return self._value
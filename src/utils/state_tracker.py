@@ -1,15 +1,230 @@
+# src/utils/state_tracker.py
+"""
+Sistem çalışma geçmişi (her RAG çağrısında bir kayıt).
+
+Kayıtlar istek yolunda dosyaya yazılmaz: sınırlı bir kuyruğa bırakılır,
+tek bir arka plan thread'i bunları toplu halde append-only JSONL dosyasına
+yazar ve her toplu yazımdan sonra bir kez fsync yapar. Dosya boyut veya yaş
+sınırını aşınca zaman damgalı bir isimle döndürülür (rotation); en fazla
+STATE_LOG_KEEP eski dosya tutulur.
+
+Okuma: iter_state_records() eski → yeni tüm dosyaları satır satır akıtır,
+geçmişin tamamını belleğe yüklemez.
+
+    python -m src.utils.state_tracker --limit 20
+"""
+from __future__ import annotations
+
+import argparse
+import atexit
+import glob
 import json
 import os
+import queue
+import threading
+import time
 from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional
+
+from src.config import Config
+from src.utils.logger import log_warning
+
+
+def _rotated_pattern(path: str) -> str:
+    base, ext = os.path.splitext(path)
+    return f"{base}.*{ext}"
+
+
+class StateLogWriter:
+    """
+    - max_queue      : kuyruk doluysa kayıt atılır (istek yolu beklemez), sayacı tutulur
+    - batch_size     : tek seferde yazılacak en fazla kayıt
+    - flush_interval : kuyruk boş olsa da en geç bu sürede bir yazım/fsync
+    - max_bytes / max_age_seconds : rotation eşikleri (None → kapalı)
+    """
+
+    def __init__(
+        self,
+        path: str,
+        max_queue: int = 10000,
+        batch_size: int = 256,
+        flush_interval: float = 1.0,
+        max_bytes: Optional[int] = None,
+        max_age_seconds: Optional[float] = None,
+        keep: int = 7,
+    ):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self.batch_size = max(1, int(batch_size))
+        self.flush_interval = flush_interval
+        self.max_bytes = max_bytes
+        self.max_age_seconds = max_age_seconds
+        self.keep = keep
+
+        self._queue: "queue.Queue[Optional[Dict[str, Any]]]" = queue.Queue(maxsize=max_queue)
+        self._file = None
+        self._opened_at = 0.0
+        self._stats_lock = threading.Lock()
+
+        self.written = 0
+        self.dropped = 0
+        self.batches = 0
+        self.rotations = 0
+
+        self._thread = threading.Thread(target=self._run, name="state-log-writer", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def submit(self, record: Dict[str, Any]) -> bool:
+        try:
+            self._queue.put_nowait(record)
+            return True
+        except queue.Full:
+            with self._stats_lock:
+                self.dropped += 1
+            return False
+
+    # -------------------------------------------------
+    # Writer thread
+    # -------------------------------------------------
+    def _open(self) -> None:
+        self._file = open(self.path, "a", encoding="utf-8")
+        # yaş, dosyanın bu süreçte açıldığı andan sayılır
+        self._opened_at = time.time()
+
+    def _needs_rotation(self) -> bool:
+        if self._file is None:
+            return False
+        size = self._file.tell()
+        if size == 0:
+            return False
+        if self.max_bytes is not None and size >= self.max_bytes:
+            return True
+        return self.max_age_seconds is not None and time.time() - self._opened_at >= self.max_age_seconds
+
+    def _reopen_if_moved(self) -> None:
+        # başka bir süreç (worker) dosyayı döndürdüyse yeni dosyaya geç
+        try:
+            moved = os.stat(self.path).st_ino != os.fstat(self._file.fileno()).st_ino
+        except FileNotFoundError:
+            moved = True
+        if moved:
+            self._file.close()
+            self._open()
+
+    def _rotate(self) -> None:
+        self._file.close()
+        base, ext = os.path.splitext(self.path)
+        stamp = datetime.now().strftime("%Y%m%d-%H%M%S-%f")
+        try:
+            os.replace(self.path, f"{base}.{stamp}{ext}")
+            self.rotations += 1
+        except FileNotFoundError:
+            pass
+        old = sorted(glob.glob(_rotated_pattern(self.path)))
+        for stale in old[: max(0, len(old) - self.keep)]:
+            try:
+                os.remove(stale)
+            except OSError:
+                pass
+        self._open()
+
+    def _write_batch(self, batch: List[Dict[str, Any]]) -> None:
+        if self._file is None:
+            self._open()
+        else:
+            self._reopen_if_moved()
+        if self._needs_rotation():
+            self._rotate()
+        payload = "".join(json.dumps(r, ensure_ascii=False) + "\n" for r in batch)
+        self._file.write(payload)  # tek write → satırlar diğer süreçlerle karışmaz
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self.written += len(batch)
+        self.batches += 1
+
+    def _run(self) -> None:
+        stop = False
+        while not stop:
+            try:
+                item = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                continue
+            batch: List[Dict[str, Any]] = []
+            while True:
+                if item is None:
+                    stop = True
+                else:
+                    batch.append(item)
+                if stop or len(batch) >= self.batch_size:
+                    break
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+            if batch:
+                try:
+                    self._write_batch(batch)
+                except Exception as e:
+                    with self._stats_lock:
+                        self.dropped += len(batch)
+                    log_warning(f"[StateTracker] {len(batch)} kayıt yazılamadı: {e}")
+        if self._file is not None:
+            self._file.close()
+
+    def close(self, timeout: float = 5.0) -> None:
+        """Kuyruktakileri yazıp thread'i durdurur (süreç kapanışında çağrılır)."""
+        if self._thread.is_alive():
+            try:
+                self._queue.put(None, timeout=timeout)
+            except queue.Full:
+                return
+            self._thread.join(timeout)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "path": self.path,
+            "queued": self._queue.qsize(),
+            "written": self.written,
+            "dropped": self.dropped,
+            "batches": self.batches,
+            "rotations": self.rotations,
+        }
+
+
+# dosya yolu başına tek yazıcı (aynı dosyaya iki thread yazmasın)
+_WRITERS: Dict[str, StateLogWriter] = {}
+_WRITER_LOCK = threading.Lock()
+
+
+def get_state_writer(path: Optional[str] = None) -> StateLogWriter:
+    path = path or Config.STATE_LOG_PATH
+    writer = _WRITERS.get(path)
+    if writer is None:
+        with _WRITER_LOCK:
+            writer = _WRITERS.get(path)
+            if writer is None:
+                writer = _WRITERS[path] = StateLogWriter(
+                    path,
+                    max_queue=Config.STATE_LOG_QUEUE,
+                    batch_size=Config.STATE_LOG_BATCH,
+                    flush_interval=Config.STATE_LOG_FLUSH_INTERVAL,
+                    max_bytes=Config.STATE_LOG_MAX_BYTES,
+                    max_age_seconds=Config.STATE_LOG_ROTATE_SECONDS,
+                    keep=Config.STATE_LOG_KEEP,
+                )
+    return writer
+
 
 class StateTracker:
     """
     Sistem çalışma geçmişini kaydeder (her RAG çağrısında).
+    Kayıt kuyruğa bırakılır; disk yazımı arka plan thread'indedir.
+    path verilmezse Config.STATE_LOG_PATH kullanılır.
     """
-    def __init__(self, path="data/state.json"):
-        self.path = path
-        if not os.path.exists("data"):
-            os.makedirs("data", exist_ok=True)
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or Config.STATE_LOG_PATH
+        self.writer = get_state_writer(self.path)
 
     def log_state(self, query: str, answer: str, scores: dict):
         record = {
@@ -18,13 +233,51 @@ class StateTracker:
             "answer": answer,
             "scores": scores
         }
-        history = []
-        if os.path.exists(self.path):
-            with open(self.path, "r", encoding="utf-8") as f:
+        if not self.writer.submit(record):
+            log_warning("[StateTracker] Kuyruk dolu, kayıt atlandı.")
+
+
+# =====================================================
+# Okuyucu
+# =====================================================
+def state_log_files(path: Optional[str] = None) -> List[str]:
+    """Döndürülmüş dosyalar (eski → yeni) + aktif dosya."""
+    path = path or Config.STATE_LOG_PATH
+    files = sorted(glob.glob(_rotated_pattern(path)))
+    if os.path.exists(path):
+        files.append(path)
+    return files
+
+
+def iter_state_records(path: Optional[str] = None, since: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+    """Kayıtları satır satır akıtır; `since` (ISO zaman) verilirse daha eskileri atlanır."""
+    for file in state_log_files(path):
+        with open(file, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
                 try:
-                    history = json.load(f)
+                    record = json.loads(line)
                 except json.JSONDecodeError:
-                    history = []
-        history.append(record)
-        with open(self.path, "w", encoding="utf-8") as f:
-            json.dump(history, f, indent=2, ensure_ascii=False)
+                    continue  # yarım kalmış son satır (çökme) atlanır
+                if since and record.get("timestamp", "") < since:
+                    continue
+                yield record
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="State log kayıtlarını JSONL olarak yazdırır.")
+    parser.add_argument("--path", default=Config.STATE_LOG_PATH)
+    parser.add_argument("--since", help="ISO zaman damgası (ör. 2024-05-01T00:00:00)")
+    parser.add_argument("--limit", type=int, default=0, help="en fazla kayıt (0 → hepsi)")
+    args = parser.parse_args()
+
+    for i, record in enumerate(iter_state_records(args.path, args.since)):
+        if args.limit and i >= args.limit:
+            break
+        print(json.dumps(record, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
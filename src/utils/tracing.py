@@ -0,0 +1,352 @@
+# src/utils/tracing.py
+"""
+Süreç içi istek izleri (trace) — tek bir yavaş isteğin waterfall'u.
+
+- start_trace("run_rag", mode="sync"): isteğin kök span'ı; request_id log
+  bağlamından (bind_log_context) alınır.
+- span("chroma_query", n=4) / @traced(): iç içe span'lar; süre, öznitelik,
+  thread ve hata bilgisi tutulur. Aktif trace yoksa maliyet tek bir
+  contextvar okumasıdır. metrics.stage() ile ölçülen her aşama da span olur.
+- Biten trace'ler TraceRecorder'da: en yavaş TRACE_KEEP_SLOWEST trace (heap)
+  + son TRACE_KEEP_RECENT trace (ring buffer). TRACE_LOG_MIN_MS'i aşanlar
+  arka plan yazıcısıyla (StateLogWriter) JSONL dosyasına eklenir.
+
+Bağlam contextvars ile taşınır; _offload / spekülatif işler bağlamı
+kopyaladığı için havuz thread'lerindeki span'lar da doğru ebeveynin altına
+düşer.
+
+    python -m src.utils.tracing --slowest 5
+    python -m src.utils.tracing --request-id 3f2a9c1b7d4e
+"""
+from __future__ import annotations
+
+import argparse
+import contextvars
+import heapq
+import itertools
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from functools import wraps
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional, Tuple
+
+from src.config import Config
+from src.utils.logger import current_log_context, log_warning, new_request_id
+from src.utils.state_tracker import StateLogWriter, iter_state_records
+
+
+class Span:
+    __slots__ = ("name", "span_id", "parent_id", "start", "end", "attrs", "thread", "error")
+
+    def __init__(self, name: str, span_id: int, parent_id: Optional[int], start: float, attrs: Dict[str, Any]):
+        self.name = name
+        self.span_id = span_id
+        self.parent_id = parent_id
+        self.start = start
+        self.end: Optional[float] = None
+        self.attrs = attrs
+        self.thread = threading.current_thread().name
+        self.error: Optional[str] = None
+
+    def set(self, **attrs: Any) -> None:
+        self.attrs.update(attrs)
+
+
+class Trace:
+    def __init__(self, name: str, request_id: str, attrs: Dict[str, Any], max_spans: int):
+        self.request_id = request_id
+        self.started_at = time.time()
+        self.t0 = time.perf_counter()
+        self.max_spans = max_spans
+        self.finished = False
+        self.dropped_spans = 0
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self.root = Span(name, 0, None, self.t0, dict(attrs))
+        self.spans: List[Span] = [self.root]
+
+    def open_span(self, name: str, parent_id: Optional[int], attrs: Dict[str, Any], start: Optional[float] = None) -> Optional[Span]:
+        with self._lock:
+            if self.finished:
+                return None
+            if len(self.spans) >= self.max_spans:
+                self.dropped_spans += 1
+                return None
+            span = Span(name, next(self._ids), parent_id, start if start is not None else time.perf_counter(), attrs)
+            self.spans.append(span)
+            return span
+
+    @property
+    def duration_ms(self) -> float:
+        end = self.root.end if self.root.end is not None else time.perf_counter()
+        return (end - self.t0) * 1000
+
+    def to_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            spans = list(self.spans)
+        depth: Dict[int, int] = {}
+        out = []
+        for s in sorted(spans, key=lambda s: (s.start, s.span_id)):
+            depth[s.span_id] = depth.get(s.parent_id, -1) + 1 if s.parent_id is not None else 0
+            item = {
+                "id": s.span_id,
+                "parent": s.parent_id,
+                "depth": depth[s.span_id],
+                "name": s.name,
+                "start_ms": round((s.start - self.t0) * 1000, 3),
+                "duration_ms": round(((s.end or time.perf_counter()) - s.start) * 1000, 3),
+                "thread": s.thread,
+            }
+            if s.attrs:
+                item["attrs"] = s.attrs
+            if s.error:
+                item["error"] = s.error
+            out.append(item)
+        return {
+            "request_id": self.request_id,
+            "name": self.root.name,
+            "started_at": self.started_at,
+            "duration_ms": round(self.duration_ms, 3),
+            "attrs": self.root.attrs,
+            "error": self.root.error,
+            "dropped_spans": self.dropped_spans,
+            "spans": out,
+        }
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "request_id": self.request_id,
+            "name": self.root.name,
+            "started_at": self.started_at,
+            "duration_ms": round(self.duration_ms, 3),
+            "spans": len(self.spans),
+            **self.root.attrs,
+        }
+
+
+# =====================================================
+# Kayıt: en yavaş N + son N, yavaşlar JSONL'e
+# =====================================================
+class TraceRecorder:
+    def __init__(self, keep_slowest: int = 50, keep_recent: int = 200, writer=None, log_min_ms: float = 0.0):
+        self.keep_slowest = max(0, int(keep_slowest))
+        self.log_min_ms = log_min_ms
+        self.writer = writer
+        self._slowest: List[Tuple[float, int, Trace]] = []   # min-heap: en hızlısı tepede
+        self._recent: Deque[Trace] = deque(maxlen=max(1, int(keep_recent)))
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+        self.recorded = 0
+        self.logged = 0
+
+    def record(self, trace: Trace) -> None:
+        duration = trace.duration_ms
+        with self._lock:
+            self.recorded += 1
+            self._recent.append(trace)
+            item = (duration, next(self._seq), trace)
+            if len(self._slowest) < self.keep_slowest:
+                heapq.heappush(self._slowest, item)
+            elif self._slowest and duration > self._slowest[0][0]:
+                heapq.heapreplace(self._slowest, item)
+        if self.writer is not None and duration >= self.log_min_ms:
+            if self.writer.submit(trace.to_dict()):
+                self.logged += 1
+
+    def slowest(self, limit: int = 20) -> List[Trace]:
+        with self._lock:
+            items = sorted(self._slowest, key=lambda x: x[0], reverse=True)
+        return [t for _, _, t in items[:limit]]
+
+    def recent(self, limit: int = 20) -> List[Trace]:
+        with self._lock:
+            items = list(self._recent)
+        return items[::-1][:limit]
+
+    def get(self, request_id: str) -> Optional[Trace]:
+        with self._lock:
+            candidates = list(self._recent) + [t for _, _, t in self._slowest]
+        for trace in reversed(candidates):
+            if trace.request_id == request_id:
+                return trace
+        return None
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "recorded": self.recorded,
+                "logged": self.logged,
+                "recent": len(self._recent),
+                "slowest": len(self._slowest),
+                "slowest_ms": round(max((d for d, _, _ in self._slowest), default=0.0), 3),
+            }
+
+
+_RECORDER: Optional[TraceRecorder] = None
+_RECORDER_LOCK = threading.Lock()
+
+
+def get_trace_recorder() -> TraceRecorder:
+    global _RECORDER
+    if _RECORDER is None:
+        with _RECORDER_LOCK:
+            if _RECORDER is None:
+                writer = None
+                if Config.TRACE_LOG_PATH:
+                    writer = StateLogWriter(
+                        Config.TRACE_LOG_PATH,
+                        max_bytes=Config.TRACE_LOG_MAX_BYTES,
+                        keep=Config.STATE_LOG_KEEP,
+                    )
+                _RECORDER = TraceRecorder(
+                    keep_slowest=Config.TRACE_KEEP_SLOWEST,
+                    keep_recent=Config.TRACE_KEEP_RECENT,
+                    writer=writer,
+                    log_min_ms=Config.TRACE_LOG_MIN_MS,
+                )
+    return _RECORDER
+
+
+# =====================================================
+# API
+# =====================================================
+_TRACE: contextvars.ContextVar[Optional[Trace]] = contextvars.ContextVar("trace", default=None)
+_SPAN: contextvars.ContextVar[Optional[int]] = contextvars.ContextVar("trace_span", default=None)
+
+
+def _active() -> Optional[Trace]:
+    trace = _TRACE.get()
+    return trace if trace is not None and not trace.finished else None
+
+
+def _error_name(exc: BaseException) -> str:
+    return f"{type(exc).__name__}: {exc}" if str(exc) else type(exc).__name__
+
+
+@contextmanager
+def start_trace(name: str, **attrs: Any) -> Iterator[Optional[Trace]]:
+    """
+    Kök span. Bağlam değişkenleri reset edilmeden ayarlanır (track_request
+    ile aynı gerekçe: async generator farklı context'ten kapanabilir).
+    """
+    if not Config.TRACE_ENABLED:
+        yield None
+        return
+    request_id = current_log_context().get("request_id") or new_request_id()
+    trace = Trace(name, request_id, {k: v for k, v in attrs.items() if v is not None}, Config.TRACE_MAX_SPANS)
+    _TRACE.set(trace)
+    _SPAN.set(0)
+    try:
+        yield trace
+    except BaseException as e:
+        trace.root.error = _error_name(e)
+        raise
+    finally:
+        trace.root.end = time.perf_counter()
+        with trace._lock:
+            trace.finished = True
+        try:
+            get_trace_recorder().record(trace)
+        except Exception as e:
+            log_warning(f"[Trace] Kaydedilemedi: {e}")
+
+
+@contextmanager
+def span(name: str, **attrs: Any) -> Iterator[Optional[Span]]:
+    trace = _active()
+    if trace is None:
+        yield None
+        return
+    s = trace.open_span(name, _SPAN.get(), attrs)
+    if s is None:
+        yield None
+        return
+    token = _SPAN.set(s.span_id)
+    try:
+        yield s
+    except BaseException as e:
+        s.error = _error_name(e)
+        raise
+    finally:
+        s.end = time.perf_counter()
+        try:
+            _SPAN.reset(token)
+        except ValueError:
+            pass  # async generator başka bir context'te kapatıldı
+
+
+def traced(name: Optional[str] = None) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
+    """Fonksiyonu span ile sarar; isim verilmezse fonksiyonun qualname'i."""
+    def decorator(fn: Callable[..., Any]) -> Callable[..., Any]:
+        span_name = name or fn.__qualname__
+
+        @wraps(fn)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            if _active() is None:
+                return fn(*args, **kwargs)
+            with span(span_name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def record_span(name: str, seconds: float, **attrs: Any) -> None:
+    """Ölçümü başka yerde yapılmış (şimdi biten) bir aralığı span olarak ekler."""
+    trace = _active()
+    if trace is None:
+        return
+    end = time.perf_counter()
+    s = trace.open_span(name, _SPAN.get(), attrs, start=end - seconds)
+    if s is not None:
+        s.end = end
+
+
+def set_trace_attrs(**attrs: Any) -> None:
+    trace = _active()
+    if trace is not None:
+        trace.root.set(**attrs)
+
+
+# =====================================================
+# Waterfall (metin)
+# =====================================================
+def render_waterfall(trace: Dict[str, Any], width: int = 48) -> str:
+    total = max(trace["duration_ms"], 1e-6)
+    attrs = " ".join(f"{k}={v}" for k, v in (trace.get("attrs") or {}).items())
+    lines = [f"request_id={trace['request_id']} {trace['name']} total={trace['duration_ms']:.1f}ms {attrs}".rstrip()]
+    if trace.get("error"):
+        lines.append(f"error={trace['error']}")
+    name_w = max((len(s["name"]) + 2 * s["depth"] for s in trace["spans"]), default=10)
+    for s in trace["spans"]:
+        left = int(s["start_ms"] / total * width)
+        bar = max(1, int(round(s["duration_ms"] / total * width)))
+        left = min(left, width - 1)
+        bar = min(bar, width - left)
+        label = ("  " * s["depth"] + s["name"]).ljust(name_w)
+        suffix = " !" if s.get("error") else ""
+        lines.append(
+            f"{s['start_ms']:>9.1f} {s['duration_ms']:>9.1f}ms  {label}  |{' ' * left}{'█' * bar}{' ' * (width - left - bar)}|{suffix}"
+        )
+    if trace.get("dropped_spans"):
+        lines.append(f"... {trace['dropped_spans']} span atıldı (TRACE_MAX_SPANS)")
+    return "\n".join(lines) + "\n"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="JSONL trace dosyasından waterfall yazdırır.")
+    parser.add_argument("--path", default=Config.TRACE_LOG_PATH)
+    parser.add_argument("--request-id", help="tek bir isteğin trace'i")
+    parser.add_argument("--slowest", type=int, default=5, help="request-id yoksa en yavaş N trace")
+    args = parser.parse_args()
+
+    if args.request_id:
+        traces = [t for t in iter_state_records(args.path) if t.get("request_id") == args.request_id]
+    else:
+        traces = heapq.nlargest(args.slowest, iter_state_records(args.path), key=lambda t: t.get("duration_ms", 0))
+    for trace in traces:
+        print(render_waterfall(trace))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,8 @@
+# tests/conftest.py
+"""Testler ağsız ve diske yazmadan çalışsın; Config import edilmeden önce ayarlanır."""
+import os
+
+os.environ.setdefault("LLM_PROVIDER", "fake")
+os.environ.setdefault("SESSION_BACKEND", "memory")
+os.environ.setdefault("SESSION_SPILL_PATH", "")
+os.environ.setdefault("TRACE_LOG_PATH", "")
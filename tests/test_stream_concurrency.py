@@ -0,0 +1,68 @@
+# tests/test_stream_concurrency.py
+"""
+Eşzamanlı stream_rag çağrıları event loop'u paylaşırken birbirini beklememeli.
+
+Sahte provider her token arasında asyncio.sleep ile bekler (ağ yok). Sorular
+kısa sohbet mesajlarıdır; gerçek router heuristiği GENERIC_CHAT'e yollar.
+Gateway'in provider'ı monkeypatch ile yalnızca test süresince değişir.
+"""
+import asyncio
+import time
+from typing import List, Tuple
+
+import pytest
+
+import src.pipeline as pipeline
+from src.memory.session_store import get_memory
+from src.registry import get_llm
+
+N_STREAMS = 8
+N_TOKENS = 20
+DELAY = 0.02
+
+
+class _DelayedProvider:
+    """Token başına DELAY saniye bekleyen async provider."""
+
+    def generate(self, prompt, model, timeout):
+        return ""
+
+    async def astream(self, prompt, model, timeout):
+        for i in range(N_TOKENS):
+            await asyncio.sleep(DELAY)
+            yield f"tok{i} "
+
+
+@pytest.fixture
+def delayed_llm(monkeypatch):
+    monkeypatch.setattr(get_llm(), "provider", _DelayedProvider())
+
+
+async def _consume(idx: int, events: List[Tuple[float, int]], t0: float) -> None:
+    async for line in pipeline.stream_rag(f"selam {idx}", f"test-stream-{idx}"):
+        if line.startswith("data: tok"):
+            events.append((time.perf_counter() - t0, idx))
+
+
+async def _run_streams() -> Tuple[float, List[Tuple[float, int]]]:
+    events: List[Tuple[float, int]] = []
+    t0 = time.perf_counter()
+    await asyncio.gather(*[_consume(i, events, t0) for i in range(N_STREAMS)])
+    return time.perf_counter() - t0, events
+
+
+def test_streams_interleave_and_overlap(delayed_llm):
+    total, events = asyncio.run(_run_streams())
+
+    assert len(events) == N_STREAMS * N_TOKENS
+    events.sort()
+    switches = sum(1 for a, b in zip(events, events[1:]) if a[1] != b[1])
+    # seri çalışsaydı yalnızca N-1 geçiş olurdu
+    assert switches > N_STREAMS * (N_TOKENS // 2)
+
+    single = N_TOKENS * DELAY
+    assert total < single * 3, f"{N_STREAMS} stream {total:.2f}s sürdü (tek stream ≈ {single:.2f}s)"
+
+    for i in range(N_STREAMS):
+        turns = get_memory(f"test-stream-{i}").export_messages()
+        assert [m["role"] for m in turns] == ["user", "assistant"]